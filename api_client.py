@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MES API İstemcisi
+- Tüm modüllerin ortak API çağrıları: prodEvent, energy, faultEvent,
+  workCenter ürün ID'si ve session start/end/currentSessionId
+- Hazır header'lar, tek bir başarılı durum kodu listesi
+- Her çağrı için süre ölçümü (endpoint bazlı p50/p95/p99 ve throughput)
+- Transport: api_resilience (yeniden deneme, devre kesici, idempotency);
+  uploader atanmışsa olay POST'ları api_uploader kuyruğuna bırakılır
+- Yerel (negatif) session ID'li olaylar offline_session deposuna yazılır
+- Sunucuda kapanmış (ölü) session'lara olay gönderilmez (bkz. session_sync)
+- Olay POST'ları endpoint + wc_id bazlı hız sınırından geçer (bkz. rate_limit)
+"""
+
+import time
+import logging
+from array import array
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+
+import requests
+
+import api_resilience
+from rate_limit import RateLimiter
+from config import API_ENDPOINTS, API_KEY, API_PRODUCT_ID_TTL
+
+logger = logging.getLogger(__name__)
+
+# Başarılı sayılan HTTP kodları (sunucu bazı başarılı kayıtlarda 501 döndürüyor)
+ACCEPTED_STATUS = (200, 201, 501)
+
+HEADERS = {
+    'apiKey': API_KEY,
+    'Accept': 'application/json',
+    'Content-Type': 'application/json'
+}
+
+
+def format_timestamp(ts_ms):
+    """Epoch ms → API'nin beklediği Türkiye saati ISO 8601 metni (UTC+3, milisaniye)"""
+    # Türkiye saati = UTC + 3 saat (yazlık/kışlık saat farkı göz ardı)
+    utc = datetime.fromtimestamp(ts_ms / 1000.0, timezone.utc).replace(tzinfo=None)
+    return (utc + timedelta(hours=3)).isoformat(timespec='milliseconds')
+
+
+def percentile(values, q):
+    """Sıralı olmayan listeden yüzdelik (q: 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class EndpointStats:
+    """Bir endpoint için gecikme ve throughput istatistiği"""
+
+    def __init__(self, window=1000):
+        self.lock = Lock()
+        # Son window çağrı: bitiş zamanı ve gecikme (sn) - sabit boyutlu halka, nesne tutulmaz
+        self.window = window
+        self.times = array('d', bytes(8 * window))
+        self.latencies = array('d', bytes(8 * window))
+        self.count = 0
+        self.sent = 0
+        self.failed = 0
+
+    def record(self, latency, ok):
+        with self.lock:
+            i = self.count % self.window
+            self.times[i] = time.monotonic()
+            self.latencies[i] = latency
+            self.count += 1
+            if ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+
+    def snapshot(self):
+        with self.lock:
+            n = min(self.count, self.window)
+            latencies = [lat * 1000.0 for lat in self.latencies[:n]]
+            if n:
+                newest = self.times[(self.count - 1) % self.window]
+                oldest = self.times[self.count % self.window if self.count > self.window else 0]
+            sent, failed = self.sent, self.failed
+
+        throughput = 0.0
+        if n >= 2:
+            span = newest - oldest
+            if span > 0:
+                throughput = (n - 1) / span
+
+        return {
+            'sent': sent,
+            'failed': failed,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'throughput_per_s': throughput
+        }
+
+
+# Senkron çağrılar ve api_uploader aynı istatistiklere yazar
+CALL_STATS = {name: EndpointStats() for name in API_ENDPOINTS}
+
+
+def record_call(endpoint, latency, ok):
+    stats = CALL_STATS.get(endpoint)
+    if stats:
+        stats.record(latency, ok)
+
+
+def get_call_stats():
+    """Endpoint bazlı gecikme/throughput istatistikleri"""
+    return {name: stats.snapshot() for name, stats in CALL_STATS.items()}
+
+
+def log_call_stats():
+    """Kullanılan endpoint'lerin istatistiklerini logla"""
+    for name, s in get_call_stats().items():
+        if s['sent'] or s['failed']:
+            logger.info(f"📊 {name}: {s['sent']} ok / {s['failed']} hata | "
+                        f"p50={s['p50_ms']:.0f}ms p95={s['p95_ms']:.0f}ms p99={s['p99_ms']:.0f}ms | "
+                        f"{s['throughput_per_s']:.1f} istek/s")
+
+
+def is_local_session_id(session_id):
+    """Offline modda verilen yerel (negatif) session ID mi?"""
+    return isinstance(session_id, int) and session_id < 0
+
+
+class ApiResult:
+    """API çağrısı sonucu"""
+
+    __slots__ = ('ok', 'status', 'data', 'error', 'elapsed', 'queued')
+
+    def __init__(self, ok, status=None, data=None, error=None, elapsed=0.0, queued=False):
+        self.ok = ok
+        self.status = status      # HTTP kodu (bağlantı hatasında None)
+        self.data = data          # JSON cevap (yoksa metin)
+        self.error = error        # Hata açıklaması
+        self.elapsed = elapsed    # Saniye
+        self.queued = queued      # Asenkron göndericiye bırakıldı mı?
+
+
+class MESApiClient:
+    """MES API istemcisi - tüm modüller için tek giriş noktası"""
+
+    def __init__(self, timeout=5, product_id_ttl=API_PRODUCT_ID_TTL):
+        self.timeout = timeout
+        self.product_id_ttl = product_id_ttl
+        self.http = requests.Session()  # Keep-alive bağlantı havuzu
+        self.uploader = None            # api_uploader.APIUploader (opsiyonel)
+        self.offline_store = None       # offline_session.OfflineSessionStore (opsiyonel)
+
+        self.product_ids = {}           # wc_id → (product_id, zaman)
+        self.product_lock = Lock()
+
+        self.dead_sessions = set()      # Sunucuda kapanmış session ID'leri
+        self.dead_dropped = 0           # Ölü session'a gönderilmeyen olay sayısı
+
+        # Gürültülü sensörler sunucuyu boğmasın - birleşik olaylar arka planda gönderilir
+        self.rate_limiter = RateLimiter()
+        self.rate_limiter.start(self._flush_aggregated)
+
+    def _call(self, method, endpoint, url=None, params=None, json=None,
+              idempotency_key=None, timeout=None):
+        """Tek bir senkron çağrı - süre ölçülür, hatalar ApiResult içinde döner"""
+        start = time.monotonic()
+        status = None
+        data = None
+        error = None
+
+        try:
+            response = api_resilience.request(
+                method,
+                endpoint,
+                url=url,
+                params=params,
+                json=json,
+                headers=HEADERS,
+                idempotency_key=idempotency_key,
+                timeout=timeout or self.timeout,
+                http=self.http
+            )
+            status = response.status_code
+            if response.content:
+                try:
+                    data = response.json()
+                except ValueError:
+                    data = response.text
+        except api_resilience.CircuitOpenError:
+            error = "devre açık (sunucu erişilemiyor)"
+        except requests.exceptions.Timeout:
+            error = f"timeout ({timeout or self.timeout}s)"
+        except requests.exceptions.ConnectionError:
+            error = "bağlantı hatası"
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+
+        elapsed = time.monotonic() - start
+        ok = status in ACCEPTED_STATUS
+        record_call(endpoint, elapsed, ok)
+
+        if not ok:
+            logger.warning(f"⚠️ {endpoint} API hatası: {error or f'HTTP {status}'}")
+            if data is not None:
+                logger.debug(f"Response: {data}")
+
+        return ApiResult(ok, status, data, error, elapsed)
+
+    def _post_event(self, endpoint, data, session_id, idempotency_key=None, wait=False, throttle=True):
+        """
+        Olay POST'u - uploader varsa kuyruğa bırak, yoksa senkron gönder.
+        wait=True (senkron) çağrılar hız sınırına takılmaz.
+        """
+        # Offline session: olay sunucuya değil yerel depoya
+        if is_local_session_id(session_id):
+            if self.offline_store and self.offline_store.record(session_id, endpoint, data):
+                return ApiResult(True, queued=True)
+            logger.warning(f"⚠️ Offline session kaydı yok, olay atıldı: {endpoint} (session={session_id})")
+            return ApiResult(False, error="offline session bulunamadı")
+
+        # Sunucuda kapanmış session: istek boşa gitmesin
+        if session_id in self.dead_sessions:
+            self.dead_dropped += 1
+            if self.dead_dropped % 100 == 1:
+                logger.warning(f"⚠️ Kapanmış session'a olay gönderilmedi: {endpoint} "
+                               f"(session={session_id}, toplam {self.dead_dropped})")
+            return ApiResult(False, error="session sunucuda kapalı")
+
+        # Hız sınırı: aşılırsa olay birleştirilmek üzere bekletilir ya da atılır
+        if throttle and not wait and not self.rate_limiter.admit(endpoint, data):
+            return ApiResult(True, queued=True)
+
+        if idempotency_key is None:
+            idempotency_key = api_resilience.new_idempotency_key()
+
+        if self.uploader and not wait:
+            if self.uploader.submit(endpoint, data, session_id=session_id,
+                                    idempotency_key=idempotency_key):
+                return ApiResult(True, queued=True)
+
+        logger.debug(f"API POST ({endpoint}): {data}")
+        return self._call('POST', endpoint, json=data, idempotency_key=idempotency_key)
+
+    def _flush_aggregated(self, endpoint, data):
+        """Hız sınırında birleştirilen olayı gönder"""
+        self._post_event(endpoint, data, data.get('session_id'), throttle=False)
+
+    # --- Olaylar ---
+
+    def post_prod_event(self, session_id, wc_id, quantity, product_id, speed_rpm,
+                        endpoint='product', idempotency_key=None, wait=False):
+        """prodEvent (ürün / ağırlık / konveyör)"""
+        data = {
+            "session_id": session_id,
+            "wc_id": wc_id,
+            "quantity": quantity,
+            "product_id": product_id,
+            "speed_rpm": speed_rpm
+        }
+        return self._post_event(endpoint, data, session_id, idempotency_key, wait)
+
+    def post_energy(self, session_id, wc_id, voltage_v, current_a, power_w,
+                    idempotency_key=None, wait=False):
+        """energy (tüketim / üretim)"""
+        data = {
+            "wc_id": wc_id,
+            "voltage_v": voltage_v,
+            "current_a": current_a,
+            "power_w": power_w,
+            "session_id": session_id
+        }
+        return self._post_event('energy', data, session_id, idempotency_key, wait)
+
+    def post_fault(self, session_id, wc_id, fault_type_id, start_ts, end_ts,
+                   idempotency_key=None, wait=False):
+        """faultEvent - start_ts/end_ts epoch ms (int) ise ISO metne çevrilir"""
+        if isinstance(start_ts, int):
+            start_ts = format_timestamp(start_ts)
+        if isinstance(end_ts, int):
+            end_ts = format_timestamp(end_ts)
+        data = {
+            "fault_id": 0,
+            "wc_id": wc_id,
+            "session_id": session_id,
+            "fault_type_id": fault_type_id,
+            "start_ts": start_ts,
+            "end_ts": end_ts
+        }
+        return self._post_event('fault', data, session_id, idempotency_key, wait)
+
+    def get_product_id(self, wc_id):
+        """
+        workCenter'ın ürün ID'si (product_id_ttl süresince önbellekten).
+        API'ye ulaşılamazsa süresi dolmuş önbellek değeri (yoksa None) döner.
+        """
+        now = time.monotonic()
+        with self.product_lock:
+            cached = self.product_ids.get(wc_id)
+        if cached and self.product_id_ttl > 0 and now - cached[1] < self.product_id_ttl:
+            return cached[0]
+
+        url = f"{API_ENDPOINTS['wc_id_name']}/{wc_id}"
+        result = self._call('GET', 'wc_id_name', url=url)
+        if not result.ok:
+            return cached[0] if cached else None
+
+        product_id = result.data.get('product_id') if isinstance(result.data, dict) else None
+        if product_id is None:
+            logger.warning(f"⚠️ Ürün ID bulunamadı. API Yanıtı: {result.data}")
+            return None
+
+        with self.product_lock:
+            self.product_ids[wc_id] = (product_id, now)
+        logger.debug(f"Ürün ID alındı: wc_id={wc_id} → {product_id}")
+        return product_id
+
+    # --- Session ---
+
+    def start_session(self, card_uid, wc_id):
+        """startSession - cevap session_id içeriyorsa result.data'da gelir"""
+        return self._call('POST', 'session_start', params={"card_uid": card_uid, "wc_id": wc_id},
+                          timeout=10)
+
+    def end_session(self, session_id):
+        """endSession"""
+        return self._call('POST', 'session_end', params={"session_id": session_id}, timeout=10)
+
+    def mark_session_dead(self, session_id):
+        """Session sunucuda kapandı - bundan sonraki olayları gönderme"""
+        self.dead_sessions.add(session_id)
+
+    def get_current_session_id(self, wc_id, timeout=10):
+        """currentSessionId - result.data int'e çevrilir (geçersizse ok=False)"""
+        result = self._call('GET', 'session_id', params={'wcId': wc_id}, timeout=timeout)
+        if result.ok:
+            try:
+                result.data = int(result.data)
+            except (TypeError, ValueError):
+                logger.error(f"❌ Session ID parse hatası: '{result.data}'")
+                result.ok = False
+        return result
+
+
+_client = None
+_client_lock = Lock()
+
+
+def get_client():
+    """Paylaşılan istemci (bağlantı havuzu ve ürün ID önbelleği ortak)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = MESApiClient()
+        return _client
+
+
+# Test
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    client = get_client()
+    result = client.get_current_session_id(5)
+    print(f"currentSessionId: ok={result.ok} data={result.data} ({result.elapsed * 1000:.0f} ms)")
+    print(f"product_id: {client.get_product_id(5)}")
+    log_call_stats()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API Dayanıklılık Katmanı
+- Sınırlı sayıda yeniden deneme (jitter'lı üstel bekleme)
+- Endpoint bazlı devre kesici (sunucu kapalıyken hızlı hata, periyodik deneme)
+- POST isteklerinde idempotency anahtarı (tekrar denenen prodEvent çift sayılmaz)
+"""
+
+import random
+import time
+import uuid
+import logging
+from threading import Lock
+
+import requests
+
+from config import (API_ENDPOINTS, API_RETRY_ATTEMPTS, API_RETRY_BASE_DELAY,
+                    API_RETRY_MAX_DELAY, API_CONNECT_TIMEOUT,
+                    API_BREAKER_FAILURES, API_BREAKER_RECOVERY)
+
+logger = logging.getLogger(__name__)
+
+# Tekrar denemeye değer HTTP kodları (geçici sunucu hataları)
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Devre açıkken istek gönderilmeden fırlatılır"""
+
+
+class CircuitBreaker:
+    """Endpoint bazlı devre kesici (CLOSED → OPEN → HALF_OPEN)"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=API_BREAKER_FAILURES,
+                 recovery_timeout=API_BREAKER_RECOVERY):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.lock = Lock()
+
+    def allow_request(self):
+        """İstek gönderilebilir mi? Açık devrede süre dolunca tek bir deneme isteğine izin ver"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+                logger.info(f"🔌 Devre yarı açık, sunucu deneniyor: {self.name}")
+
+            # HALF_OPEN: aynı anda sadece bir deneme isteği
+            if self.probe_in_flight:
+                return False
+            self.probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                logger.info(f"✅ Devre kapandı, sunucu erişilebilir: {self.name}")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"⚠️ Devre açıldı ({self.failures} hata): {self.name}")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def get_state(self):
+        with self.lock:
+            return {
+                'state': self.state,
+                'failures': self.failures
+            }
+
+
+class RetryPolicy:
+    """Sınırlı yeniden deneme - full jitter üstel bekleme"""
+
+    def __init__(self, attempts=API_RETRY_ATTEMPTS, base_delay=API_RETRY_BASE_DELAY,
+                 max_delay=API_RETRY_MAX_DELAY):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        """attempt. denemeden sonra beklenecek süre (saniye)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+_breakers = {}
+_breakers_lock = Lock()
+
+
+def get_breaker(endpoint):
+    """Endpoint için devre kesiciyi döndür (aynı URL'yi paylaşan endpoint'ler aynı devreyi kullanır)"""
+    name = API_ENDPOINTS.get(endpoint, endpoint)
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            _breakers[name] = breaker
+        return breaker
+
+
+def get_breaker_states():
+    """Tüm devre kesicilerin durumu (debug / GUI için)"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.get_state() for b in breakers}
+
+
+def new_idempotency_key():
+    """Olay başına benzersiz idempotency anahtarı"""
+    return uuid.uuid4().hex
+
+
+def prepare_headers(method, headers=None, idempotency_key=None):
+    """İstek başlıkları - POST isteklerine idempotency anahtarı (tüm denemelerde aynı anahtar)"""
+    headers = dict(headers or {})
+    if method.upper() == 'POST':
+        headers[IDEMPOTENCY_HEADER] = idempotency_key or new_idempotency_key()
+    return headers
+
+
+class Retry:
+    """
+    Tek isteğin deneme / devre kesici kararları - taşıma katmanından bağımsız
+    (requests ile senkron request() ve aiohttp ile api_uploader aynı politikayı kullanır).
+    Kullanım:
+        retry = Retry(endpoint)
+        while True:
+            retry.begin()                      # devre açıksa CircuitOpenError
+            try: yanıt = gönder()
+            except bağlantı/timeout hatası as e:
+                bekle(retry.failed(e)); continue   # son denemede e fırlatılır
+            delay = retry.completed(yanıt_kodu)
+            if delay is None: return yanıt
+            bekle(delay)
+    """
+
+    def __init__(self, endpoint, policy=None):
+        self.endpoint = endpoint
+        self.policy = policy or DEFAULT_POLICY
+        self.breaker = get_breaker(endpoint)
+        self.attempt = 0
+
+    def begin(self):
+        """Deneme öncesi - devre açıksa istek gönderilmez"""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"Devre açık, istek gönderilmedi: {self.endpoint}")
+
+    def failed(self, error):
+        """Bağlantı hatası / timeout → beklenecek süre (son denemeyse hata fırlatılır)"""
+        self.breaker.record_failure()
+        logger.warning(f"⚠️ {self.endpoint} deneme {self.attempt + 1}/{self.policy.attempts} başarısız: "
+                       f"{type(error).__name__}")
+        if self.attempt == self.policy.attempts - 1:
+            raise error
+        self.attempt += 1
+        return self.policy.delay(self.attempt - 1)
+
+    def completed(self, status):
+        """Yanıt geldi → None (yanıt kullanılır) ya da tekrar denemeden önce beklenecek süre"""
+        if status not in RETRYABLE_STATUS:
+            self.breaker.record_success()
+            return None
+
+        self.breaker.record_failure()
+        logger.warning(f"⚠️ {self.endpoint} deneme {self.attempt + 1}/{self.policy.attempts}: HTTP {status}")
+        if self.attempt == self.policy.attempts - 1:
+            return None
+        self.attempt += 1
+        return self.policy.delay(self.attempt - 1)
+
+
+def request(method, endpoint, url=None, idempotency_key=None, policy=None, http=None, **kwargs):
+    """
+    Dayanıklı HTTP isteği.
+    - Bağlantı hatası, timeout ve geçici HTTP kodlarında sınırlı yeniden deneme
+    - Devre açıksa istek göndermeden CircuitOpenError fırlatır
+    - POST isteklerine idempotency anahtarı ekler (tüm denemelerde aynı anahtar)
+    - http: bağlantıları yeniden kullanmak için requests.Session (opsiyonel)
+    Son denemede de başarısız olursa son response döner ya da son hata fırlatılır.
+    """
+    http = http or requests
+    url = url or API_ENDPOINTS[endpoint]
+    headers = prepare_headers(method, kwargs.pop('headers', None), idempotency_key)
+
+    # Tek sayı verilmişse bağlantı kurma süresini kısa tut, okuma süresi aynı kalsın
+    timeout = kwargs.pop('timeout', 5)
+    if isinstance(timeout, (int, float)):
+        timeout = (min(API_CONNECT_TIMEOUT, timeout), timeout)
+
+    retry = Retry(endpoint, policy)
+    while True:
+        retry.begin()
+        try:
+            response = http.request(method, url, headers=headers, timeout=timeout, **kwargs)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            time.sleep(retry.failed(e))
+            continue
+
+        delay = retry.completed(response.status_code)
+        if delay is None:
+            return response
+        time.sleep(delay)
+
+
+# Test
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    from config import API_KEY
+
+    for i in range(8):
+        try:
+            r = request('GET', 'session_id', headers={'apiKey': API_KEY},
+                        params={'wcId': 5}, timeout=5)
+            print(f"HTTP {r.status_code}: {r.text[:80]}")
+        except requests.exceptions.RequestException as e:
+            print(f"❌ {type(e).__name__}: {e}")
+        print(get_breaker_states())
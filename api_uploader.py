@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asenkron API Gönderici (asyncio)
+- Modüller olayları thread-safe submit() ile bırakır, beklemeden devam eder
+- Arka plandaki event loop olayları sınırlı sayıda eşzamanlı istekle gönderir
+- Aynı session'ın olayları gönderim sırasıyla yola çıkar (yalnız çıkış sırası:
+  eşzamanlı giden diğer olaylar sunucuya farklı sırada ulaşabilir);
+  UPLOADER_ORDERED_ENDPOINTS (fault, session) önceki istekler bitmeden gönderilmez
+- Gecikme/throughput api_client.CALL_STATS'a yazılır (senkron çağrılarla aynı yer)
+- Yeniden deneme / devre kesici / idempotency kararları api_resilience.Retry'dan
+  (senkron istemciyle aynı politika); burada yalnız aiohttp taşıması var
+- aiohttp yoksa istekler api_resilience.request ile thread havuzunda gönderilir
+- stop() başladıktan sonra submit() False döner (çağıran senkron gönderir);
+  boşaltma süresinde gönderilemeyen olaylar bekleyen sayacından düşülür
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from threading import Thread, Lock, Event
+
+import api_client
+import api_resilience
+from config import (API_ENDPOINTS, UPLOADER_MAX_IN_FLIGHT, UPLOADER_QUEUE_SIZE,
+                    UPLOADER_REPORT_INTERVAL, UPLOADER_ORDERED_ENDPOINTS, UPLOADER_LANE_IDLE)
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+class UploadEvent:
+    """Gönderilecek tek API olayı"""
+
+    __slots__ = ('endpoint', 'method', 'url', 'payload', 'params', 'session_id',
+                 'idempotency_key', 'submitted_at')
+
+    def __init__(self, endpoint, method, url, payload, params, session_id, idempotency_key):
+        self.endpoint = endpoint
+        self.method = method
+        self.url = url
+        self.payload = payload
+        self.params = params
+        self.session_id = session_id
+        self.idempotency_key = idempotency_key
+        self.submitted_at = time.monotonic()
+
+
+class APIUploader:
+    """
+    Arka plan asyncio gönderici.
+    Session başına sıra yalnız çıkış sırasıdır: sıralı olmayan endpoint'lerin
+    (prodEvent, energy) eşzamanlı istekleri farklı sırada tamamlanabilir.
+    Sıralı endpoint'ler hattaki önceki istekleri bekler, kendisi bitmeden de
+    sonrakiler yola çıkmaz.
+    """
+
+    def __init__(self, max_in_flight=UPLOADER_MAX_IN_FLIGHT, queue_size=UPLOADER_QUEUE_SIZE,
+                 timeout=5):
+        self.max_in_flight = max(1, max_in_flight)
+        self.queue_size = queue_size
+        self.timeout = timeout
+
+        self.loop = None
+        self.thread = None
+        self.running = False
+        self.ready = Event()
+
+        # Kuyrukta + yolda olan olay sayısı
+        self.lock = Lock()
+        self.pending = 0
+        self.rejected = 0
+
+        # Sadece event loop thread'inde kullanılır
+        self.lanes = {}
+        self.semaphore = None
+        self.stop_event = None
+        self.drain_timeout = 10.0
+        self.http = None
+
+        logger.info(f"API gönderici oluşturuldu (max_in_flight={self.max_in_flight}, "
+                    f"aiohttp={'var' if AIOHTTP_AVAILABLE else 'yok'})")
+
+    def start(self):
+        """Event loop thread'ini başlat"""
+        if self.running:
+            return False
+
+        self.running = True
+        self.ready.clear()
+        self.thread = Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        self.ready.wait(timeout=5)
+        logger.info("📤 API gönderici başladı")
+        return True
+
+    def stop(self, drain_timeout=10.0):
+        """Bekleyen olayları göndermeye çalış ve durdur"""
+        if not self.running:
+            return False
+
+        # Kabul kapanır: kabul edilmiş olaylar kuyruğa durdurma işaretinden önce girer
+        with self.lock:
+            self.running = False
+        self.drain_timeout = drain_timeout
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.stop_event.set)
+        if self.thread:
+            self.thread.join(timeout=drain_timeout + 1)
+
+        logger.info(f"⏹ API gönderici durdu (gönderilemeyen: {self.pending})")
+        return True
+
+    def submit(self, endpoint, payload=None, params=None, session_id=None,
+               method='POST', url=None, idempotency_key=None):
+        """
+        Olayı gönderim kuyruğuna bırak (herhangi bir thread'den çağrılabilir).
+        Kuyruk doluysa veya gönderici çalışmıyorsa False döner.
+        """
+        if method.upper() == 'POST' and idempotency_key is None:
+            idempotency_key = api_resilience.new_idempotency_key()
+        event = UploadEvent(endpoint, method, url or API_ENDPOINTS[endpoint], payload,
+                            params, session_id, idempotency_key)
+
+        # Kabul ve kuyruğa bırakma stop() ile aynı kilit altında: call_soon_threadsafe
+        # sırası korunduğundan kabul edilen olay durdurma işaretinden sonra gelemez
+        with self.lock:
+            if not self.running or self.loop is None:
+                return False
+            if self.pending >= self.queue_size:
+                self.rejected += 1
+                logger.warning(f"⚠️ Gönderim kuyruğu dolu, olay reddedildi: {endpoint}")
+                return False
+            try:
+                self.loop.call_soon_threadsafe(self._enqueue, event)
+            except RuntimeError:
+                # Event loop bu arada kapandı
+                return False
+            self.pending += 1
+        return True
+
+    def get_stats(self):
+        """Kuyruk durumu ve endpoint bazlı gecikme/throughput istatistikleri"""
+        with self.lock:
+            pending, rejected = self.pending, self.rejected
+
+        return {
+            'pending': pending,
+            'rejected': rejected,
+            'endpoints': api_client.get_call_stats()
+        }
+
+    def log_stats(self):
+        """Endpoint istatistiklerini ve kuyruk durumunu logla"""
+        api_client.log_call_stats()
+        with self.lock:
+            logger.info(f"📊 Bekleyen: {self.pending} | Reddedilen: {self.rejected}")
+
+    # --- Event loop thread'i ---
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._main())
+        except Exception as e:
+            logger.error(f"❌ API gönderici hatası: {e}")
+        finally:
+            self.loop.close()
+            self.loop = None
+
+    async def _main(self):
+        self.semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.stop_event = asyncio.Event()
+        if AIOHTTP_AVAILABLE:
+            self.http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        self.ready.set()
+
+        report_task = asyncio.ensure_future(self._report_loop())
+        await self.stop_event.wait()
+        report_task.cancel()
+
+        # Şerit kuyruklarını kapat, kalan olayların gönderilmesini bekle
+        workers = []
+        for queue, worker in self.lanes.values():
+            queue.put_nowait(None)
+            workers.append(worker)
+        if workers:
+            _, unfinished = await asyncio.wait(workers, timeout=self.drain_timeout)
+            for worker in unfinished:
+                worker.cancel()
+            if unfinished:
+                logger.warning(f"⚠️ Boşaltma süresi ({self.drain_timeout:.1f} s) doldu, "
+                               f"{len(unfinished)} hat kesildi")
+                # Kesilen hatların temizliği (bekleyen sayacı) loop kapanmadan bitsin
+                await asyncio.gather(*unfinished, return_exceptions=True)
+
+        if self.http:
+            await self.http.close()
+            self.http = None
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(UPLOADER_REPORT_INTERVAL)
+            self.log_stats()
+
+    def _enqueue(self, event):
+        if self.stop_event.is_set():
+            # submit() kilidi sayesinde olmamalı - olursa sessizce kaybolmasın
+            logger.error(f"❌ Gönderici durdu, olay gönderilmedi: {event.endpoint}")
+            self._settle(1)
+            return
+        lane = self.lanes.get(event.session_id)
+        if lane is None:
+            queue = asyncio.Queue()
+            worker = asyncio.ensure_future(self._lane_worker(event.session_id, queue))
+            lane = (queue, worker)
+            self.lanes[event.session_id] = lane
+        lane[0].put_nowait(event)
+
+    async def _lane_worker(self, session_id, queue):
+        """Bir session'ın olaylarını sırayla yola çıkar (boşta kalan hat kapanır)"""
+        in_flight = set()
+        event = None    # Kuyruktan alınıp henüz yola çıkmamış olay
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), UPLOADER_LANE_IDLE)
+                except asyncio.TimeoutError:
+                    # Biten session'ların hatları birikmesin (uzun çalışmada bellek sabit)
+                    if queue.empty() and not in_flight:
+                        if self.lanes.get(session_id, (None,))[0] is queue:
+                            del self.lanes[session_id]
+                        break
+                    continue
+                if event is None:
+                    break
+
+                ordered = event.endpoint in UPLOADER_ORDERED_ENDPOINTS
+                if ordered and in_flight:
+                    await asyncio.wait(in_flight)
+
+                await self.semaphore.acquire()
+                task = asyncio.ensure_future(self._send(event))
+                event = None
+                # Hesap task bitince (iptal edilse de, hiç başlamasa da) kapanır
+                task.add_done_callback(self._sent)
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+
+                if ordered:
+                    await task
+
+            if in_flight:
+                await asyncio.wait(in_flight)
+        finally:
+            # Boşaltma süresi dolup hat kesildiyse: yoldakiler iptal, sıradakiler gönderilmedi
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+            abandoned = int(event is not None)
+            while not queue.empty():
+                abandoned += queue.get_nowait() is not None
+            if abandoned:
+                logger.warning(f"⚠️ {abandoned} olay gönderilemedi (session={session_id})")
+                self._settle(abandoned)
+
+    def _sent(self, task):
+        """_send task'ı bitti (ya da iptal edildi) - eşzamanlılık ve bekleyen sayacını kapat"""
+        self.semaphore.release()
+        self._settle(1)
+
+    def _settle(self, count):
+        with self.lock:
+            self.pending -= count
+
+    async def _send(self, event):
+        start = time.monotonic()
+        ok = False
+        try:
+            status = await self._request_with_retry(event)
+            ok = status in api_client.ACCEPTED_STATUS
+            if not ok:
+                logger.warning(f"⚠️ {event.endpoint} API hatası: HTTP {status}")
+        except Exception as e:
+            logger.error(f"❌ {event.endpoint} gönderilemedi: {type(e).__name__}: {e}")
+
+        api_client.record_call(event.endpoint, time.monotonic() - start, ok)
+
+    async def _request_with_retry(self, event):
+        """aiohttp taşıması - deneme kararları api_resilience.Retry'dan"""
+        if not AIOHTTP_AVAILABLE:
+            response = await self.loop.run_in_executor(None, functools.partial(
+                api_resilience.request, event.method, event.endpoint, url=event.url,
+                json=event.payload, params=event.params, headers=dict(api_client.HEADERS),
+                idempotency_key=event.idempotency_key, timeout=self.timeout,
+                http=api_client.get_client().http))
+            return response.status_code
+
+        headers = api_resilience.prepare_headers(event.method, api_client.HEADERS, event.idempotency_key)
+        retry = api_resilience.Retry(event.endpoint)
+        while True:
+            retry.begin()
+            try:
+                async with self.http.request(event.method, event.url, json=event.payload,
+                                             params=event.params, headers=headers) as response:
+                    status = response.status
+                    await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                await asyncio.sleep(retry.failed(e))
+                continue
+
+            delay = retry.completed(status)
+            if delay is None:
+                return status
+            await asyncio.sleep(delay)
+
+
+# Test
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    uploader = APIUploader()
+    uploader.start()
+
+    for i in range(20):
+        uploader.submit('energy', {
+            "wc_id": 15,
+            "voltage_v": 24.0,
+            "current_a": 1.0,
+            "power_w": 24.0,
+            "session_id": 123
+        }, session_id=123)
+
+    uploader.stop()
+    uploader.log_stats()
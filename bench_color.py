@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Renk Algılama Benchmark'ı (ColorModule._detect_color)
+- Sentetik 640x480 konveyör kareleri: gri bant, bant üzerinde kayan kırmızı ürünler
+- ROI (sadece bant bölgesi) ve iç işleme ölçeği (1, 1/2, 1/4) kombinasyonları için
+  kare/s, kare başına duvar süresi ve CPU süresi
+- Her ayarın algılama sonucu tam kare / tam ölçek sonucuyla karşılaştırılır
+- Tanımlı renk sayısı arttıkça kare başına maliyet (HSV arama tablosu → sabit kalmalı)
+- Yakalama → algılama → gösterim karesi yolunun kare başına bellek ayırması ve
+  süresi: önceki yol (BGR→RGB→HSV, her adımda yeni dizi, kare kopyası) ile
+  önceden ayrılmış tamponlu yol
+
+Kullanım:
+    python3 bench_color.py [--frames 300] > bench_output.txt
+"""
+
+import sys
+import time
+import logging
+import argparse
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from api_client import ApiResult
+from module_color import ColorModule
+
+WIDTH, HEIGHT = 640, 480
+BELT = (0, 180, WIDTH, 120)     # Ürünlerin geçtiği bant (x, y, w, h)
+
+# Renk sayısı ölçümü için ek renkler
+EXTRA_COLORS = {
+    "Yesil": {"lower1": np.array([40, 100, 100]), "upper1": np.array([80, 255, 255])},
+    "Mor": {"lower1": np.array([135, 100, 100]), "upper1": np.array([160, 255, 255])},
+}
+
+
+class FakeESP32:
+    def register_callback(self, msg_type, callback):
+        pass
+
+    def unregister_callback(self, msg_type):
+        pass
+
+    def send_command(self, command):
+        return True
+
+
+class FakeApi:
+    def post_prod_event(self, *args, **kwargs):
+        return ApiResult(True, queued=True)
+
+    def get_product_id(self, wc_id):
+        return 105
+
+
+def make_frames(n, seed=1):
+    """Bant üzerinde soldan sağa kayan 80x80 kırmızı ürünler (BGR, kamera sırası)"""
+    rng = np.random.default_rng(seed)
+    background = rng.integers(60, 120, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    x, y, w, h = BELT
+    background[y:y + h, x:x + w] = (90, 90, 90)
+
+    frames = []
+    for i in range(n):
+        frame = background.copy()
+        pos = (i * 12) % (WIDTH + 240) - 120      # Kareler arasında 12 px ilerler
+        for offset in (0, 360):
+            left = pos - offset
+            if -80 < left < WIDTH:
+                cv2.rectangle(frame, (max(left, 0), y + 20), (min(left + 80, WIDTH - 1), y + 100),
+                              (30, 30, 220), -1)
+        frames.append(frame)
+    return frames
+
+
+def run(module, frames, repeat):
+    """Kare başına (duvar süresi, CPU süresi) ve algılama sonuçları"""
+    detections = [{d[0] for d in module._detect_color(frame)[1]} for frame in frames]   # Isınma + referans
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for _ in range(repeat):
+        for frame in frames:
+            module._detect_color(frame)
+    count = repeat * len(frames)
+    return (time.perf_counter() - wall) / count, (time.process_time() - cpu) / count, detections
+
+
+def legacy_frame(module, frame):
+    """Önceki kare yolu: BGR→RGB, RGB→HSV, her ara sonuç yeni dizi, çekirdek her karede, kare kopyası"""
+    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    (roi_x, roi_y, _, _), region = module._region(frame_rgb)
+    scale = module.process_scale
+    if scale != 1.0:
+        region = cv2.resize(region, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(region, cv2.COLOR_RGB2HSV)
+    h, s, v = cv2.split(hsv)
+    bits = cv2.LUT(h, module.lut_h)
+    cv2.bitwise_and(bits, cv2.LUT(s, module.lut_s), dst=bits)
+    cv2.bitwise_and(bits, cv2.LUT(v, module.lut_v), dst=bits)
+    classes = cv2.LUT(bits, module.lut_class)
+    mask = cv2.compare(classes, 0, cv2.CMP_GT)
+    ksize = max(3, int(round(5 * scale)) | 1)
+    kernel = np.ones((ksize, ksize), np.uint8)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    contours = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
+    result_frame = frame_rgb.copy()
+    for contour in contours:
+        if cv2.contourArea(contour) > module.min_area * scale * scale:
+            x, y, w, h = cv2.boundingRect(contour)
+            x, y = roi_x + int(x / scale), roi_y + int(y / scale)
+            cv2.rectangle(result_frame, (x, y), (x + int(w / scale), y + int(h / scale)), (0, 255, 0), 3)
+    return result_frame
+
+
+def measure_path(step, frames, repeat):
+    """Kare başına (duvar süresi, CPU süresi, ek bellek tepe noktası - bayt)"""
+    for frame in frames:
+        step(frame)                                   # Isınma (tamponlar ayrılır)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for _ in range(repeat):
+        for frame in frames:
+            step(frame)
+    count = repeat * len(frames)
+    wall, cpu = (time.perf_counter() - wall) / count, (time.process_time() - cpu) / count
+
+    peak = 0
+    tracemalloc.start()
+    for frame in frames:
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        step(frame)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return wall, cpu, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renk algılama benchmark'ı")
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"Python {sys.version.split()[0]}, OpenCV {cv2.__version__}, numpy {np.__version__}, "
+          f"OpenCV thread: {cv2.getNumThreads()}")
+    print(f"{args.frames} kare x {args.repeat} tekrar, {WIDTH}x{HEIGHT}, bant ROI={BELT}\n")
+
+    frames = make_frames(args.frames)
+    module = ColorModule(FakeESP32(), api=FakeApi())
+    module.selected_color = "Kirmizi"
+
+    print("1) ROI ve işleme ölçeği")
+    settings = [(roi, scale) for roi in (None, BELT) for scale in (1.0, 0.5, 0.25)]
+    baseline = None
+    print(f"   {'ROI':<8} {'ölçek':>6} {'kare/s':>9} {'ms/kare':>9} {'CPU ms/kare':>12} {'uyum':>7}")
+    for roi, scale in settings:
+        module.roi = roi
+        module.process_scale = scale
+        wall, cpu, detections = run(module, frames, args.repeat)
+        if baseline is None:
+            baseline = detections
+        agree = sum(a == b for a, b in zip(detections, baseline)) / len(frames)
+        print(f"   {'bant' if roi else 'tam':<8} {scale:>6.2f} {1 / wall:>9.1f} {wall * 1000:>9.2f} "
+              f"{cpu * 1000:>12.2f} {agree:>6.1%}")
+
+    print("\n2) Tanımlı renk sayısına göre maliyet (tam kare, tam ölçek, tek geçiş sınıflandırma)")
+    module.roi, module.process_scale = None, 1.0
+    all_ranges = dict(module.color_ranges, **EXTRA_COLORS)
+    for n in range(1, len(all_ranges) + 1):
+        module.set_color_ranges(list(all_ranges.items())[:n])
+        wall, cpu, detections = run(module, frames, args.repeat)
+        print(f"   {n} renk ({', '.join(module.color_names)}): {wall * 1000:6.2f} ms/kare, "
+              f"algılanan kare: {sum(1 for d in detections if d)}")
+
+    print("\n3) Kare yolu (yakalanan BGR → algılama → işaretli RGB gösterim karesi)")
+    module.set_color_ranges(list(all_ranges.items())[:3])
+    print(f"   {'ROI':<6} {'ölçek':>6} {'yol':<10} {'ms/kare':>8} {'CPU ms/kare':>12} {'ek bellek/kare':>15}")
+    for roi, scale in ((None, 1.0), (BELT, 0.5)):
+        module.roi, module.process_scale = roi, scale
+        for name, step in (("önceki", lambda frame: legacy_frame(module, frame)),
+                           ("tamponlu", module._detect_color)):
+            wall, cpu, peak = measure_path(step, frames, args.repeat)
+            print(f"   {'bant' if roi else 'tam':<6} {scale:>6.2f} {name:<10} {wall * 1000:>8.2f} "
+                  f"{cpu * 1000:>12.2f} {peak / 1024:>12.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
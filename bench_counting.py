@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Renk Sayım Doğruluğu Benchmark'ı (sentetik konveyör senaryoları)
+- synthetic_conveyor ile senaryo videoları + gerçek sayım CSV'leri üretilir
+  (temiz, yoğun, dokunan ürünler, hız dalgalanması, ışık + gürültü, engel)
+- Her video kayıttan (video_source) ColorModule algılama + sayımıyla oynatılır
+- Senaryo × işleme ayarı (tam kare / bant ROI yarım ölçek) için precision,
+  recall ve algılama kare/s birlikte raporlanır
+
+Kullanım:
+    python3 bench_counting.py [--seconds 60] [--keep DIR] > bench_output.txt
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+import cv2
+
+from video_source import open_source
+from module_color import ColorModule
+from bench_color import FakeESP32, FakeApi
+from bench_replay import replay
+from synthetic_conveyor import BeltScene, load_truth, score
+
+SCENARIOS = {
+    'temiz': {},
+    'yoğun': {'rate': 3.0},
+    'dokunan': {'rate': 3.0, 'min_gap': -8},
+    'hız dalgası': {'rate': 2.0, 'speed_drift': 0.4},
+    'ışık+gürültü': {'rate': 2.0, 'light_drift': 0.2, 'noise': 10.0},
+    'engel': {'rate': 2.0, 'occluder': (200, 40)},
+}
+SETTINGS = {'tam 1.0': (None, 1.0), 'bant 0.5': ((0, 180, 640, 120), 0.5)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentetik senaryolarda sayım doğruluğu")
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--tolerance', type=int, default=5)
+    parser.add_argument('--keep', help='videoları ve CSV\'leri bu klasörde bırak')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    directory = args.keep or tempfile.mkdtemp(prefix='belt_')
+    os.makedirs(directory, exist_ok=True)
+
+    print(f"Python {sys.version.split()[0]}, OpenCV {cv2.__version__}")
+    print(f"{args.seconds:.0f} s senaryo, 30 kare/s, eşleşme toleransı ±{args.tolerance} kare\n")
+    print(f"   {'senaryo':<14} {'ayar':<9} {'gerçek':>7} {'sayılan':>8} {'precision':>10} {'recall':>8} {'kare/s':>8}")
+    try:
+        for index, (name, options) in enumerate(SCENARIOS.items()):
+            video = os.path.join(directory, f"senaryo{index}.avi")
+            truth_path = os.path.join(directory, f"senaryo{index}.csv")
+            BeltScene(seconds=args.seconds, seed=index + 1, **options).write(video, truth_path)
+            truth = load_truth(truth_path)
+
+            for setting, (roi, scale) in SETTINGS.items():
+                module = ColorModule(FakeESP32(), api=FakeApi())
+                module.count_all_colors = True
+                module.roi, module.process_scale = roi, scale
+                module.running = True
+
+                source = open_source(video, realtime=False, loop=False)
+                records, timings = replay(source, module, None)
+                source.release()
+
+                events = [(color, record['frame']) for record in records for color in record['counted']]
+                result = score(events, truth, args.tolerance)
+                print(f"   {name:<14} {setting:<9} {len(truth):>7} {len(events):>8} {result['precision']:>10.1%} "
+                      f"{result['recall']:>8.1%} {len(records) / timings['color']:>8.0f}")
+    finally:
+        if not args.keep:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    main()
+    print(f"\nSüre: {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bellek Benchmark'ı (1 GB Pi'de uzun session'lar için)
+- Ölçüm kaydı temsil maliyeti: dict + ISO metin / tuple / __slots__ / array('d') / numpy
+- Uzun çalışma simülasyonu: modül tamponları, endpoint istatistikleri ve
+  API gönderici hatları olay sayısıyla büyüyor mu? (tracemalloc)
+
+Kullanım:
+    python3 bench_memory.py [--samples 100000] > bench_output.txt
+"""
+
+import os
+import gc
+import sys
+import logging
+import time
+import socket
+import argparse
+import tracemalloc
+from array import array
+from collections import deque
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Mock API adresi config import edilmeden önce ayarlanmalı
+with socket.socket() as _s:
+    _s.bind(('127.0.0.1', 0))
+    MOCK_PORT = _s.getsockname()[1]
+os.environ['MES_API_BASE_URL'] = f"http://127.0.0.1:{MOCK_PORT}/api/v1"
+
+import api_uploader
+from api_client import ApiResult, EndpointStats
+from mock_api_server import MockMESServer
+from module_fault import FaultModule
+from module_weight import WeightModule
+
+
+def measure(build):
+    """build() çağrısının tuttuğu bellek (bayt)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del keep
+    return after - before
+
+
+def growth(step, warmup, iterations):
+    """warmup sonrası iterations adım daha çalıştırıldığında bellek artışı (bayt)"""
+    for i in range(warmup):
+        step(i)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(iterations):
+        step(warmup + i)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before
+
+
+class SlotSample:
+    __slots__ = ('ts_ms', 'value')
+
+    def __init__(self, ts_ms, value):
+        self.ts_ms = ts_ms
+        self.value = value
+
+
+class DequeEndpointStats:
+    """Önceki EndpointStats düzeni: deque içinde (zaman, gecikme) tuple'ları"""
+
+    def __init__(self, window=1000):
+        self.samples = deque(maxlen=window)
+
+    def record(self, latency, ok):
+        self.samples.append((time.monotonic(), latency))
+
+
+class FakeESP32:
+    def __init__(self):
+        self.callbacks = {}
+
+    def register_callback(self, msg_type, callback):
+        self.callbacks[msg_type] = callback
+
+    def unregister_callback(self, msg_type):
+        self.callbacks.pop(msg_type, None)
+
+    def send_command(self, command):
+        return True
+
+
+class FakeApi:
+    def post_fault(self, *args, **kwargs):
+        return ApiResult(True, queued=True)
+
+    def post_prod_event(self, *args, **kwargs):
+        return ApiResult(True, queued=True)
+
+    def get_product_id(self, wc_id):
+        return 104
+
+
+def bench_representations(n):
+    print(f"\n1) {n} ölçümün bellek maliyeti (ts + değer)")
+    t0 = time.time()
+    iso = lambda i: (datetime.utcnow() + timedelta(hours=3, milliseconds=i)).isoformat(timespec='milliseconds')
+
+    cases = [
+        ("list[dict] + ISO metin", lambda: [{'ts': iso(i), 'value': float(i)} for i in range(n)]),
+        ("list[tuple(float, float)]", lambda: [(t0 + i, float(i)) for i in range(n)]),
+        ("list[__slots__ (int ms, float)]", lambda: [SlotSample(int(t0 * 1000) + i, float(i)) for i in range(n)]),
+        ("array('q') + array('d')", lambda: (array('q', range(n)), array('d', range(n)))),
+        ("numpy yapısal dizi", lambda: np.zeros(n, dtype=[('ts_ms', '<i8'), ('value', '<f8')])),
+    ]
+    for name, build in cases:
+        size = measure(build)
+        print(f"   {name:<34} {size / 1e6:8.2f} MB   {size / n:7.1f} B/ölçüm")
+
+
+def bench_modules(events):
+    print(f"\n2) Uzun çalışma: {events} olay sonrası bellek artışı (ısınma sonrası)")
+
+    esp32 = FakeESP32()
+    weight = WeightModule(esp32, api=FakeApi())
+    weight.start(session_id=1)
+    on_weight = esp32.callbacks['weight']
+    # 8 ölçüm → gönder → kaldır döngüsü
+    step = lambda i: on_weight(0.0 if i % 10 == 9 else 0.5 + (i % 7) * 0.01)
+    print(f"   WeightModule ölçüm tamponu         {growth(step, 1000, events):>10} B")
+
+    fault = FaultModule(esp32, api=FakeApi())
+    fault.start(session_id=1)
+    on_vibration = esp32.callbacks['vibration']
+    step = lambda i: on_vibration(True) if i % 2 == 0 else fault.clear_fault('vibration')
+    print(f"   FaultModule zaman damgaları        {growth(step, 1000, events):>10} B")
+
+    def fill(stats):
+        for _ in range(2000):
+            stats.record(0.01, True)
+        return stats
+
+    for name, cls in (("EndpointStats (deque + tuple, önceki)", DequeEndpointStats),
+                      ("EndpointStats (array('d') halka)", EndpointStats)):
+        size = measure(lambda: fill(cls()))
+        print(f"   {name:<36} {size / 1024:7.1f} KB (dolu pencere)")
+
+
+def bench_uploader(sessions, per_session):
+    print(f"\n3) API gönderici: {sessions} session x {per_session} olay sonrası açık hat sayısı")
+
+    server = MockMESServer(port=MOCK_PORT).start()
+    api_uploader.UPLOADER_LANE_IDLE = 0.5
+    uploader = api_uploader.APIUploader()
+    uploader.start()
+    try:
+        for session_id in range(1, sessions + 1):
+            for _ in range(per_session):
+                uploader.submit('product', {'session_id': session_id, 'wc_id': 1, 'quantity': 1,
+                                            'product_id': 101, 'speed_rpm': 0}, session_id=session_id)
+
+        deadline = time.time() + 30
+        while uploader.get_stats()['pending'] and time.time() < deadline:
+            time.sleep(0.05)
+        print(f"   Gönderim bitince açık hat: {len(uploader.lanes)}")
+        time.sleep(1.0)
+        print(f"   Boşta kalma süresinden sonra: {len(uploader.lanes)}")
+    finally:
+        uploader.stop()
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bellek benchmark'ı")
+    parser.add_argument('--samples', type=int, default=100000)
+    parser.add_argument('--events', type=int, default=50000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"Python {sys.version.split()[0]}, numpy {np.__version__}")
+    bench_representations(args.samples)
+    bench_modules(args.events)
+    bench_uploader(200, 5)
+
+
+if __name__ == "__main__":
+    main()
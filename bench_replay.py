@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kayıttan Algılama / OCR Benchmark'ı (kamerasız, tekrarlanabilir)
+- Video dosyası ya da görüntü klasörü kare kare, olabildiğince hızlı oynatılır
+  (video_source, kare atlanmaz)
+- Her kare: ColorModule algılama + takip/sayım, OCRModule._preprocess_for_ocr
+  (istenirse Tesseract metni); kare/s ve kare başına süre
+- Kare başına sonuçlar JSONL'e yazılır; --compare ile önceki çalıştırmanın
+  çıktısıyla kare kare karşılaştırılır (_detect_color / _preprocess_for_ocr
+  değişikliklerinin etkisi)
+- --expected: bilinen gerçek ürün sayısına göre sayım doğruluğu
+- --truth: synthetic_conveyor gerçek sayım CSV'si → precision / recall
+
+Kullanım:
+    python3 bench_replay.py kayit.avi --out yeni.jsonl --compare eski.jsonl
+"""
+
+import sys
+import json
+import time
+import zlib
+import logging
+import argparse
+
+import cv2
+
+from video_source import open_source
+from module_color import ColorModule
+from module_ocr import OCRModule, TESSERACT_AVAILABLE
+from bench_color import FakeESP32, FakeApi
+from synthetic_conveyor import load_truth, score
+
+
+def replay(source, color, ocr, max_frames=None, ocr_text=False):
+    """Kare başına sonuç listesi ve aşama süreleri (saniye)"""
+    records = []
+    timings = {'color': 0.0, 'ocr': 0.0, 'text': 0.0}
+    while max_frames is None or len(records) < max_frames:
+        ret, frame = source.read()
+        if not ret:
+            break
+        record = {'frame': len(records)}
+
+        if color:
+            before = dict(color.color_counts)
+            start = time.perf_counter()
+            _, detections = color._detect_color(frame)
+            color._process_detection(detections)
+            timings['color'] += time.perf_counter() - start
+            record['detections'] = [[name, round(x, 1), round(y, 1)] for name, x, y in detections]
+            record['count'] = color.product_count
+            record['counted'] = [name for name, count in color.color_counts.items()
+                                 for _ in range(count - before[name])]
+
+        if ocr:
+            start = time.perf_counter()
+            processed = ocr._preprocess_for_ocr(frame)
+            timings['ocr'] += time.perf_counter() - start
+            record['ocr_crc'] = zlib.crc32(processed.tobytes())
+            if ocr_text:
+                import pytesseract
+                start = time.perf_counter()
+                record['text'] = pytesseract.image_to_string(processed, lang=ocr.ocr_language,
+                                                             config=ocr.ocr_config).strip()
+                timings['text'] += time.perf_counter() - start
+
+        records.append(record)
+    return records, timings
+
+
+def compare(records, path):
+    """Önceki çalıştırmayla kare kare fark → {alan: farklı kare listesi}"""
+    with open(path, encoding='utf-8') as f:
+        previous = [json.loads(line) for line in f if line.strip()]
+    if len(previous) != len(records):
+        print(f"⚠️ Kare sayısı farklı: önceki {len(previous)}, şimdiki {len(records)}")
+    differences = {}
+    for old, new in zip(previous, records):
+        for key in new:
+            if key != 'frame' and key in old and old[key] != new[key]:
+                differences.setdefault(key, []).append(new['frame'])
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kayıttan algılama / OCR benchmark'ı")
+    parser.add_argument('source', help='video dosyası ya da görüntü klasörü')
+    parser.add_argument('--frames', type=int, default=None, help='en fazla kare')
+    parser.add_argument('--skip-color', action='store_true')
+    parser.add_argument('--skip-ocr', action='store_true')
+    parser.add_argument('--ocr-text', action='store_true', help='Tesseract ile metni de oku (yavaş)')
+    parser.add_argument('--all-colors', action='store_true', help='tüm renkleri say')
+    parser.add_argument('--roi', type=int, nargs=4, default=None, metavar=('X', 'Y', 'W', 'H'))
+    parser.add_argument('--scale', type=float, default=None, help='renk işleme ölçeği')
+    parser.add_argument('--expected', type=int, default=None, help='gerçek ürün sayısı')
+    parser.add_argument('--truth', help='gerçek sayım CSV\'si (synthetic_conveyor)')
+    parser.add_argument('--tolerance', type=int, default=5, help='kare - sayım ↔ gerçek geçiş eşleşme toleransı')
+    parser.add_argument('--out', help='kare başına sonuçlar (JSONL)')
+    parser.add_argument('--compare', help='önceki --out dosyası')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    source = open_source(args.source, realtime=False, loop=False)
+    if not source.isOpened():
+        sys.exit(f"Kaynak açılamadı: {args.source}")
+
+    color = None
+    if not args.skip_color:
+        color = ColorModule(FakeESP32(), api=FakeApi())
+        color.count_all_colors = args.all_colors or color.count_all_colors
+        if args.roi:
+            color.roi = tuple(args.roi)
+        if args.scale:
+            color.process_scale = args.scale
+        color.running = True
+    ocr = None if args.skip_ocr else OCRModule()
+    if args.ocr_text and not TESSERACT_AVAILABLE:
+        sys.exit("pytesseract yüklü değil")
+
+    start = time.perf_counter()
+    records, timings = replay(source, color, ocr, args.frames, args.ocr_text)
+    elapsed = time.perf_counter() - start
+    source.release()
+    if not records:
+        sys.exit("Kaynakta kare yok")
+
+    n = len(records)
+    print(f"Python {sys.version.split()[0]}, OpenCV {cv2.__version__}")
+    print(f"{args.source}: {n} kare, toplam {elapsed:.2f} s ({n / elapsed:.1f} kare/s, okuma dahil)")
+    if color:
+        print(f"   Renk algılama + sayım: {timings['color'] / n * 1000:.2f} ms/kare "
+              f"({n / timings['color']:.0f} kare/s), sayılan ürün: {color.product_count} "
+              f"{dict(color.color_counts) if color.count_all_colors else ''}")
+        if args.truth:
+            events = [(name, record['frame']) for record in records for name in record['counted']]
+            result = score(events, load_truth(args.truth), args.tolerance)
+            print(f"   Gerçek sayıma göre: precision {result['precision']:.1%}, recall {result['recall']:.1%} "
+                  f"(TP {result['tp']}, FP {result['fp']}, FN {result['fn']})")
+        if args.expected:
+            print(f"   Sayım doğruluğu: {color.product_count}/{args.expected} "
+                  f"({color.product_count / args.expected:.1%})")
+    if ocr:
+        print(f"   OCR ön işleme: {timings['ocr'] / n * 1000:.2f} ms/kare")
+        if args.ocr_text:
+            print(f"   Tesseract: {timings['text'] / n * 1000:.1f} ms/kare")
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        print(f"   Kare sonuçları: {args.out}")
+
+    if args.compare:
+        differences = compare(records, args.compare)
+        if not differences:
+            print(f"✅ {args.compare} ile tüm kareler aynı")
+        for key, frames in differences.items():
+            print(f"❌ {key}: {len(frames)} karede farklı (ilk: {frames[:10]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yüke Uyarlanan Zamanlayıcı Benchmark'ı (ColorModule, gerçek zamanlı)
+- Sentetik konveyör videosu gerçek zamanlı kamera gibi oynatılır
+  (video_source → CameraService → ColorModule yakalama thread'i)
+- Yanında saf Python "yük" thread'i (Tk / seri port / API gönderici yerine,
+  aynı GIL'i kullanır): yüksüz, orta, ağır
+- Zamanlayıcı kapalı / açık: gösterilen kare/s, kaçırılan kamera karesi,
+  ortalama algılama hızı (Hz), sayım (gerçek geçişe göre) ve yük thread'inin
+  yaptığı iş
+
+Kullanım:
+    python3 bench_scheduler.py [--seconds 20] > bench_output.txt
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from threading import Thread, Event
+
+import cv2
+
+from module_color import ColorModule
+from camera_service import CameraService
+from video_source import VideoFileCapture
+from frame_scheduler import FrameScheduler
+from bench_color import FakeESP32, FakeApi
+from synthetic_conveyor import BeltScene
+
+LOADS = {'yüksüz': 0.0, 'orta': 0.5, 'ağır': 0.9}    # Yük thread'inin meşgul oranı (20 ms dilimlerde)
+SPEED_RPM = 180                                       # 12 piksel/kare x 30 kare/s = 360 px/s (PX_PER_RPM=2)
+
+
+def load_worker(busy, stop, work):
+    """Saf Python yükü: her 20 ms'nin busy oranı kadar dönerek çalış"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        while time.perf_counter() - start < 0.02 * busy:
+            work[0] += 1
+        time.sleep(0.02 * (1 - busy) + 0.0001)
+
+
+def run(video, seconds, busy, scheduled):
+    camera = CameraService(opener=lambda index: VideoFileCapture(video, realtime=True, loop=False),
+                           fourcc=None, keep_warm=0)
+    module = ColorModule(FakeESP32(), api=FakeApi(), camera=camera)
+    module.scheduler = FrameScheduler(max_step_px=module.tracker.max_distance / 2) if scheduled else None
+    module.count_all_colors = True
+    module._on_pwm_changed(SPEED_RPM)
+
+    stop, work = Event(), [0]
+    worker = Thread(target=load_worker, args=(busy, stop, work), daemon=True)
+    if busy:
+        worker.start()
+    module.start(session_id=1)
+    time.sleep(seconds)
+    stats = dict(module.capture_stats)
+    detections = module.gate_stats['processed'] + module.gate_stats['gated']
+    module.stop()
+    stop.set()
+    if busy:
+        worker.join()
+    camera.shutdown()
+    return stats, detections / seconds, module.product_count, work[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yüke uyarlanan zamanlayıcı benchmark'ı")
+    parser.add_argument('--seconds', type=float, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    directory = tempfile.mkdtemp(prefix='sched_')
+    video = os.path.join(directory, 'belt.avi')
+    scene = BeltScene(seconds=args.seconds + 2, rate=2.0, noise=4.0)
+    scene.write(video, os.path.join(directory, 'belt.csv'))
+    truth = sum(1 for _, _, frame in scene.ground_truth() if frame < args.seconds * scene.fps)
+
+    print(f"Python {sys.version.split()[0]}, OpenCV {cv2.__version__}, CPU: {os.cpu_count()}")
+    print(f"{args.seconds:.0f} s gerçek zamanlı, 30 kare/s kamera, speed_rpm={SPEED_RPM}, "
+          f"~{truth} gerçek geçiş (son ürünler süre sınırında kalabilir)\n")
+    print(f"   {'yük':<8} {'zamanlayıcı':<12} {'gösterim kare/s':>16} {'kaçırılan':>10} {'algılama Hz':>12} "
+          f"{'sayılan':>8} {'yük işi':>10}")
+    try:
+        for name, busy in LOADS.items():
+            for scheduled in (False, True):
+                stats, detect_hz, counted, work = run(video, args.seconds, busy, scheduled)
+                total = stats['frames'] + stats['dropped']
+                print(f"   {name:<8} {'açık' if scheduled else 'kapalı':<12} {stats['frames'] / args.seconds:>16.1f} "
+                      f"{stats['dropped'] / max(1, total):>10.1%} {detect_hz:>12.1f} {counted:>8} {work:>10}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
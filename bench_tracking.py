@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ürün Sayım Benchmark'ı (takip + çizgi geçişi / eski soğuma sayımı)
+- Sentetik konveyör videosu: 30 kare/s, bant sabit hızda, ürünler farklı
+  sıklıklarda (ürün/s) ve rastgele renklerde; gerçek sayı = çizgiyi geçen ürün
+- ColorModule (takip + sanal çizgi) ile eski yöntem (renk görününce say,
+  1.5 s soğuma) aynı kareler üzerinde karşılaştırılır
+- Sanal saat (clock.VirtualClock) ile gerçek zamandan hızlı koşar
+
+Kullanım:
+    python3 bench_tracking.py [--seconds 60] > bench_output.txt
+"""
+
+import sys
+import time
+import logging
+import argparse
+
+import cv2
+import numpy as np
+
+from clock import VirtualClock
+from module_color import ColorModule
+from bench_color import FakeESP32, FakeApi
+
+WIDTH, HEIGHT = 640, 480
+FPS = 30
+BELT_Y, BELT_H = 180, 120
+ITEM = 60                   # Ürün kenarı (piksel)
+COLORS = {'Kirmizi': (30, 30, 220), 'Sari': (20, 220, 230), 'Mavi': (220, 60, 30)}   # BGR
+
+
+class LegacyCounter:
+    """Önceki sayım: renk görününce say, kaybolana ve 1.5 s geçene kadar tekrar sayma"""
+
+    def __init__(self, clock, cooldown=1.5):
+        self.clock = clock
+        self.cooldown = cooldown
+        self.count = 0
+        self.present = {}
+        self.last = {}
+
+    def update(self, names):
+        now = self.clock.time()
+        for name in COLORS:
+            if name in names:
+                if not self.present.get(name) and now - self.last.get(name, 0) > self.cooldown:
+                    self.count += 1
+                    self.last[name] = now
+                    self.present[name] = True
+            else:
+                self.present[name] = False
+
+
+def belt_items(rate, seconds, speed, rng):
+    """(giriş karesi, renk) listesi - ortalama rate ürün/s, üst üste binmeden"""
+    spacing = speed * FPS / rate                    # Ortalama ürün aralığı (piksel)
+    min_gap = ITEM + 12
+    items, position = [], 0.0
+    while position < seconds * FPS * speed:
+        position += max(min_gap, rng.uniform(0.6, 1.4) * spacing)
+        items.append((position / speed, rng.choice(list(COLORS))))
+    return items
+
+
+def render(frame_index, items, speed, background):
+    frame = background.copy()
+    for enter, name in items:
+        left = int((frame_index - enter) * speed) - ITEM
+        if -ITEM < left < WIDTH:
+            cv2.rectangle(frame, (max(left, 0), BELT_Y + 30), (min(left + ITEM, WIDTH - 1), BELT_Y + 30 + ITEM),
+                          COLORS[name], -1)
+    return frame
+
+
+def run(rate, seconds, speed, seed=7):
+    rng = np.random.default_rng(seed)
+    background = rng.integers(60, 120, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    background[BELT_Y:BELT_Y + BELT_H] = (90, 90, 90)
+    items = belt_items(rate, seconds, speed, rng)
+
+    clock = VirtualClock()
+    module = ColorModule(FakeESP32(), api=FakeApi(), clock=clock)
+    module.count_all_colors = True
+    module.running = True
+    legacy = LegacyCounter(clock)
+
+    line = WIDTH * module.count_line
+    frames = seconds * FPS
+    track_time = 0.0
+    for i in range(frames):
+        frame, detections = module._detect_color(render(i, items, speed, background))
+        start = time.perf_counter()
+        module._process_detection(detections)
+        track_time += time.perf_counter() - start
+        legacy.update({d[0] for d in detections})
+        clock.advance(1.0 / FPS)
+
+    # Gerçek sayı: video bitmeden merkezi çizgiyi geçen ürünler
+    truth = sum(1 for enter, _ in items if (frames - 1 - enter) * speed - ITEM / 2 >= line)
+    return truth, module.product_count, legacy.count, track_time / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ürün sayım doğruluğu benchmark'ı")
+    parser.add_argument('--seconds', type=int, default=60)
+    parser.add_argument('--speed', type=float, default=12.0, help='bant hızı (piksel/kare)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"Python {sys.version.split()[0]}, OpenCV {cv2.__version__}")
+    print(f"{args.seconds} s video, {FPS} kare/s, bant {args.speed:.0f} piksel/kare, ürün {ITEM} px\n")
+    print(f"   {'ürün/s':>7} {'gerçek':>7} {'takip':>7} {'doğruluk':>9} {'soğuma':>7} {'doğruluk':>9} {'takip µs/kare':>14}")
+    for rate in (0.25, 0.5, 1.0, 2.0, 3.0, 4.0):
+        truth, tracked, legacy, per_frame = run(rate, args.seconds, args.speed)
+        print(f"   {rate:>7.2f} {truth:>7} {tracked:>7} {tracked / truth:>9.1%} {legacy:>7} "
+              f"{legacy / truth:>9.1%} {per_frame * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
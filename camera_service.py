@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Paylaşılan Kamera Servisi (ColorModule + OCRModule)
+- Cihazı tek bir servis açar ve okur; modüller kendi VideoCapture'ını açmaz
+  (/dev/video0 için çekişme yok)
+- CAP_PROP_BUFFERSIZE=1 ve MJPEG/YUYV biçimi: sürücü kuyruğunda eski kare birikmez
+- Referans sayımlı: acquire() / release(); son kullanıcı bırakınca cihaz
+  CAMERA_KEEP_WARM saniye açık tutulur - modül / session değişiminde yavaş
+  yeniden açma yok
+- Kareler FrameSlot ile dağıtılır: her tüketici aynı diziyi alır (kopya yok),
+  dizi salt okunur işaretlenir - değiştirmek isteyen kendi kopyasını alır
+- config.CAMERA_SOURCE ile cihaz yerine video dosyası / görüntü klasörü
+  (video_source) oynatılır
+"""
+
+import time
+import logging
+from threading import Thread, Lock, Event
+
+import cv2
+
+from config import (CAMERA_WIDTH, CAMERA_HEIGHT, CAMERA_FPS, CAMERA_FOURCC, CAMERA_KEEP_WARM,
+                    CAMERA_SOURCE, CAMERA_SOURCE_REALTIME, CAMERA_SOURCE_LOOP)
+from frame_slot import FrameSlot
+from video_source import open_source
+
+logger = logging.getLogger(__name__)
+
+
+def open_capture(camera_index):
+    """Varsayılan açıcı: CAMERA_SOURCE kaydı ya da V4L2 / sistem kamerası"""
+    if CAMERA_SOURCE is not None:
+        logger.info(f"🎞 Kamera yerine kayıt: {CAMERA_SOURCE}")
+        return open_source(CAMERA_SOURCE, realtime=CAMERA_SOURCE_REALTIME, loop=CAMERA_SOURCE_LOOP)
+    return cv2.VideoCapture(camera_index)
+
+
+class CameraService:
+    """
+    Tek kamera cihazı, çok tüketici.
+    opener: camera_index → VideoCapture benzeri nesne (isOpened/read/set/release)
+    keep_warm: son release'ten sonra cihazın açık kalacağı saniye (None = hep açık, 0 = hemen kapat)
+    """
+
+    def __init__(self, camera_index=0, width=CAMERA_WIDTH, height=CAMERA_HEIGHT, fps=CAMERA_FPS,
+                 fourcc=CAMERA_FOURCC, keep_warm=CAMERA_KEEP_WARM, opener=None):
+        self.camera_index = camera_index
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.keep_warm = keep_warm
+        self.opener = opener or open_capture
+
+        self.lock = Lock()
+        self.users = 0
+        self.capture = None
+        self.thread = None
+        self.stop_event = None
+        self.closing = None       # Kapanmakta olan yakalama thread'i
+        self.idle_since = None
+        self.slot = FrameSlot()
+        self.stats = {'frames': 0, 'errors': 0, 'opens': 0, 'fps': 0.0}
+
+    def acquire(self):
+        """Kullanıcı ekle; cihaz kapalıysa aç. Dönüş: cihaz açık mı"""
+        with self.lock:
+            self.users += 1
+            self.idle_since = None
+            if self.capture is None and not self._open():
+                self.users -= 1
+                return False
+            return True
+
+    def release(self):
+        """Kullanıcı bırak; son kullanıcıysa cihaz keep_warm süresi sonra kapanır"""
+        thread = None
+        with self.lock:
+            if self.users == 0:
+                return
+            self.users -= 1
+            if self.users == 0:
+                self.idle_since = time.monotonic()
+                if self.keep_warm == 0:
+                    thread = self._close()
+        if thread:
+            thread.join(timeout=2)
+
+    def shutdown(self):
+        """Kullanıcılardan bağımsız cihazı kapat (uygulama çıkışı)"""
+        with self.lock:
+            self.users = 0
+            thread = self._close()
+        if thread:
+            thread.join(timeout=2)
+
+    def _open(self):
+        """Cihazı aç ve yakalama thread'ini başlat (lock altında)"""
+        # Önceki açılışın cihazı bırakmasını bekle
+        if self.closing:
+            self.closing.join(timeout=2)
+            self.closing = None
+        try:
+            capture = self.opener(self.camera_index)
+            if not capture.isOpened():
+                raise RuntimeError(f"Kamera açılamadı (index={self.camera_index})")
+
+            # Biçim boyuttan önce ayarlanmalı (V4L2)
+            if self.fourcc:
+                capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+            capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            capture.set(cv2.CAP_PROP_FPS, self.fps)
+            capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        except Exception as e:
+            logger.error(f"❌ Kamera hatası: {e}")
+            return False
+
+        self.capture = capture
+        self.stop_event = Event()
+        self.stats['opens'] += 1
+        self.thread = Thread(target=self._capture_loop, args=(capture, self.stop_event), daemon=True)
+        self.thread.start()
+        logger.info(f"📹 Kamera açıldı (index={self.camera_index}, {self.width}x{self.height}@{self.fps}, "
+                    f"{self.fourcc or 'varsayılan biçim'})")
+        return True
+
+    def _close(self):
+        """Cihazı kapatmaya işaretle (lock altında) → beklenecek thread"""
+        if self.capture is None:
+            return None
+        self.stop_event.set()
+        self.closing, self.thread = self.thread, None
+        self.capture = None
+        return self.closing
+
+    def _capture_loop(self, capture, stop_event):
+        frames = 0
+        window_start = time.monotonic()
+
+        while not stop_event.is_set():
+            # Kullanıcı yoksa okuma yapma; keep_warm dolunca cihazı kapat
+            if self.users == 0:
+                if self.keep_warm is not None and self.lock.acquire(blocking=False):
+                    try:
+                        if self.users == 0 and self.idle_since is not None and not stop_event.is_set() \
+                                and time.monotonic() - self.idle_since >= self.keep_warm:
+                            self._close()
+                            logger.info(f"📴 Kamera kullanılmıyor, kapatılıyor ({self.keep_warm:.0f} s boşta)")
+                            continue
+                    finally:
+                        self.lock.release()
+                stop_event.wait(0.05)
+                continue
+
+            try:
+                ret, frame = capture.read()
+            except Exception as e:
+                logger.error(f"Frame okuma hatası: {e}")
+                ret = False
+            if not ret:
+                self.stats['errors'] += 1
+                time.sleep(0.01)
+                continue
+
+            # Tüketiciler aynı diziyi paylaşır
+            frame.flags.writeable = False
+            self.slot.publish(frame)
+
+            self.stats['frames'] += 1
+            frames += 1
+            elapsed = time.monotonic() - window_start
+            if elapsed >= 1.0:
+                self.stats['fps'] = frames / elapsed
+                frames = 0
+                window_start += elapsed
+
+        capture.release()
+        self.slot.clear()
+        logger.info("📹 Kamera kapandı")
+
+    def is_open(self):
+        return self.capture is not None
+
+    def wait(self, seen_seq, timeout=None):
+        """seen_seq'ten yeni kare gelene kadar bekle → (BGR kare, sıra); zaman aşımında (None, seen_seq)"""
+        return self.slot.wait(seen_seq, timeout)
+
+    def newer(self, seen_seq):
+        """seen_seq'ten yeni kare varsa (BGR kare, sıra), yoksa (None, seen_seq) - beklemez"""
+        return self.slot.newer(seen_seq)
+
+    def latest(self):
+        """(son BGR kare, sıra)"""
+        return self.slot.latest()
+
+
+_services = {}
+_services_lock = Lock()
+
+
+def get_camera_service(camera_index=0):
+    """Kamera index'i başına paylaşılan servis"""
+    with _services_lock:
+        if camera_index not in _services:
+            _services[camera_index] = CameraService(camera_index)
+        return _services[camera_index]
+
+
+def shutdown_cameras():
+    """Tüm kamera servislerini kapat"""
+    with _services_lock:
+        services = list(_services.values())
+    for service in services:
+        service.shutdown()
+
+
+# Test
+if __name__ == "__main__":
+    import numpy as np
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    class SlowCamera:
+        """Açılışı yavaş (gerçek USB kamera gibi) sahte kamera"""
+
+        def __init__(self, camera_index):
+            time.sleep(0.8)
+            self.frame_index = 0
+
+        def isOpened(self):
+            return True
+
+        def set(self, prop, value):
+            return True
+
+        def read(self):
+            time.sleep(1 / 30)
+            self.frame_index += 1
+            return True, np.full((480, 640, 3), self.frame_index % 256, np.uint8)
+
+        def release(self):
+            pass
+
+    service = CameraService(opener=SlowCamera, keep_warm=2.0)
+
+    # Renk → OCR → Renk modül değişimi: cihaz bir kez açılır
+    for module in ('color', 'ocr', 'color'):
+        start = time.perf_counter()
+        service.acquire()
+        frame, seq = service.wait(0, timeout=2)
+        print(f"{module}: ilk kare {(time.perf_counter() - start) * 1000:.0f} ms "
+              f"(sıra {seq}, salt okunur: {not frame.flags.writeable})")
+        time.sleep(0.3)
+        service.release()
+
+    time.sleep(2.5)
+    print(f"Açılış sayısı: {service.stats['opens']}, boşta kapandı: {not service.is_open()}")
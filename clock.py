@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Saat Soyutlaması (hızlandırılmış simülasyon için)
+- Modüller ve ESP32Communication zamanı doğrudan datetime.now() / time.time()
+  yerine kendilerine verilen saatten okur (clock=None → SYSTEM_CLOCK)
+- SystemClock: gerçek zaman
+- VirtualClock: sanal zaman - advance() ile ilerletilir; saatlerce süren üretim
+  senaryoları saniyeler içinde koşturulabilir (regresyon / performans testleri)
+"""
+
+import time
+import logging
+from datetime import datetime
+from threading import Condition
+
+logger = logging.getLogger(__name__)
+
+
+class SystemClock:
+    """Gerçek zaman"""
+
+    def time(self):
+        """Epoch saniye (time.time)"""
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def now(self):
+        """Yerel datetime (datetime.now)"""
+        return datetime.now()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+SYSTEM_CLOCK = SystemClock()
+
+
+class VirtualClock:
+    """
+    Sanal zaman.
+    auto_advance=True: sleep() zamanı hemen ilerletir (tek thread'li simülasyon)
+    auto_advance=False: sleep() başka bir thread advance() edene kadar bekler
+    """
+
+    def __init__(self, start=None, auto_advance=True):
+        self._time = time.time() if start is None else float(start)
+        self._monotonic = 0.0
+        self.auto_advance = auto_advance
+        self.condition = Condition()
+
+    def time(self):
+        return self._time
+
+    def monotonic(self):
+        return self._monotonic
+
+    def now(self):
+        return datetime.fromtimestamp(self._time)
+
+    def advance(self, seconds):
+        """Sanal zamanı ilerlet, bekleyen sleep()'leri uyandır"""
+        if seconds < 0:
+            raise ValueError("Sanal zaman geri alınamaz")
+        with self.condition:
+            self._time += seconds
+            self._monotonic += seconds
+            self.condition.notify_all()
+
+    def sleep(self, seconds):
+        if self.auto_advance:
+            self.advance(seconds)
+            return
+        with self.condition:
+            deadline = self._monotonic + seconds
+            while self._monotonic < deadline:
+                self.condition.wait()
+
+
+# Test
+if __name__ == "__main__":
+    import argparse
+
+    from api_client import ApiResult
+    from module_conveyor import ConveyorModule
+
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="Sanal saatle konveyör simülasyonu")
+    parser.add_argument('--hours', type=float, default=8.0)
+    parser.add_argument('--interval', type=float, default=2.5, help='ürünler arası saniye')
+    args = parser.parse_args()
+
+    class SimESP32:
+        def __init__(self):
+            self.callbacks = {}
+
+        def register_callback(self, msg_type, callback):
+            self.callbacks[msg_type] = callback
+
+        def unregister_callback(self, msg_type):
+            self.callbacks.pop(msg_type, None)
+
+        def send_command(self, command):
+            return True
+
+    class SimApi:
+        def post_prod_event(self, *args, **kwargs):
+            return ApiResult(True, queued=True)
+
+        def get_product_id(self, wc_id):
+            return 102
+
+    clock = VirtualClock()
+    esp32 = SimESP32()
+    conveyor = ConveyorModule(esp32, api=SimApi(), clock=clock)
+    conveyor.start(session_id=1)
+
+    start = time.perf_counter()
+    items = int(args.hours * 3600 / args.interval)
+    for _ in range(items):
+        clock.sleep(args.interval)
+        esp32.callbacks['count'](None)
+    stats = conveyor.get_statistics()
+    conveyor.stop()
+
+    print(f"{args.hours:.1f} saat sanal üretim {time.perf_counter() - start:.2f} s'de: "
+          f"{stats['count']} ürün, {stats['rate_per_minute']:.1f} ürün/dk, "
+          f"çalışma {conveyor.total_runtime / 3600:.2f} saat")
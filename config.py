@@ -5,6 +5,8 @@ Ortak Konfigürasyon Dosyası
 Tüm modüller bu ayarları kullanır
 """
 
+import os
+
 START_PIN = 12
 STOP_PIN = 13
 BUZZER_PIN = 19
@@ -15,7 +17,8 @@ UART_PORT = '/dev/ttyUSB0'
 UART_BAUDRATE = 9600
 
 
-API_BASE_URL = "http://gaunmes.pkeylabs.io/api/v1"
+# Yerel test için MES_API_BASE_URL ile değiştirilebilir (bkz. mock_api_server.py)
+API_BASE_URL = os.environ.get('MES_API_BASE_URL', "http://gaunmes.pkeylabs.io/api/v1")
 API_KEY = "8E4579A1-C3C6-4223-90FE-FBE59B7DDFE6"
 
 
@@ -54,5 +57,116 @@ MODULE_COLORS = {
     'metal': '#77a016' 
 }
 
+# API dayanıklılık ayarları (api_resilience.py)
+API_RETRY_ATTEMPTS = 3          # Toplam deneme sayısı (ilk istek dahil)
+API_RETRY_BASE_DELAY = 0.2      # Saniye - üstel bekleme tabanı
+API_RETRY_MAX_DELAY = 2.0       # Saniye - tek bekleme üst sınırı
+API_CONNECT_TIMEOUT = 2.0       # Saniye - bağlantı kurma zaman aşımı
+API_BREAKER_FAILURES = 5        # Art arda kaç hatada devre açılsın
+API_BREAKER_RECOVERY = 15.0     # Saniye - açık devre sonrası deneme (probe) süresi
+API_PRODUCT_ID_TTL = 30.0       # Saniye - workCenter ürün ID önbelleği (0 = her olayda sor)
+
+# Session başlatma (session_pipeline.py)
+SESSION_POLL_INITIAL = 0.1      # Saniye - ilk currentSessionId sorgu aralığı
+SESSION_POLL_MAX = 1.0          # Saniye - en uzun sorgu aralığı
+SESSION_START_DEADLINE = 15.0   # Saniye - kart okutma → hazır için üst süre
+
+# Session durum eşitleyici (session_sync.py)
+SESSION_SYNC_INTERVAL = 10.0    # Saniye - currentSessionId sorgu aralığı
+SESSION_SYNC_JITTER = 0.2       # Aralığa ±%20 rastgelelik (istasyonlar aynı anda sormasın)
+SESSION_SYNC_TIMEOUT = 3.0      # Saniye - eşitleme sorgusu zaman aşımı
+SESSION_SYNC_GRACE = 30.0       # Saniye - takip başladıktan sonra sunucu gecikmesi: farklı ID sayılmaz
+SESSION_SYNC_CONFIRMATIONS = 2  # Art arda bu kadar uyuşmayan sorgudan sonra session geçersiz sayılır
+
+# Offline session (offline_session.py) - API erişilemezken yerel session ve sonradan eşitleme
+OFFLINE_SESSION_ENABLED = True
+OFFLINE_SPOOL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'offline_sessions')
+OFFLINE_RECONCILE_INTERVAL = 30.0   # Saniye - bekleyen offline session'lar için eşitleme denemesi
+OFFLINE_ENERGY_BUCKET = 60.0        # Saniye - eşitlemede energy ölçümleri bu aralıkta ortalanır
+
+# Giden telemetri hız sınırı (rate_limit.py) - endpoint: (saniyede istek, burst, politika)
+# 'aggregate': fazla prodEvent'ler quantity toplanarak sonra gönderilir (yalnız sayım endpoint'leri),
+# 'latest': bekleyen olay en yenisiyle değiştirilir, 'queue': sırayla bekletilir (atılmaz), 'drop': atılır (sayılır)
+RATE_LIMITS = {
+    'product': (5.0, 10, 'aggregate'),
+    'conveyor': (5.0, 10, 'aggregate'),
+    'weight': (5.0, 10, 'latest'),      # Gram ölçümü - toplanmaz
+    'energy': (2.0, 5, 'drop'),
+    'fault': (2.0, 10, 'queue')         # Arıza kaydı (end_ts) asla atılmaz
+}
+RATE_LIMIT_FLUSH_INTERVAL = 0.5     # Saniye - birleştirilmiş olayları gönderme kontrol aralığı
+
+# Yerel historian (historian.py) - tüm ESP32 ölçümleri SQLite'a
+HISTORIAN_ENABLED = True
+HISTORIAN_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'historian.db')
+HISTORIAN_BATCH_SIZE = 500          # Tek transaction'da en fazla kaç ölçüm
+HISTORIAN_FLUSH_INTERVAL = 1.0      # Saniye - bekleyen ölçümleri yazma aralığı
+HISTORIAN_QUEUE_SIZE = 100000       # Yazılmayı bekleyen ölçüm sınırı (dolunca en eskisi atılır)
+HISTORIAN_RETENTION_DAYS = 14       # Bu süreden eski ölçümler silinir
+HISTORIAN_PRUNE_INTERVAL = 3600.0   # Saniye - eski kayıt temizleme aralığı
+
+# Canlı ölçümler için paylaşımlı bellek halka tamponu (shm_ring.py)
+SHM_RING_ENABLED = True
+SHM_RING_PATH = os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else '/tmp', 'mes_esp32_ring')
+SHM_RING_CAPACITY = 16384           # Akış başına kayıt sayısı (16 B/kayıt, 10 Hz'de ~27 dk)
+
+# Session arşivi (session_archive.py) - ders analitiği için sütunlu dosyalar
+ARCHIVE_ENABLED = True
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'session_archive')
+ARCHIVE_CHUNK_ROWS = 50000          # Parça başına satır (uzun session'da bellek sınırı)
+ARCHIVE_FORMAT = 'auto'             # 'auto' (pyarrow varsa parquet), 'parquet' ya da 'npz'
+
+# Session analitiği (session_analytics.py)
+ANALYTICS_WEIGHT_SPEC = None        # (alt, üst) gram - ağırlık Cpk için spesifikasyon sınırları
+ANALYTICS_FAULT_GAP = 5.0           # Saniye - bu aralıktan yakın arıza tetikleri tek arıza sayılır
+
+# Olay günlüğü (event_journal.py) - yeniden başlatmada session ve sayaçların sürdürülmesi
+JOURNAL_ENABLED = True
+JOURNAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'journal')
+JOURNAL_SNAPSHOT_EVERY = 1000       # Bu kadar kayıtta bir snapshot alınır, journal boşaltılır
+JOURNAL_SYNC_INTERVAL = 1.0         # Saniye - fsync aralığı (elektrik kesintisinde en fazla kayıp)
+
+# Renk algılama (module_color.py)
+COLOR_ROI = None                    # (x, y, genişlik, yükseklik) piksel - sadece bant bölgesi işlenir; None = tüm kare
+COLOR_PROCESS_SCALE = 1.0           # İç işleme ölçeği (0.5 = yarım, 0.25 = çeyrek çözünürlük)
+COLOR_COUNT_ALL = False             # True: her renk sayılır ve prodEvent gönderilir; False: sadece seçili renk
+COLOR_PRODUCT_IDS = {}              # Renk → product_id (ör. {'Kirmizi': 201}); yoksa workCenter ürün ID'si
+COLOR_COUNT_AXIS = 'x'              # Bant hareket ekseni ('x' yatay bant, 'y' dikey)
+COLOR_COUNT_LINE = 0.5              # Sanal sayım çizgisi (kare boyunun oranı)
+COLOR_COUNT_DIRECTION = 1           # +1: artan yönde geçiş sayılır, -1: azalan, 0: her iki yön
+COLOR_TRACK_MAX_DISTANCE = 80.0     # Piksel - iz ile algılama arası en fazla mesafe (tahmini konuma)
+COLOR_TRACK_MAX_MISSED = 5          # Algılama - art arda bu kadar algılamada görünmeyen iz silinir
+COLOR_MOTION_GATE = True            # ROI'de hareket yoksa tam algılama atlanır
+COLOR_MOTION_SCALE = 0.125          # Hareket kontrolü ölçeği (ROI'nin 1/8'i)
+COLOR_MOTION_THRESHOLD = 12         # Seviye (0-255) - bir kanalı bu kadar değişen piksel "değişti" sayılır
+COLOR_MOTION_MIN_FRACTION = 0.002   # Değişen (piksel, kanal) oranı bunu aşarsa hareket var
+COLOR_MOTION_MAX_SKIP = 30          # Kare - hareket olmasa da en geç bu kadar karede bir tam algılama
+
+# Paylaşılan kamera (camera_service.py)
+CAMERA_WIDTH = 640
+CAMERA_HEIGHT = 480
+CAMERA_FPS = 30
+CAMERA_FOURCC = 'MJPG'              # 'MJPG' / 'YUYV'; None = sürücü varsayılanı
+CAMERA_KEEP_WARM = 300.0            # Saniye - son modül bıraktıktan sonra cihaz açık kalır (None = hep açık)
+CAMERA_SOURCE = None                # None: kamera cihazı; video dosyası / görüntü klasörü yolu (kayıttan oynatma)
+CAMERA_SOURCE_REALTIME = True       # Kayıt: True = kendi kare hızında, False = olabildiğince hızlı
+CAMERA_SOURCE_LOOP = True           # Kayıt sonunda başa sar
+
+# Yüke uyarlanan kare zamanlayıcı (frame_scheduler.py)
+SCHEDULER_ENABLED = True            # False: her karede tam algılama
+SCHEDULER_CPU_HIGH = 0.85           # Çekirdek - süreç CPU yükü bunu aşarsa algılama hızı düşer (GIL ~1 çekirdek)
+SCHEDULER_CPU_LOW = 0.6             # Çekirdek - yük bunun altındaysa algılama hızı artar
+SCHEDULER_DETECT_BUDGET = 0.5       # Çekirdek - algılamanın tek başına en fazla payı
+SCHEDULER_MIN_HZ = 5.0              # Bant hızı bilinmiyorken (speed_rpm=0) en düşük algılama hızı
+SCHEDULER_PX_PER_RPM = 2.0          # Kalibrasyon: speed_rpm birimi başına bandın kadrajda ilerleme hızı (piksel/s)
+SCHEDULER_WINDOW = 0.5              # Saniye - yük ölçüm penceresi
+
+# Asenkron API gönderici ayarları (api_uploader.py)
+UPLOADER_MAX_IN_FLIGHT = 4      # Aynı anda en fazla kaç istek
+UPLOADER_QUEUE_SIZE = 1000      # Bekleyen olay sınırı (dolunca yeni olay reddedilir)
+UPLOADER_REPORT_INTERVAL = 60.0 # Saniye - endpoint istatistik log aralığı
+UPLOADER_ORDERED_ENDPOINTS = ('fault', 'session_start', 'session_end')  # Önceki istekler bitmeden gönderilmez
+UPLOADER_LANE_IDLE = 30.0       # Saniye - bu süre olay gelmeyen session hattı kapatılır
+
 LOG_LEVEL = 'INFO'
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -1,7 +1,7 @@
 import requests
+from config import API_ENDPOINTS, API_KEY
 
-API_KEY = "8E4579A1-C3C6-4223-90FE-FBE59B7DDFE6"
-BASE_URL = "http://gaunmes.pkeylabs.io/api/v1/session/currentSessionId"
+BASE_URL = API_ENDPOINTS['session_id']
 
 def get_current_session_id(wc_id):
     """
@@ -3,6 +3,7 @@
 """
 ESP32 Serial Haberleşme Sınıfı
 Tüm modüller bu sınıfı kullanır
+Örnek dinleyicileri (historian vb.) her ölçümü zaman damgasıyla alır
 """
 
 import serial
@@ -10,19 +11,57 @@ import time
 import logging
 from threading import Thread, Lock
 
+from clock import SYSTEM_CLOCK
+
 logger = logging.getLogger(__name__)
 
+# Değer taşıyan mesajlar: önek → (mesaj tipi, dönüştürücü)
+#   cur=X.XX, pow=X.XX, uretimw=X.XX (üretim W), uretima=X.XX (üretim A),
+#   weight=X.XX, PWM:X (0-255)
+VALUE_MESSAGES = (
+    ("cur=", 'current', float),
+    ("pow=", 'power', float),
+    ("uretimw=", 'production_w', float),
+    ("uretima=", 'production_a', float),
+    ("weight=", 'weight', float),
+    ("PWM:", 'pwm', int),
+)
+
+# Sensör mesajları: mesaj → (mesaj tipi, değer)
+EVENT_MESSAGES = {
+    "Count": ('count', None),
+    "Fire": ('fire', True),
+    "Voice": ('voice', True),
+    "Vibration": ('vibration', True),
+}
+
+
+def parse_message(message):
+    """
+    ESP32 satırını çöz → (mesaj tipi, değer); tanınmayan mesajda None.
+    Sayı bozuksa ValueError fırlatır.
+    """
+    event = EVENT_MESSAGES.get(message)
+    if event is not None:
+        return event
+    for prefix, msg_type, convert in VALUE_MESSAGES:
+        if message.startswith(prefix):
+            return msg_type, convert(message[len(prefix):])
+    return None
+
 
 class ESP32Communication:
     """ESP32 ile UART üzerinden haberleşme"""
     
-    def __init__(self, port='/dev/serial0', baudrate=9600):
+    def __init__(self, port='/dev/serial0', baudrate=9600, clock=None):
         self.port = port
         self.baudrate = baudrate
         self.ser = None
         self.connected = False
         self.lock = Lock()
         self.callbacks = {}  # Mesaj tiplerine göre callback fonksiyonları
+        self.sample_listeners = []  # listener(msg_type, value, ts) - tüm mesajlar (hızlı olmalı)
+        self.clock = clock or SYSTEM_CLOCK  # Ölçüm zaman damgaları (simülasyonda VirtualClock)
         self.running = False
         self.connect()
     
@@ -84,54 +123,29 @@ class ESP32Communication:
     def _parse_message(self, message):
         """Gelen mesajı parse et ve ilgili callback'i çağır"""
         try:
-            # cur=X.XX formatı
-            if message.startswith("cur="):
-                value = float(message.split("=")[1])
-                self._call_callback('current', value)
-            
-            # pow=X.XX formatı
-            elif message.startswith("pow="):
-                value = float(message.split("=")[1])
-                self._call_callback('power', value)
-            
-            # uretimw=X.XX formatı (Enerji Üretimi Watt)
-            elif message.startswith("uretimw="):
-                value = float(message.split("=")[1])
-                self._call_callback('production_w', value)
-            
-            # uretima=X.XX formatı (Enerji Üretimi Amper)
-            elif message.startswith("uretima="):
-                value = float(message.split("=")[1])
-                self._call_callback('production_a', value)
-            
-            # weight=X.XX formatı
-            elif message.startswith("weight="):
-                value = float(message.split("=")[1])
-                self._call_callback('weight', value)
+            parsed = parse_message(message)
+            if parsed is None:
+                logger.debug(f"Bilinmeyen mesaj: {message}")
+                return
             
-            # ✅ PWM=X formatı (0-255 arasında)
-            elif message.startswith("PWM:"):
-                value = int(message.split(":")[1])
-                self._call_callback('pwm', value)
+            msg_type, value = parsed
+            if msg_type == 'pwm':
                 logger.debug(f"PWM değeri alındı: {value}")
-            
-            # Sensör mesajları
-            elif message == "Count":
-                self._call_callback('count', None)
-            elif message == "Fire":
-                self._call_callback('fire', True)
-            elif message == "Voice":
-                self._call_callback('voice', True)
-            elif message == "Vibration":
-                self._call_callback('vibration', True)
-            else:
-                logger.debug(f"Bilinmeyen mesaj: {message}")
+            self._call_callback(msg_type, value)
                 
         except Exception as e:
             logger.error(f"Parse hatası: {e} - Mesaj: {message}")
     
     def _call_callback(self, msg_type, value):
         """Kayıtlı callback fonksiyonunu çağır"""
+        if self.sample_listeners:
+            ts = self.clock.time()
+            for listener in self.sample_listeners:
+                try:
+                    listener(msg_type, value, ts)
+                except Exception as e:
+                    logger.error(f"Dinleyici hatası ({msg_type}): {e}")
+        
         if msg_type in self.callbacks:
             try:
                 self.callbacks[msg_type](value)
@@ -149,6 +163,15 @@ class ESP32Communication:
             del self.callbacks[msg_type]
             logger.debug(f"Callback kaldırıldı: {msg_type}")
     
+    def add_sample_listener(self, listener):
+        """Tüm ölçümleri alacak dinleyici ekle (okuma thread'inde çağrılır, bloklamamalı)"""
+        if listener not in self.sample_listeners:
+            self.sample_listeners = self.sample_listeners + [listener]
+    
+    def remove_sample_listener(self, listener):
+        """Dinleyiciyi kaldır"""
+        self.sample_listeners = [l for l in self.sample_listeners if l is not listener]
+    
     def send_command(self, command):
         """ESP32'ye komut gönder"""
         with self.lock:
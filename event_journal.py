@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Olay Günlüğü (append-only journal + snapshot)
+- Açık session ve modül sayaçları (ConveyorModule.item_count, MetalModule.metal_count,
+  ColorModule.product_count, WeightModule istatistikleri) her değişiklikte
+  journal.jsonl dosyasına tek satır olarak eklenir
+- Diske yazma (fsync) arka planda JOURNAL_SYNC_INTERVAL'de bir: olay akışı beklemez,
+  elektrik kesilirse en fazla bu kadar süre kaybolur
+- JOURNAL_SNAPSHOT_EVERY kayıtta bir durumun tamamı snapshot.json'a yazılır ve
+  journal boşaltılır (kuyruk kısa kalır)
+- Yeniden başlatmada snapshot + kuyruk birkaç ms'de okunur; GUI session'ı
+  yeni NFC okutması olmadan sürdürür
+
+Kayıtlar:
+    {"n": 12, "op": "session", "session": {"module": ..., "session_id": ..., "wc_id": ..., "card_uid": ...}}
+    {"n": 13, "op": "set", "m": "conveyor", "v": {"item_count": 5, ...}}
+    {"n": 14, "op": "end"}
+"""
+
+import os
+import json
+import time
+import logging
+from threading import Thread, Lock, Event
+
+from config import JOURNAL_DIR, JOURNAL_SNAPSHOT_EVERY, JOURNAL_SYNC_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class EventJournal:
+    """Session ve modül durumu için çökmeye dayanıklı günlük"""
+
+    def __init__(self, directory=JOURNAL_DIR, snapshot_every=JOURNAL_SNAPSHOT_EVERY,
+                 sync_interval=JOURNAL_SYNC_INTERVAL):
+        self.directory = directory
+        self.journal_path = os.path.join(directory, 'journal.jsonl')
+        self.snapshot_path = os.path.join(directory, 'snapshot.json')
+        self.snapshot_every = snapshot_every
+        self.sync_interval = sync_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self.lock = Lock()
+        self.seq = 0
+        self.session = None     # Açık session bilgisi (yoksa None)
+        self.modules = {}       # modül adı → durum alanları
+        self.since_snapshot = 0
+        self.dirty = False
+
+        start = time.perf_counter()
+        replayed = self._load()
+        logger.info(f"✅ Journal yüklendi: {replayed} kayıt yeniden oynatıldı "
+                    f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+        self.file = open(self.journal_path, 'a', encoding='utf-8')
+
+        self.stop_event = Event()
+        self.thread = Thread(target=self._sync_loop, daemon=True)
+        self.thread.start()
+
+    # --- Yükleme ---
+
+    def _load(self):
+        """Snapshot + journal kuyruğu → bellek durumu; yarım kalmış son satır kesilir"""
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                snapshot_seq = self.seq = snapshot['seq']
+                self.session = snapshot['session']
+                self.modules = snapshot['modules']
+            except (ValueError, KeyError) as e:
+                logger.error(f"❌ Snapshot okunamadı, sadece journal kullanılacak: {e}")
+
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        replayed = 0
+        valid_size = 0
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid_size += len(line)
+                # Snapshot'tan önce çökülmüşse kayıtlar snapshot'ta zaten var
+                if record['n'] <= snapshot_seq:
+                    continue
+                self._apply(record)
+                self.seq = record['n']
+                replayed += 1
+
+        if valid_size != os.path.getsize(self.journal_path):
+            logger.warning(f"⚠️ Journal sonu yarım kalmış, kesiliyor ({valid_size} bayt)")
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(valid_size)
+        self.since_snapshot = replayed
+        return replayed
+
+    def _apply(self, record):
+        op = record['op']
+        if op == 'set':
+            self.modules.setdefault(record['m'], {}).update(record['v'])
+        elif op == 'session':
+            self.session = record['session']
+            self.modules = {}
+        elif op == 'end':
+            self.session = None
+            self.modules = {}
+
+    # --- Yazma ---
+
+    def _append(self, record):
+        with self.lock:
+            self.seq += 1
+            record['n'] = self.seq
+            self._apply(record)
+            self.file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+            self.file.flush()
+            self.dirty = True
+            self.since_snapshot += 1
+
+    def begin_session(self, module, session_id, wc_id, card_uid):
+        """Yeni session açıldı - önceki modül durumları geçersiz"""
+        self._append({'op': 'session', 'session': {
+            'module': module,
+            'session_id': session_id,
+            'wc_id': wc_id,
+            'card_uid': card_uid,
+            'started': time.time()
+        }})
+
+    def end_session(self):
+        """Session kapandı - sürdürülecek bir şey kalmadı, günlük sıkıştırılır"""
+        if self.session is None:
+            return
+        self._append({'op': 'end'})
+        self.snapshot()
+
+    def record(self, module, **fields):
+        """Modül durum değişikliği (sadece değişen alanlar)"""
+        if self.session is None:
+            return
+        self._append({'op': 'set', 'm': module, 'v': fields})
+
+    def recover(self):
+        """Yarım kalan session → (session bilgisi, {modül: durum}) ya da (None, {})"""
+        with self.lock:
+            if self.session is None:
+                return None, {}
+            return dict(self.session), {name: dict(state) for name, state in self.modules.items()}
+
+    # --- Snapshot / fsync ---
+
+    def snapshot(self):
+        """Tüm durumu snapshot.json'a yaz ve journal'ı boşalt"""
+        with self.lock:
+            data = {'seq': self.seq, 'session': self.session, 'modules': self.modules}
+            tmp_path = self.snapshot_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            # Snapshot diskte - journal kayıtları artık gereksiz
+            self.file.truncate(0)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.since_snapshot = 0
+            self.dirty = False
+
+    def _sync_loop(self):
+        while not self.stop_event.wait(self.sync_interval):
+            try:
+                if self.since_snapshot >= self.snapshot_every:
+                    self.snapshot()
+                elif self.dirty:
+                    with self.lock:
+                        self.dirty = False
+                        os.fsync(self.file.fileno())
+            except OSError as e:
+                logger.error(f"❌ Journal diske yazılamadı: {e}")
+
+    def close(self):
+        """Thread'i durdur, kalan kayıtları diske yaz"""
+        self.stop_event.set()
+        self.thread.join(timeout=2)
+        with self.lock:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+        logger.info("⏹ Journal kapatıldı")
+
+
+# Test
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="Journal durumu / çökme simülasyonu")
+    parser.add_argument('--dir', default=JOURNAL_DIR)
+    parser.add_argument('--simulate', type=int, default=0, help='geçici dizinde N sayaç olayı yaz ve geri yükle')
+    args = parser.parse_args()
+
+    if args.simulate:
+        directory = tempfile.mkdtemp()
+        journal = EventJournal(directory)
+        journal.begin_session('conveyor', 123, 2, 'ABCD1234')
+        for i in range(1, args.simulate + 1):
+            journal.record('conveyor', item_count=i, last_sent_count=i)
+        journal.close()
+
+        start = time.perf_counter()
+        journal = EventJournal(directory)
+        session, modules = journal.recover()
+        print(f"Geri yükleme: {(time.perf_counter() - start) * 1000:.1f} ms → {session} {modules}")
+        journal.close()
+    else:
+        journal = EventJournal(args.dir)
+        print(journal.recover())
+        journal.close()
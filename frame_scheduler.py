@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yüke Uyarlanan Kare Zamanlayıcı (görüntü modülleri)
+- Her kare gösterilir; tam algılama her N. karede çalışır
+- Algılama hızı (Hz) süreç CPU yüküne göre ayarlanır (AIMD): seri port, Tk ve
+  API gönderici aynı süreçte (GIL) - yük yüksekse hız çarpımsal düşer, düşükse
+  toplamsal artar; ayrıca algılama kendi başına DETECT_BUDGET çekirdekten fazla
+  yiyemez (ölçülen kare başına maliyetle)
+- Taban: bant hızından (speed_rpm) türetilir - ürün iki algılama arasında takip
+  eşleşme mesafesinin yarısından fazla ilerlememeli; hız asla tabanın altına inmez
+"""
+
+import time
+import logging
+
+from config import (SCHEDULER_CPU_HIGH, SCHEDULER_CPU_LOW, SCHEDULER_DETECT_BUDGET, SCHEDULER_MIN_HZ,
+                    SCHEDULER_PX_PER_RPM, SCHEDULER_WINDOW)
+from clock import SYSTEM_CLOCK
+
+logger = logging.getLogger(__name__)
+
+
+class FrameScheduler:
+    """
+    Kullanım (yakalama thread'inde, her kare):
+        if scheduler.should_detect():
+            start = time.perf_counter(); ...algıla...; scheduler.record(time.perf_counter() - start)
+    max_step_px: iki algılama arasında ürünün en fazla ilerleyebileceği mesafe (piksel)
+    cpu_time: süreç CPU zamanı fonksiyonu (test için değiştirilebilir)
+    """
+
+    def __init__(self, max_step_px, camera_fps=30.0, clock=None, cpu_time=time.process_time,
+                 cpu_high=SCHEDULER_CPU_HIGH, cpu_low=SCHEDULER_CPU_LOW, budget=SCHEDULER_DETECT_BUDGET,
+                 min_hz=SCHEDULER_MIN_HZ, px_per_rpm=SCHEDULER_PX_PER_RPM, window=SCHEDULER_WINDOW):
+        self.max_step_px = max_step_px
+        self.camera_fps = camera_fps
+        self.clock = clock or SYSTEM_CLOCK
+        self.cpu_time = cpu_time
+        self.cpu_high = cpu_high
+        self.cpu_low = cpu_low
+        self.budget = budget
+        self.min_hz = min_hz
+        self.px_per_rpm = px_per_rpm
+        self.window = window
+
+        self.speed_rpm = 0
+        self.target_hz = camera_fps
+        self.cost = 0.0               # Algılama maliyeti (saniye, üstel ortalama)
+        self.load = 0.0               # Süreç CPU yükü (çekirdek)
+        self.frames_since = 0         # Son algılamadan beri kare
+        self.window_start = None
+        self.window_cpu = 0.0
+        self.window_frames = 0
+        self.stats = {'frames': 0, 'detected': 0}
+
+    def floor_hz(self):
+        """Bant hızından algılama tabanı (Hz), kamera hızıyla sınırlı"""
+        belt_px_per_s = self.speed_rpm * self.px_per_rpm
+        return min(self.camera_fps, max(self.min_hz, belt_px_per_s / self.max_step_px))
+
+    def interval(self):
+        """Algılamalar arası kare sayısı"""
+        return max(1, int(self.camera_fps / self.target_hz))
+
+    def should_detect(self):
+        """Her kare bir kez çağrılır - bu karede tam algılama yapılsın mı?"""
+        self._update_load()
+        self.stats['frames'] += 1
+        self.frames_since += 1
+        if self.frames_since >= self.interval():
+            self.frames_since = 0
+            self.stats['detected'] += 1
+            return True
+        return False
+
+    def record(self, seconds):
+        """Algılama süresini bildir"""
+        self.cost = seconds if self.cost == 0 else 0.8 * self.cost + 0.2 * seconds
+
+    def _update_load(self):
+        """Pencere dolunca yükü ölç, hedef hızı ayarla"""
+        now = self.clock.monotonic()
+        self.window_frames += 1
+        if self.window_start is None:
+            self.window_start, self.window_cpu = now, self.cpu_time()
+            return
+        elapsed = now - self.window_start
+        if elapsed < self.window:
+            return
+
+        cpu = self.cpu_time()
+        self.load = (cpu - self.window_cpu) / elapsed
+        self.camera_fps = max(1.0, self.window_frames / elapsed)
+        self.window_start, self.window_cpu, self.window_frames = now, cpu, 0
+
+        previous = self.target_hz
+        if self.load > self.cpu_high:
+            self.target_hz *= 0.75
+        elif self.load < self.cpu_low:
+            self.target_hz += 2.0
+        if self.cost > 0:
+            self.target_hz = min(self.target_hz, self.budget / self.cost)
+        self.target_hz = min(self.camera_fps, max(self.floor_hz(), self.target_hz))
+
+        if abs(self.target_hz - previous) >= 1.0:
+            logger.debug(f"Algılama hızı {previous:.1f} → {self.target_hz:.1f} Hz "
+                         f"(yük {self.load:.2f} çekirdek, maliyet {self.cost * 1000:.1f} ms, taban {self.floor_hz():.1f} Hz)")
+
+
+# Test
+if __name__ == "__main__":
+    from clock import VirtualClock
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    # Sanal zamanda 30 s: 10-20 s arası başka işler (Tk, seri, API) 0.7 çekirdek yiyor
+    clock = VirtualClock()
+    cpu = [0.0]
+    scheduler = FrameScheduler(max_step_px=40, clock=clock, cpu_time=lambda: cpu[0])
+    scheduler.speed_rpm = 150     # 300 px/s → taban 7.5 Hz
+    for frame in range(30 * 30):
+        t = frame / 30
+        if scheduler.should_detect():
+            scheduler.record(0.012)
+            cpu[0] += 0.012
+        cpu[0] += 0.002 + (0.7 / 30 if 10 <= t < 20 else 0.0)
+        clock.advance(1 / 30)
+        if frame % 60 == 0:
+            print(f"t={t:4.1f} s  yük {scheduler.load:.2f}  hedef {scheduler.target_hz:5.1f} Hz  "
+                  f"her {scheduler.interval()}. kare  taban {scheduler.floor_hz():.1f} Hz")
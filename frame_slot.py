@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+En Son Değer Yuvası (latest-value slot)
+- Tek yazar (kamera / algılama thread'i) sonucu yayınlar, okuyucular (GUI)
+  her zaman en yenisini alır; kuyruk yok, eski kareler birikmez
+- Yazar okuyucuyu hiç beklemez; okuyucu yeni bir şey yoksa None alır
+  (GUI aynı kareyi tekrar çizmez)
+- Sıra numarası ile okuyucu kaç kare kaçırdığını da bilir
+"""
+
+import logging
+from threading import Condition
+
+logger = logging.getLogger(__name__)
+
+
+class FrameSlot:
+    """Tek elemanlı, üzerine yazılan yuva"""
+
+    def __init__(self):
+        self.condition = Condition()
+        self.value = None
+        self.seq = 0          # Her publish'te bir artar
+
+    def publish(self, value):
+        """Yeni değeri koy (öncekinin üzerine), bekleyenleri uyandır"""
+        with self.condition:
+            self.value = value
+            self.seq += 1
+            self.condition.notify_all()
+
+    def latest(self):
+        """(değer, sıra) - değer hiç yayınlanmadıysa (None, 0)"""
+        with self.condition:
+            return self.value, self.seq
+
+    def newer(self, seen_seq):
+        """seen_seq'ten yeni değer varsa (değer, sıra), yoksa (None, seen_seq)"""
+        with self.condition:
+            if self.seq == seen_seq:
+                return None, seen_seq
+            return self.value, self.seq
+
+    def wait(self, seen_seq, timeout=None):
+        """seen_seq'ten yeni değer gelene kadar bekle → (değer, sıra); zaman aşımında (None, seen_seq)"""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.seq != seen_seq, timeout):
+                return None, seen_seq
+            return self.value, self.seq
+
+    def clear(self):
+        """Değeri bırak (sıra korunur - okuyucular 'yeni' olarak None görmez)"""
+        with self.condition:
+            self.value = None
+
+
+# Test
+if __name__ == "__main__":
+    import time
+    from threading import Thread
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    slot = FrameSlot()
+
+    def producer():
+        for i in range(300):
+            slot.publish(i)
+            time.sleep(0.001)
+
+    Thread(target=producer, daemon=True).start()
+
+    seen, shown = 0, 0
+    deadline = time.time() + 1.0
+    while time.time() < deadline:
+        value, seen = slot.wait(seen, timeout=0.1)
+        if value is not None:
+            shown += 1
+        time.sleep(0.03)   # Yavaş okuyucu (GUI)
+    print(f"Yayınlanan: {slot.seq}, okunan: {shown} (okuyucu hep en yenisini aldı: {slot.latest()[0]})")
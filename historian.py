@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yerel Historian (SQLite zaman serisi deposu)
+- ESP32Communication'ın her ölçümünü (cur, pow, uretimw, uretima, weight,
+  PWM, Count, Fire, Voice, Vibration) zaman damgasıyla saklar
+- Okuma thread'i sadece bellekteki kuyruğa ekler; yazma ayrı thread'de,
+  toplu halde (batch başına tek transaction, WAL modu)
+- Dakikalık özet tablosu (zaman kovası indeksi) uzun aralık sorgularını hızlandırır
+- Saklama süresi dolan kayıtlar periyodik olarak silinir
+- Sorgu: history.range('power', t0, t1, bucket='1s') → numpy ile kovalanmış mean/min/max
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+from collections import deque
+from threading import Thread, Lock, Event
+
+import numpy as np
+
+from config import (HISTORIAN_DB_PATH, HISTORIAN_BATCH_SIZE, HISTORIAN_FLUSH_INTERVAL,
+                    HISTORIAN_QUEUE_SIZE, HISTORIAN_RETENTION_DAYS, HISTORIAN_PRUNE_INTERVAL)
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_MS = 60000  # Özet tablosu kova genişliği (1 dakika)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS streams (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    stream_id INTEGER NOT NULL,
+    ts_ms INTEGER NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_samples_stream_ts ON samples (stream_id, ts_ms);
+CREATE TABLE IF NOT EXISTS rollup_1m (
+    stream_id INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    total REAL NOT NULL,
+    vmin REAL NOT NULL,
+    vmax REAL NOT NULL,
+    PRIMARY KEY (stream_id, bucket)
+);
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO rollup_1m (stream_id, bucket, n, total, vmin, vmax) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (stream_id, bucket) DO UPDATE SET
+    n = n + excluded.n,
+    total = total + excluded.total,
+    vmin = MIN(vmin, excluded.vmin),
+    vmax = MAX(vmax, excluded.vmax)
+"""
+
+_BUCKET_UNITS = {'ms': 1, 's': 1000, 'm': 60000, 'h': 3600000}
+
+
+def parse_bucket(bucket):
+    """'500ms', '1s', '5m', '1h' ya da saniye (sayı) → milisaniye"""
+    if isinstance(bucket, (int, float)):
+        return max(1, int(bucket * 1000))
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)\s*', str(bucket))
+    if not match:
+        raise ValueError(f"Geçersiz kova: {bucket!r}")
+    return max(1, int(float(match.group(1)) * _BUCKET_UNITS[match.group(2)]))
+
+
+def _open(path):
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class Historian:
+    """ESP32 ölçümlerini SQLite'a toplu yazan arka plan deposu"""
+
+    def __init__(self, path=HISTORIAN_DB_PATH, batch_size=HISTORIAN_BATCH_SIZE,
+                 flush_interval=HISTORIAN_FLUSH_INTERVAL, queue_size=HISTORIAN_QUEUE_SIZE,
+                 retention_days=HISTORIAN_RETENTION_DAYS, prune_interval=HISTORIAN_PRUNE_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.prune_interval = prune_interval
+
+        # deque.append thread-safe ve ucuz - okuma thread'i beklemez
+        self.buffer = deque(maxlen=queue_size)
+        self.wake_event = Event()
+        self.running = False
+        self.thread = None
+
+        self.stream_ids = {}
+        self.stats_lock = Lock()
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.last_batch_ms = 0.0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = _open(path)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    # --- Yazma ---
+
+    def on_sample(self, msg_type, value, ts):
+        """ESP32Communication dinleyicisi - sadece kuyruğa ekler"""
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append((msg_type, ts, value))
+        if len(self.buffer) >= self.batch_size:
+            self.wake_event.set()
+
+    def record(self, stream, value, ts=None):
+        """Elle ölçüm ekle (ESP32 dışı kaynaklar için)"""
+        self.on_sample(stream, value, time.time() if ts is None else ts)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+        logger.info(f"✅ Historian başladı: {self.path}")
+
+    def stop(self, timeout=5):
+        """Yazıcıyı durdur - kuyrukta kalan ölçümler yazılır"""
+        if not self.running:
+            return
+        self.running = False
+        self.wake_event.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            self.thread = None
+        logger.info(f"⏹ Historian durdu ({self.written} ölçüm yazıldı, {self.dropped} atıldı)")
+
+    def _stream_id(self, conn, name):
+        stream_id = self.stream_ids.get(name)
+        if stream_id is None:
+            conn.execute("INSERT OR IGNORE INTO streams (name) VALUES (?)", (name,))
+            stream_id = conn.execute("SELECT id FROM streams WHERE name = ?", (name,)).fetchone()[0]
+            self.stream_ids[name] = stream_id
+        return stream_id
+
+    def _writer_loop(self):
+        conn = _open(self.path)
+        last_prune = 0.0
+        try:
+            while self.running or self.buffer:
+                if self.running:
+                    self.wake_event.wait(self.flush_interval)
+                    self.wake_event.clear()
+
+                while self.buffer:
+                    try:
+                        self._write_batch(conn)
+                    except sqlite3.Error as e:
+                        logger.error(f"❌ Historian yazma hatası: {e}")
+                        break
+
+                if self.retention_days and time.monotonic() - last_prune >= self.prune_interval:
+                    last_prune = time.monotonic()
+                    self.prune(conn)
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn):
+        """Kuyruktan en fazla batch_size ölçüm al, tek transaction'da yaz"""
+        batch = []
+        popleft = self.buffer.popleft
+        try:
+            for _ in range(self.batch_size):
+                batch.append(popleft())
+        except IndexError:
+            pass
+        if not batch:
+            return
+
+        t0 = time.perf_counter()
+        rows = []
+        rollup = {}
+        with conn:
+            for name, ts, value in batch:
+                # Olay mesajları (Count, Fire...) 1.0 olarak saklanır
+                value = 1.0 if value is None else float(value)
+                stream_id = self._stream_id(conn, name)
+                ts_ms = int(ts * 1000)
+                rows.append((stream_id, ts_ms, value))
+
+                key = (stream_id, ts_ms // ROLLUP_MS)
+                agg = rollup.get(key)
+                if agg is None:
+                    rollup[key] = [1, value, value, value]
+                else:
+                    agg[0] += 1
+                    agg[1] += value
+                    if value < agg[2]:
+                        agg[2] = value
+                    if value > agg[3]:
+                        agg[3] = value
+
+            conn.executemany("INSERT INTO samples (stream_id, ts_ms, value) VALUES (?, ?, ?)", rows)
+            conn.executemany(UPSERT_ROLLUP, [(sid, bucket, n, total, vmin, vmax)
+                                             for (sid, bucket), (n, total, vmin, vmax) in rollup.items()])
+
+        with self.stats_lock:
+            self.written += len(rows)
+            self.batches += 1
+            self.last_batch_ms = (time.perf_counter() - t0) * 1000
+
+    def prune(self, conn=None):
+        """Saklama süresi dolan ölçümleri sil"""
+        own = conn is None
+        conn = conn or _open(self.path)
+        try:
+            cutoff_ms = int((time.time() - self.retention_days * 86400) * 1000)
+            with conn:
+                deleted = conn.execute("DELETE FROM samples WHERE ts_ms < ?", (cutoff_ms,)).rowcount
+                conn.execute("DELETE FROM rollup_1m WHERE bucket < ?", (cutoff_ms // ROLLUP_MS,))
+            if deleted:
+                logger.info(f"🧹 Historian: {deleted} eski ölçüm silindi")
+            return deleted
+        finally:
+            if own:
+                conn.close()
+
+    def get_stats(self):
+        with self.stats_lock:
+            return {
+                'written': self.written,
+                'dropped': self.dropped,
+                'pending': len(self.buffer),
+                'batches': self.batches,
+                'last_batch_ms': self.last_batch_ms
+            }
+
+    # --- Sorgu ---
+
+    def streams(self):
+        """Kayıtlı akış isimleri"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            return [row[0] for row in conn.execute("SELECT name FROM streams ORDER BY name")]
+        finally:
+            conn.close()
+
+    def range(self, stream, t0, t1, bucket=None):
+        """
+        [t0, t1) aralığındaki ölçümler (t0/t1: time.time() saniyesi).
+        bucket=None → {'ts', 'value'}
+        bucket='1s' vb. → {'ts', 'mean', 'min', 'max', 'count'} (ts = kova başlangıcı)
+        Dakikanın katı kovalar özet tablosundan okunur (t1'in yarım dakikası ham ölçümlerden).
+        """
+        t0_ms, t1_ms = int(t0 * 1000), int(t1 * 1000)
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            row = conn.execute("SELECT id FROM streams WHERE name = ?", (stream,)).fetchone()
+            if row is None:
+                return self._empty(bucket)
+            stream_id = row[0]
+
+            if bucket is None:
+                data = conn.execute(
+                    "SELECT ts_ms, value FROM samples WHERE stream_id = ? AND ts_ms >= ? AND ts_ms < ? "
+                    "ORDER BY ts_ms", (stream_id, t0_ms, t1_ms)).fetchall()
+                arr = np.array(data, dtype=np.float64).reshape(-1, 2)
+                return {'ts': arr[:, 0] / 1000.0, 'value': arr[:, 1]}
+
+            bucket_ms = parse_bucket(bucket)
+            if bucket_ms % ROLLUP_MS == 0 and t0_ms % ROLLUP_MS == 0:
+                # Tam dakikalar özetten; t1'in içinde kaldığı yarım dakika ham ölçümlerden
+                edge_ms = max(t0_ms, t1_ms // ROLLUP_MS * ROLLUP_MS)
+                data = conn.execute(
+                    "SELECT bucket * ?, n, total, vmin, vmax FROM rollup_1m "
+                    "WHERE stream_id = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+                    (ROLLUP_MS, stream_id, t0_ms // ROLLUP_MS, edge_ms // ROLLUP_MS)).fetchall()
+                data += conn.execute(
+                    "SELECT ts_ms, 1, value, value, value FROM samples "
+                    "WHERE stream_id = ? AND ts_ms >= ? AND ts_ms < ? ORDER BY ts_ms",
+                    (stream_id, edge_ms, t1_ms)).fetchall()
+                arr = np.array(data, dtype=np.float64).reshape(-1, 5)
+                keys = arr[:, 0].astype(np.int64) // bucket_ms
+                return self._reduce(keys, bucket_ms, arr[:, 1], arr[:, 2], arr[:, 3], arr[:, 4])
+
+            data = conn.execute(
+                "SELECT ts_ms, value FROM samples WHERE stream_id = ? AND ts_ms >= ? AND ts_ms < ? "
+                "ORDER BY ts_ms", (stream_id, t0_ms, t1_ms)).fetchall()
+        finally:
+            conn.close()
+
+        arr = np.array(data, dtype=np.float64).reshape(-1, 2)
+        values = arr[:, 1]
+        keys = arr[:, 0].astype(np.int64) // bucket_ms
+        return self._reduce(keys, bucket_ms, np.ones(len(values)), values, values, values)
+
+    @staticmethod
+    def _reduce(keys, bucket_ms, counts, totals, mins, maxs):
+        """Sıralı kova anahtarlarına göre vektörel toplama"""
+        if len(keys) == 0:
+            return Historian._empty(True)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        n = np.add.reduceat(counts, starts)
+        return {
+            'ts': keys[starts] * bucket_ms / 1000.0,
+            'mean': np.add.reduceat(totals, starts) / n,
+            'min': np.minimum.reduceat(mins, starts),
+            'max': np.maximum.reduceat(maxs, starts),
+            'count': n.astype(np.int64)
+        }
+
+    @staticmethod
+    def _empty(bucket):
+        if bucket is None:
+            return {'ts': np.empty(0), 'value': np.empty(0)}
+        return {'ts': np.empty(0), 'mean': np.empty(0), 'min': np.empty(0),
+                'max': np.empty(0), 'count': np.empty(0, dtype=np.int64)}
+
+
+# Test
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    import tempfile
+
+    history = Historian(os.path.join(tempfile.mkdtemp(), 'historian.db'))
+    history.start()
+
+    now = time.time()
+    start = time.perf_counter()
+    for i in range(100000):
+        history.on_sample('power', 50 + (i % 20), now - 100 + i * 0.001)
+    print(f"Ekleme: {(time.perf_counter() - start) * 1e6 / 100000:.2f} µs/ölçüm")
+
+    history.stop()
+    print(history.get_stats())
+
+    result = history.range('power', now - 100, now, bucket='10s')
+    for ts, mean, count in zip(result['ts'], result['mean'], result['count']):
+        print(f"{time.strftime('%H:%M:%S', time.localtime(ts))}  mean={mean:.2f}  n={count}")
@@ -6,7 +6,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import RPi.GPIO as GPIO
 import logging
-import requests
+import queue
 from threading import Thread
 import time
 
@@ -27,6 +27,16 @@ from module_weight import WeightModule
 from module_conveyor import ConveyorModule
 from module_ocr import OCRModule
 from module_metal import MetalModule
+from camera_service import shutdown_cameras
+from api_client import get_client, is_local_session_id
+from api_uploader import APIUploader
+from session_pipeline import SessionStarter
+from offline_session import OfflineSessionStore, OfflineReconciler
+from session_sync import SessionSynchronizer, SessionStateEvent
+from historian import Historian
+from shm_ring import ShmRingWriter
+from session_archive import SessionArchiveWriter
+from event_journal import EventJournal
 
 from config import *
 
@@ -51,6 +61,29 @@ class MainGUI:
         
         # Donanım bağlantıları
         self.esp32 = ESP32Communication(UART_PORT, UART_BAUDRATE)
+        
+        # Tüm ham ölçümler yerel historian'a (yazma ayrı thread'de)
+        self.historian = None
+        if HISTORIAN_ENABLED:
+            self.historian = Historian()
+            self.historian.start()
+            self.esp32.add_sample_listener(self.historian.on_sample)
+        
+        # Canlı ölçümler diğer yerel süreçler için paylaşımlı bellekte
+        self.shm_ring = None
+        if SHM_RING_ENABLED:
+            try:
+                self.shm_ring = ShmRingWriter()
+                self.esp32.add_sample_listener(self.shm_ring.on_sample)
+            except OSError as e:
+                logger.warning(f"⚠️ Paylaşımlı halka tampon açılamadı: {e}")
+        
+        # Session ölçümleri sütunlu arşive (session başlayınca açılır)
+        self.archive = None
+        if ARCHIVE_ENABLED:
+            self.archive = SessionArchiveWriter()
+            self.esp32.add_sample_listener(self.archive.on_sample)
+        
         self.esp32.start_reading()
         
         self.nfc = NFCReader()
@@ -69,6 +102,36 @@ class MainGUI:
             'metal': MetalModule(self.esp32)
         }
         
+        # Session ve sayaçlar için çökmeye dayanıklı günlük (yeniden başlatmada sürdürülür)
+        self.journal = None
+        if JOURNAL_ENABLED:
+            self.journal = EventJournal()
+            for name in ('conveyor', 'metal', 'color', 'weight'):
+                self.modules[name].journal = self.journal
+        
+        # Asenkron API gönderici - modüllerin olay POST'ları kuyruğa bırakılır
+        self.api = get_client()
+        self.uploader = APIUploader()
+        self.uploader.start()
+        self.api.uploader = self.uploader
+        
+        # NFC → session hazır hattı (GUI thread'ini bloklamaz)
+        self.session_starter = SessionStarter(self.api)
+        
+        # Session durum eşitleyici - sunucuda kapanan session'ı fark eder
+        self.session_events = queue.Queue()
+        self.session_sync = SessionSynchronizer(self.api, self.session_events)
+        self.session_sync.start()
+        
+        # Offline session: API yokken yerel session, bağlantı gelince eşitleme
+        self.offline_store = None
+        self.reconciler = None
+        if OFFLINE_SESSION_ENABLED:
+            self.offline_store = OfflineSessionStore()
+            self.api.offline_store = self.offline_store
+            self.reconciler = OfflineReconciler(self.offline_store, self.api, self.session_starter,
+                                                can_reconcile=self._can_reconcile)
+        
         # Session yönetimi
         self.current_session_id = None
         self.current_card_id = None
@@ -81,6 +144,14 @@ class MainGUI:
         # GUI oluştur
         self.create_gui()
         
+        # Yarım kalan session sürdürülür; eşitleyici ondan sonra (açık offline session eşitlenmesin)
+        self._resume_from_journal()
+        if self.reconciler:
+            self.reconciler.start()
+        
+        self.root.after(250, self._process_session_events)
+        self.root.after(1000, self.update_throttle_stats)
+        
         logger.info("Ana sistem başlatıldı")
     
     def setup_gpio(self):
@@ -202,6 +273,12 @@ class MainGUI:
                                      bg='#34495e', fg='#95a5a6')
         self.card_id_label.pack(pady=1)
         
+        # API hız sınırı durumu
+        self.throttle_label = tk.Label(menu, text="🚦 API sınırı: -", 
+                                      font=("Arial", 7),
+                                      bg='#34495e', fg='#95a5a6')
+        self.throttle_label.pack(pady=1)
+        
         tk.Frame(menu, bg='#7f8c8d', height=1).pack(fill=tk.X, pady=5)
         
         # Modül butonları
@@ -534,8 +611,9 @@ class MainGUI:
                                             bg='#ecf0f1', fg='#e74c3c')
         self.color_selected_label.pack(side=tk.BOTTOM, fill=tk.X, pady=10)
         
+        # Algılama thread'inden çağrılır - Tk güncellemesi ana thread'e aktarılır
         def update_count(count):
-            self.color_count_label.config(text=str(count))
+            self.root.after(0, lambda: self.color_count_label.config(text=str(count)))
         
         self.modules['color'].on_count_update = update_count
         
@@ -809,23 +887,20 @@ class MainGUI:
             self.card_id_label.config(text=f"Kart ID: {card_id}")
             self.buzzer_beep(duration=0.1, repeat=2)
             
-            # Session yoksa başlat
-            if not self.session_active:
-                success = self.start_session(card_id)
-                
-                # ❌ Session başlatılamadıysa, kart hafızasını temizle ve yeniden oku
-                if not success:
-                    logger.info("🔄 Kart hafızası temizleniyor, tekrar okuma için hazır...")
-                    time.sleep(0.5)
-                    
-                    # NFC hafızasını temizle
-                    self.nfc.last_card_id = ""
-                    self.nfc.current_card_id = ""
-                    self.nfc.card_present = False
-                    self.current_card_id = None
-                    self.card_id_label.config(text="Kart ID: -")
-                    
-                    logger.info("✅ Hafıza temizlendi. Kartı tekrar okutabilirsiniz.")
+            # Offline eşitleme sürüyorsa başlatma sıraya alınır (eşitleme bitince çalışır)
+            if self.session_starter.is_claimed() and not self.session_active:
+                if not self.start_session(card_id):
+                    self._reset_card_after_failure()
+            
+            # Session başlatma sürüyorsa yeni okutmayı yok say (kart tekrar okutulabilsin)
+            elif self.session_starter.is_busy():
+                logger.info("ℹ️ Session başlatma sürüyor, kart okutması yok sayıldı")
+                self._reset_card_after_failure()
+            
+            # Session yoksa başlat (sonuç _on_session_started'a gelir)
+            elif not self.session_active:
+                if not self.start_session(card_id):
+                    self._reset_card_after_failure()
                 
             else:
                 logger.info(f"ℹ️ Session zaten aktif (ID: {self.current_session_id})")
@@ -842,138 +917,240 @@ class MainGUI:
             except:
                 pass
     
+    def _reset_card_after_failure(self):
+        """Session başlatılamadıysa kart hafızasını temizle ve yeniden okumaya hazırla"""
+        logger.info("🔄 Kart hafızası temizleniyor, tekrar okuma için hazır...")
+        
+        # NFC hafızasını temizle
+        self.nfc.last_card_id = ""
+        self.nfc.current_card_id = ""
+        self.nfc.card_present = False
+        self.current_card_id = None
+        self.card_id_label.config(text="Kart ID: -")
+        
+        logger.info("✅ Hafıza temizlendi. Kartı tekrar okutabilirsiniz.")
+    
+    def _can_reconcile(self, wc_id):
+        """Offline session eşitlemesi şimdi yapılabilir mi? (canlı session'ı kapatmamak için)"""
+        if self.session_starter.is_busy():
+            return False
+        return not (self.session_active and WC_IDS.get(self.active_module_name, 0) == wc_id)
+    
     def start_session(self, card_id):
-        """Session başlat - STRICT versiyon"""
-        try:
-            # Modül kontrolü
-            if not self.active_module_name or self.active_module_name == 'home':
-                logger.error("❌ Önce bir modül seçin!")
-                messagebox.showerror("Hata", "Önce bir modül seçmelisiniz!")
-                return False
-            
-            # WC_ID al
-            wc_id = WC_IDS.get(self.active_module_name, 0)
-            if wc_id == 0:
-                logger.error(f"❌ Modül için wc_id bulunamadı: {self.active_module_name}")
-                messagebox.showerror("Hata", f"Modül WC_ID bulunamadı!")
-                return False
-            
-            # API Request - Session başlat
-            url = API_ENDPOINTS['session_start']
-            headers = {"apiKey": API_KEY}
-            params = {
-                "card_uid": card_id,
-                "wc_id": wc_id
-            }
-            
-            logger.info(f"📤 Session başlatılıyor: card={card_id}, wc_id={wc_id}")
-            
-            response = requests.post(url, params=params, headers=headers, timeout=10)
-            
-            logger.debug(f"📥 Response Status: {response.status_code}")
-            
-            if response.status_code not in [200, 201, 501]:
-                logger.error(f"❌ Session başlatılamadı: HTTP {response.status_code}")
-                messagebox.showerror("Hata", 
-                    f"Session başlatılamadı!\nHTTP {response.status_code}\n\nLütfen API bağlantısını kontrol edin.")
-                return False
-            
-            # ✅ Session başarıyla başladı, şimdi ID'yi almayı dene
-            logger.info("⏳ API'nin session'ı kaydetmesi bekleniyor...")
-            time.sleep(1.5)  # API'ye kaydetme zamanı ver
-            
-            # Session ID'yi al - KRİTİK NOKTA
-            if not self.get_session_id(wc_id):
-                logger.error("❌ Session başladı ama ID alınamadı!")
-                messagebox.showerror("Kritik Hata", 
-                    "Session başlatıldı ancak Session ID alınamadı!\n\n"
-                    "Sistem başlatılamıyor. Lütfen tekrar deneyin.")
-                
-                # Session'ı kapat çünkü ID alamadık
-                try:
-                    requests.post(API_ENDPOINTS['session_end'], 
-                                params={"session_id": 0}, 
-                                headers=headers, timeout=5)
-                except:
-                    pass
-                
-                return False
-            
+        """Session başlat - API çağrıları arka planda, sonuç _on_session_started'a gelir"""
+        # Modül kontrolü
+        if not self.active_module_name or self.active_module_name == 'home':
+            logger.error("❌ Önce bir modül seçin!")
+            messagebox.showerror("Hata", "Önce bir modül seçmelisiniz!")
+            return False
+        
+        # WC_ID al
+        wc_id = WC_IDS.get(self.active_module_name, 0)
+        if wc_id == 0:
+            logger.error(f"❌ Modül için wc_id bulunamadı: {self.active_module_name}")
+            messagebox.showerror("Hata", f"Modül WC_ID bulunamadı!")
+            return False
+        
+        # Worker thread sonucu Tk thread'ine root.after ile aktarır
+        def on_done(result):
+            self.root.after(0, self._on_session_started, card_id, wc_id, result)
+        
+        if not self.session_starter.start(card_id, wc_id, on_done):
+            return False
+        
+        self.session_label.config(text="⏳ Session başlatılıyor...", fg='#f39c12')
+        return True
+    
+    def _on_session_started(self, card_id, wc_id, result):
+        """Session başlatma sonucu (Tk thread'inde)"""
+        # Bu arada modül değiştiyse session başka bir wc_id'ye ait - kapat
+        if result.ok and WC_IDS.get(self.active_module_name, 0) != wc_id:
+            logger.warning(f"⚠️ Modül değişti, session kapatılıyor: ID={result.session_id}")
+            Thread(target=self.api.end_session, args=(result.session_id,), daemon=True).start()
+            self.session_label.config(text="❌ Session Yok", fg='#e74c3c')
+            self._reset_card_after_failure()
+            return
+        
+        if result.ok:
             # ✅ HER İKİSİ DE BAŞARILI - Session aktif
+            self.current_session_id = result.session_id
             self.session_active = True
             self.session_label.config(text=f"✅ Session: {self.current_session_id}", fg='#27ae60')
+            self.session_sync.watch(wc_id, self.current_session_id)
+            if self.archive:
+                self.archive.begin(self.current_session_id, wc_id, card_id)
+            if self.journal:
+                self.journal.begin_session(self.active_module_name, self.current_session_id, wc_id, card_id)
             logger.info(f"✅ Session TAMAMEN başarılı: ID={self.current_session_id}, WC={wc_id}, Kart={card_id}")
+            return
+        
+        # API'ye hiç ulaşılamadıysa yerel session ile devam et
+        if not result.started and result.status is None and self.offline_store:
+            self.current_session_id = self.offline_store.open_session(card_id, wc_id)
+            self.session_active = True
+            self.session_label.config(text=f"📴 Offline Session: {self.current_session_id}", fg='#f39c12')
+            if self.archive:
+                self.archive.begin(self.current_session_id, wc_id, card_id)
+            if self.journal:
+                self.journal.begin_session(self.active_module_name, self.current_session_id, wc_id, card_id)
+            logger.warning(f"📴 API erişilemiyor ({result.error}), offline session ile devam: "
+                           f"ID={self.current_session_id}, WC={wc_id}, Kart={card_id}")
+            return
+        
+        self.session_label.config(text="❌ Session Yok", fg='#e74c3c')
+        
+        if result.started:
+            logger.error("❌ Session başladı ama ID alınamadı!")
+            messagebox.showerror("Kritik Hata", 
+                "Session başlatıldı ancak Session ID alınamadı!\n\n"
+                "Sistem başlatılamıyor. Lütfen tekrar deneyin.")
             
-            return True
-                    
-        except requests.exceptions.Timeout:
-            logger.error("❌ Session başlatma timeout!")
-            messagebox.showerror("Timeout", "API'ye bağlanılamadı (timeout)!")
-            return False
+            # Session'ı kapat çünkü ID alamadık
+            Thread(target=self.api.end_session, args=(0,), daemon=True).start()
+        elif result.status is None:
+            logger.error(f"❌ Session başlatılamadı: {result.error}")
+            messagebox.showerror("Timeout", f"API'ye bağlanılamadı ({result.error})!")
+        else:
+            logger.error(f"❌ Session başlatılamadı: HTTP {result.status}")
+            messagebox.showerror("Hata", 
+                f"Session başlatılamadı!\nHTTP {result.status}\n\nLütfen API bağlantısını kontrol edin.")
+        
+        self._reset_card_after_failure()
+    
+    def _resume_from_journal(self):
+        """Yeniden başlatmadan önce açık kalan session'ı yeni kart okutmadan sürdür"""
+        if not self.journal:
+            return
+        session, states = self.journal.recover()
+        if session is None:
+            return
+        
+        module_name = session['module']
+        session_id = session['session_id']
+        if module_name not in self.modules or (
+                is_local_session_id(session_id) and not (self.offline_store and self.offline_store.reopen_session(session_id))):
+            logger.warning(f"⚠️ Journal'daki session sürdürülemiyor: {session}")
+            self.journal.end_session()
+            return
+        
+        logger.info(f"♻️ Session sürdürülüyor: ID={session_id}, modül={module_name}, Kart={session['card_uid']}")
+        self.switch_module(module_name)
+        self.current_session_id = session_id
+        self.current_card_id = session['card_uid']
+        self.session_active = True
+        self.card_id_label.config(text=f"Kart ID: {self.current_card_id}")
+        
+        if is_local_session_id(session_id):
+            self.session_label.config(text=f"📴 Offline Session: {session_id}", fg='#f39c12')
+        else:
+            # Sunucuda bu arada kapandıysa eşitleyici bildirir
+            self.session_label.config(text=f"✅ Session: {session_id}", fg='#27ae60')
+            self.session_sync.watch(session['wc_id'], session_id)
+        if self.archive:
+            self.archive.begin(session_id, session['wc_id'], session['card_uid'])
+        
+        # Sayaçlar modül başlarken verilir: başlatma sıfırları journal'a hiç yazılmaz
+        module = self.modules[module_name]
+        state = states.get(module_name, {})
+        if state.get('running'):
+            self.start_current_module(state=state)
+        elif state and hasattr(module, 'restore_state'):
+            module.restore_state(state)
+    
+    def update_throttle_stats(self):
+        """Hız sınırı sayaçlarını menüde göster (1 sn'de bir)"""
+        totals = self.api.rate_limiter.get_stats()['totals']
+        if totals['aggregated'] or totals['dropped']:
+            self.throttle_label.config(
+                text=f"🚦 Birleşik: {totals['aggregated']} | Atılan: {totals['dropped']}",
+                fg='#f39c12')
+        else:
+            self.throttle_label.config(text="🚦 API sınırı: -", fg='#95a5a6')
+        
+        self.root.after(1000, self.update_throttle_stats)
+    
+    def _process_session_events(self):
+        """Session eşitleyici olaylarını işle (Tk thread'inde, 250 ms'de bir)"""
+        try:
+            while True:
+                self._on_session_state_event(self.session_events.get_nowait())
+        except queue.Empty:
+            pass
         except Exception as e:
-            logger.error(f"❌ Session error: {e}")
-            messagebox.showerror("Hata", f"Session başlatılamadı:\n{str(e)}")
-            import traceback
-            traceback.print_exc()
-            return False
+            logger.error(f"❌ Session olayı işlenemedi: {e}")
+        
+        self.root.after(250, self._process_session_events)
+    
+    def _on_session_state_event(self, event):
+        """Sunucu tarafındaki session değişikliğini uygula"""
+        is_current = self.session_active and self.current_session_id == event.session_id
+        
+        if event.kind == SessionStateEvent.UNREACHABLE:
+            logger.warning("⚠️ API erişilemiyor, session durumu doğrulanamıyor")
+            if is_current:
+                self.session_label.config(text=f"⚠️ Session: {self.current_session_id} (API yok)", fg='#f39c12')
+            return
+        
+        if event.kind == SessionStateEvent.REACHABLE:
+            logger.info("✅ API tekrar erişilebilir")
+            if is_current:
+                self.session_label.config(text=f"✅ Session: {self.current_session_id}", fg='#27ae60')
+            return
+        
+        if not is_current:
+            return
+        
+        if event.kind == SessionStateEvent.REPLACED:
+            reason = f"Bu istasyonda başka bir session açıldı (ID: {event.server_session_id})."
+        else:
+            reason = "Session sunucu tarafında sonlandırıldı."
+        logger.warning(f"⚠️ {reason} Yerel session kapatılıyor: ID={event.session_id}")
+        
+        # Sunucuda zaten kapalı - endSession gönderilmeden local state temizlenir
+        if self.archive:
+            self.archive.end()
+        if self.journal:
+            self.journal.end_session()
+        self.session_active = False
+        self.current_session_id = None
+        if self.active_module:
+            self.stop_current_module()
+        
+        self.session_starter.forget(event.wc_id, event.session_id)
+        self.session_label.config(text="❌ Session Yok", fg='#e74c3c')
+        self._reset_card_after_failure()
+        
+        messagebox.showwarning("Session Kapandı", f"{reason}\n\nDevam etmek için kartı tekrar okutun.")
     
     def get_session_id(self, wc_id=None):
         """API'den session ID al - STRICT versiyon + NFC Cleanup"""
-        response = None
+        if wc_id is None:
+            wc_id = WC_IDS.get(self.active_module_name, 0)
         
-        try:
-            if wc_id is None:
-                wc_id = WC_IDS.get(self.active_module_name, 0)
-            
-            headers = {'apiKey': API_KEY, 'Accept': 'application/json'}
-            params = {'wcId': wc_id}
-            
-            logger.info(f"📤 Session ID isteniyor: wc_id={wc_id}")
-            
-            response = requests.get(
-                API_ENDPOINTS['session_id'], 
-                params=params, 
-                headers=headers, 
-                timeout=10
-            )
-            
-            logger.debug(f"📥 Status: {response.status_code}, Body: '{response.text}'")
-            
-            if response.status_code != 200:
-                logger.error(f"❌ Session ID API hatası: HTTP {response.status_code}")
-                # 🔑 NFC hafızasını temizle
-                self._cleanup_nfc_memory()
-                return False
-            
-            # API direkt integer döndürüyor
-            session_id = int(response.json())
-            
-            if session_id <= 0:
-                logger.error(f"❌ Geçersiz Session ID: {session_id}")
-                # 🔑 NFC hafızasını temizle
-                self._cleanup_nfc_memory()
-                return False
-            
-            # ✅ Geçerli ID alındı
-            self.current_session_id = session_id
-            logger.info(f"✅ Session ID alındı: {self.current_session_id}")
-            return True
-                    
-        except ValueError as e:
-            logger.error(f"❌ Session ID parse hatası: {e}")
-            if response:
-                logger.error(f"Response: '{response.text}'")
+        logger.info(f"📤 Session ID isteniyor: wc_id={wc_id}")
+        
+        # API direkt integer döndürüyor
+        result = self.api.get_current_session_id(wc_id)
+        
+        if not result.ok:
+            logger.error(f"❌ Session ID API hatası: {result.error or f'HTTP {result.status}'}")
             # 🔑 NFC hafızasını temizle
             self._cleanup_nfc_memory()
             return False
-        except Exception as e:
-            logger.error(f"❌ Session ID hatası: {type(e).__name__}: {e}")
-            if response:
-                logger.error(f"Response: '{response.text}'")
+        
+        session_id = result.data
+        
+        if session_id <= 0:
+            logger.error(f"❌ Geçersiz Session ID: {session_id}")
             # 🔑 NFC hafızasını temizle
             self._cleanup_nfc_memory()
             return False
         
+        # ✅ Geçerli ID alındı
+        self.current_session_id = session_id
+        logger.info(f"✅ Session ID alındı: {self.current_session_id}")
+        return True
+        
     def _cleanup_nfc_memory(self):
         """NFC hafızasını temizle - Yardımcı metod"""
         try:
@@ -1002,6 +1179,13 @@ class MainGUI:
                 
                 return True
             
+            # Aktif session'ın takibi, arşivi ve journal kaydı kapanır (her çıkış yolu local state'i temizler)
+            self.session_sync.unwatch()
+            if self.archive:
+                self.archive.end()
+            if self.journal:
+                self.journal.end_session()
+            
             if not self.current_session_id or self.current_session_id == 0:
                 logger.warning("⚠️ Session ID yok, direkt kapatılıyor")
                 # ✅ State'i temizle
@@ -1017,16 +1201,34 @@ class MainGUI:
                 
                 return True
             
-            url = API_ENDPOINTS['session_end']
-            headers = {"apiKey": API_KEY}
-            params = {"session_id": self.current_session_id}
+            # Offline session: API çağrısı yok, kapatılır ve eşitleme kuyruğuna girer
+            if is_local_session_id(self.current_session_id):
+                self.offline_store.close_session(self.current_session_id)
+                self.reconciler.wake()
+                
+                self.session_active = False
+                self.current_session_id = None
+                self.current_card_id = None
+                self.session_label.config(text="❌ Session Yok", fg='#e74c3c')
+                self.card_id_label.config(text="Kart ID: -")
+                
+                # 🔑 NFC hafızasını da temizle
+                self.nfc.last_card_id = ""
+                self.nfc.current_card_id = ""
+                self.nfc.card_present = False
+                
+                logger.info("✅ Offline session sonlandırıldı (eşitleme bekliyor)")
+                return True
             
             logger.info(f"📤 Session sonlandırılıyor: ID={self.current_session_id}")
-            response = requests.post(url, params=params, headers=headers, timeout=10)
+            result = self.api.end_session(self.current_session_id)
             
-            logger.debug(f"📥 End Session Status: {response.status_code}")
+            logger.debug(f"📥 End Session Status: {result.status} ({result.elapsed * 1000:.0f} ms)")
             
-            if response.status_code in [200, 201, 501]:
+            if result.ok:
+                # Kapanan ID bir sonraki başlatmada yeni session sanılmasın
+                self.session_starter.forget(WC_IDS.get(self.active_module_name, 0), self.current_session_id)
+                
                 # ✅ State'i TAMAMEN temizle
                 self.session_active = False
                 self.current_session_id = None
@@ -1042,9 +1244,9 @@ class MainGUI:
                 logger.info("✅ Session sonlandırıldı")
                 return True
             else:
-                logger.error(f"❌ Session sonlandırma hatası: {response.status_code}")
+                logger.error(f"❌ Session sonlandırma hatası: {result.error or result.status}")
                 
-                # 🎯 API hatası olsa bile local state'i temizle
+                # 🎯 API hatası / timeout olsa bile local state'i temizle
                 self.session_active = False
                 self.current_session_id = None
                 self.current_card_id = None
@@ -1055,25 +1257,11 @@ class MainGUI:
                 self.nfc.current_card_id = ""
                 self.nfc.card_present = False
                 
-                messagebox.showerror("Hata", 
-                                f"Session sonlandırılamadı!\nHTTP {response.status_code}\n\nLocal state temizlendi.")
+                if result.status is not None:
+                    messagebox.showerror("Hata", 
+                                    f"Session sonlandırılamadı!\nHTTP {result.status}\n\nLocal state temizlendi.")
                 return False
                 
-        except requests.exceptions.Timeout:
-            logger.error("❌ Session end timeout")
-            
-            # 🎯 Timeout olsa bile local state'i temizle
-            self.session_active = False
-            self.current_session_id = None
-            self.current_card_id = None
-            self.session_label.config(text="❌ Session Yok", fg='#e74c3c')
-            
-            # 🔑 NFC hafızasını da temizle
-            self.nfc.last_card_id = ""
-            self.nfc.current_card_id = ""
-            self.nfc.card_present = False
-            
-            return False
         except Exception as e:
             logger.error(f"❌ Session end error: {e}")
             
@@ -1090,8 +1278,8 @@ class MainGUI:
             
             return False
     
-    def start_current_module(self):
-        """Aktif modülü başlat - STRICT versiyon + OCR özel durum"""
+    def start_current_module(self, state=None):
+        """Aktif modülü başlat - STRICT versiyon + OCR özel durum (state: journal'dan sürdürülen sayaçlar)"""
         
         # 📦 ÖZEL DURUM: OCR modülü session gerektirmez
         if self.active_module_name == 'ocr':
@@ -1129,7 +1317,7 @@ class MainGUI:
             return
         
         # 3️⃣ Session ID kontrolü - KRİTİK
-        if not self.current_session_id or self.current_session_id <= 0:
+        if not self.current_session_id:
             logger.error(f"❌ Session ID geçersiz: {self.current_session_id}")
             messagebox.showerror("Kritik Hata", 
                 f"Session ID geçersiz veya yok!\n\n"
@@ -1161,7 +1349,9 @@ class MainGUI:
         logger.info(f"   Session ID: {self.current_session_id}")
         logger.info(f"   Kart ID: {self.current_card_id}")
         
-        if module_to_start.start(session_id=self.current_session_id):
+        started = module_to_start.start(session_id=self.current_session_id, state=state) if state \
+            else module_to_start.start(session_id=self.current_session_id)
+        if started:
             self.active_module = module_to_start
             self.buzzer_beep(duration=0.1, repeat=1)
             logger.info(f"✅ {self.active_module_name.upper()} başlatıldı!")
@@ -1199,8 +1389,25 @@ class MainGUI:
                 if self.active_module:
                     self.stop_current_module()
                 
+                # Bekleyen API olaylarını gönder
+                self.session_sync.stop()
+                self.api.rate_limiter.stop()
+                if self.reconciler:
+                    self.reconciler.stop()
+                self.uploader.stop()
+                self.uploader.log_stats()
+                
                 # Donanımları kapat
                 self.esp32.close()
+                if self.historian:
+                    self.historian.stop()
+                if self.shm_ring:
+                    self.shm_ring.close()
+                if self.archive:
+                    self.archive.close()
+                if self.journal:
+                    self.journal.close()
+                shutdown_cameras()
                 self.nfc.stop_reading()
                 
                 # Buzzer'ı kapat
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yerel MES API Simülatörü (ağ gerektirmez)
+- API_ENDPOINTS'teki tüm route'lar: session start/end/currentSessionId,
+  energy, prodEvent, faultEvent, workCenter
+- Durum bellekte tutulur, Idempotency-Key tekrarları bir kez sayılır
+- Ayarlanabilir gecikme, jitter, hata oranı ve timeout enjeksiyonu
+- Gelen her istek kaydedilir (test/benchmark doğrulaması için)
+
+Kullanım:
+    python3 mock_api_server.py --port 8080 --latency 0.05 --error-rate 0.1
+    MES_API_BASE_URL=http://127.0.0.1:8080/api/v1 python3 main_gui.py
+"""
+
+import json
+import random
+import time
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock
+from urllib.parse import urlparse, parse_qs
+
+from config import API_KEY, WC_IDS
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api/v1'
+
+
+class MockMESState:
+    """Simülatörün bellekteki durumu"""
+
+    def __init__(self, session_visible_delay=0.0, start_returns_id=True):
+        self.lock = Lock()
+        self.session_visible_delay = session_visible_delay  # startSession → currentSessionId gecikmesi
+        self.start_returns_id = start_returns_id
+        self.next_session_id = 1
+        self.sessions = {}          # session_id → {'wc_id', 'card_uid', 'started', 'ended'}
+        self.active_by_wc = {}      # wc_id → session_id
+        self.energy = []
+        self.prod_events = []
+        self.fault_events = []
+        self.idempotency_keys = set()
+        self.products = {wc_id: 100 + wc_id for wc_id in WC_IDS.values() if wc_id}
+
+    def start_session(self, card_uid, wc_id):
+        with self.lock:
+            # Aynı wc_id'de açık session varsa kapat (gerçek API davranışına benzer)
+            old = self.active_by_wc.get(wc_id)
+            if old:
+                self.sessions[old]['ended'] = time.time()
+
+            session_id = self.next_session_id
+            self.next_session_id += 1
+            self.sessions[session_id] = {
+                'wc_id': wc_id,
+                'card_uid': card_uid,
+                'started': time.time(),
+                'ended': None
+            }
+            self.active_by_wc[wc_id] = session_id
+            return session_id
+
+    def end_session(self, session_id):
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if not session:
+                return False
+            session['ended'] = time.time()
+            if self.active_by_wc.get(session['wc_id']) == session_id:
+                del self.active_by_wc[session['wc_id']]
+            return True
+
+    def current_session_id(self, wc_id):
+        with self.lock:
+            session_id = self.active_by_wc.get(wc_id, 0)
+            if session_id and time.time() - self.sessions[session_id]['started'] < self.session_visible_delay:
+                return 0
+            return session_id
+
+    def add_event(self, kind, body, idempotency_key):
+        """Olayı kaydet; aynı idempotency anahtarı ikinci kez gelirse False döner"""
+        with self.lock:
+            if idempotency_key:
+                if idempotency_key in self.idempotency_keys:
+                    return False
+                self.idempotency_keys.add(idempotency_key)
+            getattr(self, kind).append(body)
+            return True
+
+    def total_quantity(self, session_id=None):
+        """prodEvent quantity toplamı (doğrulama için)"""
+        with self.lock:
+            return sum(e.get('quantity') or 0 for e in self.prod_events
+                       if session_id is None or e.get('session_id') == session_id)
+
+
+class MockMESServer:
+    """Thread içinde çalışan HTTP simülatörü"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, timeout_rate=0.0, timeout_delay=30.0,
+                 session_visible_delay=0.0, start_returns_id=True, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_delay = timeout_delay
+        self.random = random.Random(seed)
+        self.random_lock = Lock()
+
+        self.state = MockMESState(session_visible_delay, start_returns_id)
+        self.requests = []
+        self.requests_lock = Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self):
+        self.thread = Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        logger.info(f"🧪 Mock MES API: {self.base_url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        logger.info("⏹ Mock MES API durdu")
+
+    def get_requests(self, path=None):
+        """Kaydedilen istekler (path verilirse '/prodEvent' gibi filtrelenir)"""
+        with self.requests_lock:
+            return [r for r in self.requests if path is None or r['path'] == path]
+
+    def clear_requests(self):
+        with self.requests_lock:
+            self.requests.clear()
+
+    def _roll(self):
+        with self.random_lock:
+            delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+            return max(0.0, delay), self.random.random(), self.random.random()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self, method):
+                parsed = urlparse(self.path)
+                path = parsed.path[len(API_PREFIX):] if parsed.path.startswith(API_PREFIX) else parsed.path
+                params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = None
+
+                with server.requests_lock:
+                    server.requests.append({
+                        'ts': time.time(),
+                        'method': method,
+                        'path': path,
+                        'params': params,
+                        'headers': dict(self.headers),
+                        'body': body
+                    })
+
+                # Hata enjeksiyonu
+                delay, error_roll, timeout_roll = server._roll()
+                if timeout_roll < server.timeout_rate:
+                    time.sleep(server.timeout_delay)
+                elif delay:
+                    time.sleep(delay)
+                if error_roll < server.error_rate:
+                    return self._reply(503, {'error': 'injected failure'})
+
+                if self.headers.get('apiKey') != API_KEY:
+                    return self._reply(401, {'error': 'invalid apiKey'})
+
+                try:
+                    status, payload = self._route(method, path, params, body)
+                except (KeyError, TypeError, ValueError) as e:
+                    status, payload = 400, {'error': str(e)}
+                self._reply(status, payload)
+
+            def _route(self, method, path, params, body):
+                state = server.state
+                key = self.headers.get('Idempotency-Key')
+
+                if method == 'POST' and path == '/session/startSession':
+                    session_id = state.start_session(params['card_uid'], int(params['wc_id']))
+                    return 200, ({'session_id': session_id} if state.start_returns_id else {'status': 'ok'})
+
+                if method == 'POST' and path == '/session/endSession':
+                    ended = state.end_session(int(params['session_id']))
+                    return (200, {'status': 'ok'}) if ended else (404, {'error': 'session not found'})
+
+                if method == 'GET' and path == '/session/currentSessionId':
+                    # Gerçek API düz integer döndürür
+                    return 200, state.current_session_id(int(params['wcId']))
+
+                if method == 'POST' and path == '/energy':
+                    state.add_event('energy', body, key)
+                    return 200, {'status': 'ok'}
+
+                if method == 'POST' and path == '/prodEvent':
+                    added = state.add_event('prod_events', body, key)
+                    return 201, {'status': 'ok' if added else 'duplicate'}
+
+                if method == 'POST' and path == '/faultEvent':
+                    state.add_event('fault_events', body, key)
+                    return 200, {'status': 'ok'}
+
+                if method == 'GET' and path.startswith('/workCenter/'):
+                    wc_id = int(path.rsplit('/', 1)[1])
+                    return 200, {'wc_id': wc_id, 'product_id': state.products.get(wc_id, 100 + wc_id)}
+
+                return 404, {'error': f'unknown route {method} {path}'}
+
+        return Handler
+
+
+# Çalıştır
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Yerel MES API simülatörü")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='saniye')
+    parser.add_argument('--jitter', type=float, default=0.0, help='saniye (±)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='0-1 arası, HTTP 503 oranı')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='0-1 arası, cevapsız kalma oranı')
+    parser.add_argument('--timeout-delay', type=float, default=30.0, help='saniye')
+    parser.add_argument('--session-delay', type=float, default=0.0,
+                        help='startSession sonrası currentSessionId görünme gecikmesi (saniye)')
+    parser.add_argument('--no-start-id', action='store_true',
+                        help="startSession cevabında session_id döndürme")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    server = MockMESServer(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, timeout_rate=args.timeout_rate,
+                           timeout_delay=args.timeout_delay,
+                           session_visible_delay=args.session_delay,
+                           start_returns_id=not args.no_start_id).start()
+    print(f"export MES_API_BASE_URL={server.base_url}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+        print(f"\n{len(server.get_requests())} istek alındı")
@@ -3,34 +3,105 @@
 """
 MODÜL 2: Renk Algılama ve Sayma
 - Kamera ile renk algılama
-- Otomatik ürün sayımı (kamera tabanlı)
+- Otomatik ürün sayımı (kamera tabanlı) - tüm renkler tek geçişte
+  (HSV arama tablosu) sınıflandırılır, renk başına sayaç
+- Ürünler takip edilir, her biri sanal çizgiyi geçerken bir kez sayılır
+  (bant tam hızda, görüşte birden fazla ürün olabilir)
 - Her ürün için API'ye POST
+- Kamera paylaşılan servisten (camera_service) alınır; algılama ayrı
+  thread'de kamera hızında; GUI son kareyi FrameSlot'tan alıp sadece gösterir
+- Kare başına bellek ayırmasız: kamera karesi (BGR) tek dönüşümle HSV'ye,
+  ara sonuçlar önceden ayrılmış tamponlara yazılır; işaretler sadece
+  gösterim (RGB) tamponuna çizilir
+- Hareket kapısı: ROI'nin küçültülmüş görüntüsü son tam algılamadakinden
+  farklı değilse (bant boş / duruyor) tam algılama atlanır, önceki sonuç kullanılır
+- Yüke uyarlanan zamanlayıcı (frame_scheduler): her kare gösterilir, tam algılama
+  CPU yüküne göre her N. karede; bant hızından (speed_rpm) türetilen tabanın altına inmez
 - wc_id = 2
 - PWM/speed_rpm entegrasyonlu
 """
 
-import requests
+import math
 import logging
 import cv2
 import numpy as np
 import time
+from threading import Thread
 from PIL import Image, ImageTk
-from config import API_ENDPOINTS, API_KEY, WC_IDS
+from config import (WC_IDS, COLOR_ROI, COLOR_PROCESS_SCALE, COLOR_COUNT_ALL, COLOR_PRODUCT_IDS,
+                    COLOR_COUNT_AXIS, COLOR_COUNT_LINE, COLOR_COUNT_DIRECTION,
+                    COLOR_TRACK_MAX_DISTANCE, COLOR_TRACK_MAX_MISSED, COLOR_MOTION_GATE,
+                    COLOR_MOTION_SCALE, COLOR_MOTION_THRESHOLD, COLOR_MOTION_MIN_FRACTION,
+                    COLOR_MOTION_MAX_SKIP, SCHEDULER_ENABLED)
+from api_client import get_client
+from camera_service import get_camera_service
+from clock import SYSTEM_CLOCK
+from frame_slot import FrameSlot
+from frame_scheduler import FrameScheduler
+from tracker import CentroidTracker
 
 logger = logging.getLogger(__name__)
 
 
+class ColorFrame:
+    """Algılama thread'inin yayınladığı son kare ve durum"""
+
+    __slots__ = ('frame', 'detected', 'count', 'timestamp')
+
+    def __init__(self, frame, detected, count, timestamp):
+        self.frame = frame            # İşaretlenmiş RGB kare
+        self.detected = detected      # Algılamalar [(renk, x, y), ...]
+        self.count = count            # O andaki ürün sayısı
+        self.timestamp = timestamp    # clock.time()
+
+
+class ColorBuffers:
+    """Algılama ara tamponları - bölge boyutu / ölçek değişmedikçe her karede yeniden kullanılır"""
+
+    __slots__ = ('key', 'small', 'hsv', 'channels', 'bits', 'temp', 'classes', 'mask', 'clean', 'kernel',
+                 'motion_levels', 'motion_reference', 'motion_diff', 'motion_ready')
+
+    def __init__(self, key, width, height, ksize, region_size, motion_steps):
+        self.key = key                                      # (bölge şekli, ölçek)
+        self.small = np.empty((height, width, 3), np.uint8)  # Küçültülmüş bölge (ölçek < 1)
+        self.hsv = np.empty((height, width, 3), np.uint8)
+        self.channels = [np.empty((height, width), np.uint8) for _ in range(3)]
+        self.bits = np.empty((height, width), np.uint8)     # HSV aralık bitleri
+        self.temp = np.empty((height, width), np.uint8)
+        self.classes = np.empty((height, width), np.uint8)  # Sınıf haritası
+        self.mask = np.empty((height, width), np.uint8)
+        self.clean = np.empty((height, width), np.uint8)    # Açma sonrası maske
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (ksize, ksize))
+
+        # Hareket kapısı: ROI ardışık yarıya küçültülür (2x2 ortalama - INTER_AREA'dan ucuz,
+        # gürültüyü aynı şekilde bastırır); son tam algılamadaki küçük görüntü referans.
+        # Renkli karşılaştırılır: kırmızı ürün ile gri bandın parlaklığı neredeyse aynı
+        self.motion_levels = []
+        motion_w, motion_h = region_size
+        for _ in range(motion_steps):
+            motion_w, motion_h = max(1, motion_w // 2), max(1, motion_h // 2)
+            self.motion_levels.append(np.empty((motion_h, motion_w, 3), np.uint8))
+        self.motion_reference = np.empty((motion_h, motion_w, 3), np.uint8)
+        self.motion_diff = np.empty((motion_h, motion_w, 3), np.uint8)
+        self.motion_ready = False     # Referans henüz yok
+
+
 class ColorModule:
     """Renk Algılama Modülü"""
     
-    def __init__(self, esp32_comm, camera_index=0):
+    # Gösterim tamponu sayısı: GUI'ye verilen kare en az iki kare boyunca üzerine yazılmaz
+    DISPLAY_BUFFERS = 3
+    
+    def __init__(self, esp32_comm, camera_index=0, api=None, clock=None, camera=None):
         self.esp32 = esp32_comm
+        self.api = api or get_client()  # api_client.MESApiClient
+        self.clock = clock or SYSTEM_CLOCK  # clock.SystemClock / VirtualClock
         self.wc_id = WC_IDS['color']  # wc_id = 2
         self.session_id = 0
         self.running = False
         
-        # Kamera
-        self.camera = None
+        # Kamera (camera_service.CameraService - OCRModule ile paylaşılır)
+        self.camera = camera or get_camera_service(camera_index)
         self.camera_index = camera_index
         self.camera_running = False
         
@@ -63,22 +134,59 @@ class ColorModule:
         }
         
         # Ürün algılama parametreleri
-        self.min_area = 1000  # Minimum alan (piksel²)
-        self.detection_cooldown = 1.5  # Saniye (aynı ürünü tekrar saymamak için)
-        self.last_detection_time = 0
-        self.product_detected = False
+        self.min_area = 1000  # Minimum alan (piksel², tam çözünürlükte)
+        self.roi = COLOR_ROI  # (x, y, w, h) - sadece bu bölge işlenir (None = tüm kare)
+        self.process_scale = COLOR_PROCESS_SCALE  # İç işleme ölçeği (0.5, 0.25 ...)
+        self.count_all_colors = COLOR_COUNT_ALL  # True: tüm renkler sayılır, False: sadece seçili renk
+        
+        # Hareket kapısı: değişim yoksa tam algılama atlanır, takip dondurulur
+        self.motion_gate = COLOR_MOTION_GATE
+        self.motion_scale = COLOR_MOTION_SCALE
+        self.motion_threshold = COLOR_MOTION_THRESHOLD
+        self.motion_min_fraction = COLOR_MOTION_MIN_FRACTION
+        self.motion_max_skip = COLOR_MOTION_MAX_SKIP
+        self.motion_idle = False      # Son kare kapıda atlandı mı
+        self.motion_skipped = 0       # Art arda atlanan kare
+        self.last_detections = []
+        self.last_boxes = []
+        self.gate_stats = {'processed': 0, 'gated': 0}
+        
+        # Algılama zamanlayıcısı: ürün iki algılama arasında eşleşme mesafesinin yarısından fazla ilerlemesin
+        self.scheduler = FrameScheduler(max_step_px=COLOR_TRACK_MAX_DISTANCE / 2) if SCHEDULER_ENABLED else None
+        self.frames_since_update = 0  # Takibin son güncellemesinden beri atlanan kare
+        
+        # Ürün takibi: her iz sayım çizgisini geçerken bir kez sayılır
+        self.count_line = COLOR_COUNT_LINE  # Kare boyunun oranı
+        self.tracker = CentroidTracker(0, axis=COLOR_COUNT_AXIS, direction=COLOR_COUNT_DIRECTION,
+                                       max_distance=COLOR_TRACK_MAX_DISTANCE,
+                                       max_missed=COLOR_TRACK_MAX_MISSED)
+        
+        # Renk arama tabloları ve renk başına sayaç
+        self._build_color_lut()
+        self._reset_color_state()
         
         # Callback'ler
         self.on_count_update = None
         self.on_frame_update = None
         
-        # İşlenmiş frame (GUI için)
-        self.processed_frame = None
+        # Yakalama + algılama thread'i; GUI son kareyi frame_slot'tan alır
+        self.capture_thread = None
+        self.frame_slot = FrameSlot()
+        self.shown_seq = 0
+        self.capture_stats = {'frames': 0, 'errors': 0, 'dropped': 0, 'fps': 0.0}
+        
+        # Önceden ayrılmış tamponlar (algılama + dönüşümlü gösterim kareleri)
+        self.buffers = None
+        self.display_buffers = [None] * self.DISPLAY_BUFFERS
+        self.display_index = 0
+        
+        # Çökmeye dayanıklı sayaç (GUI event_journal.EventJournal atar)
+        self.journal = None
         
         logger.info(f"Renk Modülü oluşturuldu (wc_id={self.wc_id})")
     
-    def start(self, session_id):
-        """Modülü başlat"""
+    def start(self, session_id, state=None):
+        """Modülü başlat (state: journal'dan geri yüklenen sayaçlar - verilirse sıfırlanmaz)"""
         if self.running:
             logger.warning("Renk modülü zaten çalışıyor")
             return False
@@ -92,14 +200,18 @@ class ColorModule:
         # ✅ PWM callback'ini kaydet
         self.esp32.register_callback('pwm', self._on_pwm_changed)
         
-        # Sayacı sıfırla
+        # Sayacı sıfırla (yeniden başlatmada journal'daki değerlerle başla)
         self.product_count = 0
         self.last_sent_count = 0
-        self.last_detection_time = 0
-        self.product_detected = False
+        self._reset_color_state()
+        if state:
+            self._apply_state(state)
         
         # Motor başlat (opsiyonel)
         self.esp32.send_command("start")
+        self._journal_state()
+        if state and self.on_count_update:
+            self.on_count_update(self.product_count)
         
         logger.info(f"✅ Renk modülü başladı (session_id={session_id})")
         logger.info(f"🎨 Seçili renk: {self.selected_color}")
@@ -120,6 +232,7 @@ class ColorModule:
         
         # Motor durdur
         self.esp32.send_command("stop")
+        self._journal_state()
         
         logger.info("⏹ Renk modülü durdu")
         return True
@@ -128,233 +241,345 @@ class ColorModule:
         """ESP32'den PWM mesajı geldiğinde"""
         if value is not None:
             self.speed_rpm = value
+            if self.scheduler:
+                self.scheduler.speed_rpm = value
             logger.debug(f"⚡ PWM değeri güncellendi: {self.speed_rpm}")
     
     def _start_camera(self):
-        """Kamerayı başlat"""
-        try:
-            self.camera = cv2.VideoCapture(self.camera_index)
-            if not self.camera.isOpened():
-                raise Exception("Kamera açılamadı")
-            
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.camera.set(cv2.CAP_PROP_FPS, 30)
-            
-            self.camera_running = True
-            logger.info("📹 Kamera başladı")
-            
-        except Exception as e:
-            logger.error(f"Kamera hatası: {e}")
-            self.camera = None
+        """Paylaşılan kameraya bağlan, algılama thread'ini başlat"""
+        if not self.camera.acquire():
+            logger.error("Kamera hatası: kamera açılamadı")
+            return
+        
+        self.camera_running = True
+        self.capture_thread = Thread(target=self._capture_loop, daemon=True)
+        self.capture_thread.start()
+        logger.info("📹 Kamera başladı")
     
     def _stop_camera(self):
-        """Kamerayı durdur"""
+        """Algılama thread'ini durdur, kamerayı bırak (servis açık tutabilir)"""
+        was_running = self.camera_running
         self.camera_running = False
-        if self.camera:
+        if self.capture_thread:
+            self.capture_thread.join(timeout=2)
+            self.capture_thread = None
+        if was_running:
             self.camera.release()
-            self.camera = None
             logger.info("📹 Kamera durdu")
+        self.frame_slot.clear()
+    
+    def _capture_loop(self):
+        """Kamera hızında al → algıla → yayınla (GUI thread'inden bağımsız)"""
+        frames = 0
+        window_start = time.monotonic()
+        seen = self.camera.latest()[1]
+        
+        while self.camera_running:
+            try:
+                frame, seq = self.camera.wait(seen, timeout=0.5)
+                if frame is None:
+                    self.capture_stats['errors'] += 1
+                    continue
+                self.capture_stats['dropped'] += seq - seen - 1
+                seen = seq
+                
+                # Renk algılama (sadece modül çalışıyorsa) - kamera karesi BGR, paylaşılan (salt okunur)
+                detected = []
+                if self.running and (self.scheduler is None or self.scheduler.should_detect()):
+                    start = time.perf_counter()
+                    frame_rgb, detected = self._detect_color(frame)
+                    self._process_detection(detected)
+                    if self.scheduler:
+                        self.scheduler.record(time.perf_counter() - start)
+                elif self.running:
+                    # Zamanlayıcı bu kareyi atladı: kare gösterilir, son kutular üzerine çizilir;
+                    # takip sonraki algılamada aradaki kareleri hesaba katar
+                    frame_rgb = self._display_frame(frame)
+                    self._annotate(frame_rgb, self.last_boxes)
+                    detected = self.last_detections
+                    self.frames_since_update += 1
+                else:
+                    frame_rgb = self._display_frame(frame)
+                
+                self.frame_slot.publish(ColorFrame(frame_rgb, detected, self.product_count, self.clock.time()))
+                
+                self.capture_stats['frames'] += 1
+                frames += 1
+                elapsed = time.monotonic() - window_start
+                if elapsed >= 1.0:
+                    self.capture_stats['fps'] = frames / elapsed
+                    frames = 0
+                    window_start += elapsed
+                    
+            except Exception as e:
+                self.capture_stats['errors'] += 1
+                logger.error(f"Frame işleme hatası: {e}")
+                time.sleep(0.1)
+    
+    def _build_color_lut(self):
+        """
+        color_ranges → arama tabloları (renk eklendikçe kare başına maliyet artmaz).
+        Aralıklar HSV kutuları olduğundan H×S×V tablosu kanal başına bit maskelerine
+        ayrılır: her aralık bir bit, piksel bitleri = lut_h[H] & lut_s[S] & lut_v[V];
+        lut_class[bitler] → sınıf (0 = renk yok, i = color_names[i - 1]).
+        """
+        self.color_names = list(self.color_ranges)
+        boxes = []
+        for class_id, name in enumerate(self.color_names, start=1):
+            color_range = self.color_ranges[name]
+            i = 1
+            while f"lower{i}" in color_range:
+                boxes.append((class_id, color_range[f"lower{i}"], color_range[f"upper{i}"]))
+                i += 1
+        if len(boxes) > 8:
+            logger.error(f"❌ En fazla 8 HSV aralığı desteklenir, {len(boxes) - 8} aralık yok sayıldı")
+            boxes = boxes[:8]
+        
+        values = np.arange(256)
+        self.lut_h = np.zeros(256, np.uint8)
+        self.lut_s = np.zeros(256, np.uint8)
+        self.lut_v = np.zeros(256, np.uint8)
+        self.lut_class = np.zeros(256, np.uint8)
+        box_class = np.zeros(8, np.uint8)
+        for bit, (class_id, lower, upper) in enumerate(boxes):
+            for lut, channel in ((self.lut_h, 0), (self.lut_s, 1), (self.lut_v, 2)):
+                lut[(values >= lower[channel]) & (values <= upper[channel])] |= 1 << bit
+            box_class[bit] = class_id
+        
+        # Birden fazla aralığa düşen pikselde en düşük bit (ilk tanımlanan renk) kazanır
+        for bits in range(1, 256):
+            lowest = (bits & -bits).bit_length() - 1
+            self.lut_class[bits] = box_class[lowest]
+    
+    def _classify(self, hsv, buffers):
+        """HSV kare → sınıf haritası (her piksel için renk numarası, tek geçiş, buffers.classes'a)"""
+        h, s, v = cv2.split(hsv, buffers.channels)
+        bits, temp = buffers.bits, buffers.temp
+        cv2.LUT(h, self.lut_h, dst=bits)
+        cv2.bitwise_and(bits, cv2.LUT(s, self.lut_s, dst=temp), dst=bits)
+        cv2.bitwise_and(bits, cv2.LUT(v, self.lut_v, dst=temp), dst=bits)
+        return cv2.LUT(bits, self.lut_class, dst=buffers.classes)
+    
+    def _buffers_for(self, region):
+        """Bölge ve işleme ölçeği için tamponlar (ilk karede ya da ayar değişince ayrılır)"""
+        key = (region.shape, self.process_scale, self.motion_scale)
+        if self.buffers is None or self.buffers.key != key:
+            height, width = region.shape[:2]
+            scale = self.process_scale
+            if scale != 1.0:
+                width, height = max(1, round(width * scale)), max(1, round(height * scale))
+            ksize = max(3, int(round(5 * scale)) | 1)
+            region_h, region_w = region.shape[:2]
+            motion_steps = max(1, round(-math.log2(self.motion_scale)))
+            self.buffers = ColorBuffers(key, width, height, ksize, (region_w, region_h), motion_steps)
+            logger.debug(f"Algılama tamponları ayrıldı: {width}x{height}, çekirdek {ksize}")
+        return self.buffers
+    
+    def _display_frame(self, frame):
+        """Kamera karesi (BGR) → sıradaki gösterim tamponuna RGB kopyası (işaretler buna çizilir)"""
+        self.display_index = (self.display_index + 1) % self.DISPLAY_BUFFERS
+        display = self.display_buffers[self.display_index]
+        if display is None or display.shape != frame.shape:
+            display = self.display_buffers[self.display_index] = np.empty(frame.shape, np.uint8)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=display)
     
     def _detect_color(self, frame):
-        """Frame'de renk algıla ve işaretle"""
+        """
+        Kamera karesinde (BGR) tüm renkleri tek geçişte algıla, gösterim karesini işaretle.
+        Dönüş: (işaretli RGB gösterim karesi, [(renk, merkez x, merkez y), ...] tam kare koordinatında)
+        Gösterim karesi dönüşümlü tampondur - DISPLAY_BUFFERS - 1 kare sonra üzerine yazılır.
+        """
         if frame is None:
-            return frame, False
+            return frame, []
         
-        # HSV'ye çevir
-        hsv = cv2.cvtColor(frame, cv2.COLOR_RGB2HSV)
+        display = self._display_frame(frame)
+        if self._has_motion(frame):
+            detections, boxes = self._detect(frame)
+            self.last_detections, self.last_boxes = detections, boxes
+            self.gate_stats['processed'] += 1
+        else:
+            # Değişim yok: önceki sonuç geçerli (takip bu karede güncellenmez, zaman ilerlemiş sayılmaz)
+            detections, boxes = self.last_detections, self.last_boxes
+            self.frames_since_update = 0
+            self.gate_stats['gated'] += 1
+        self._annotate(display, boxes)
+        return display, detections
+    
+    def _has_motion(self, frame):
+        """
+        ROI son tam algılamadan beri değişti mi? Küçültülmüş görüntü (B, G, R ayrı ayrı)
+        referansla karşılaştırılır (yavaş değişim de birikerek yakalanır). Sonuç self.motion_idle'da.
+        """
+        if not self.motion_gate:
+            self.motion_idle = False
+            return True
         
-        # Seçilen rengin aralıklarını al
-        color_range = self.color_ranges.get(self.selected_color)
-        if not color_range:
-            return frame, False
+        _, region = self._region(frame)
+        buffers = self._buffers_for(region)
+        small = region
+        for level in buffers.motion_levels:
+            small = cv2.resize(small, (level.shape[1], level.shape[0]), dst=level, interpolation=cv2.INTER_LINEAR)
         
-        # Maske oluştur
-        if "lower2" in color_range:  # Kırmızı için 2 aralık
-            mask1 = cv2.inRange(hsv, color_range["lower1"], color_range["upper1"])
-            mask2 = cv2.inRange(hsv, color_range["lower2"], color_range["upper2"])
-            mask = cv2.bitwise_or(mask1, mask2)
+        if not buffers.motion_ready or self.motion_skipped >= self.motion_max_skip:
+            moved = True
         else:
-            mask = cv2.inRange(hsv, color_range["lower1"], color_range["upper1"])
-        
-        # Gürültü temizleme
-        kernel = np.ones((5, 5), np.uint8)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+            diff = cv2.absdiff(small, buffers.motion_reference, dst=buffers.motion_diff)
+            diff = diff.reshape(diff.shape[0], -1)    # Kanal değerleri tek kanallı görünüm (kopyasız)
+            cv2.threshold(diff, self.motion_threshold, 255, cv2.THRESH_BINARY, dst=diff)
+            moved = cv2.countNonZero(diff) > self.motion_min_fraction * diff.size
+        
+        if moved:
+            np.copyto(buffers.motion_reference, small)
+            buffers.motion_ready = True
+            self.motion_skipped = 0
+        else:
+            self.motion_skipped += 1
+        self.motion_idle = not moved
+        return moved
+    
+    def _detect(self, frame):
+        """
+        BGR kare → (algılamalar, kutular). Ara sonuçlar self.buffers'a yazılır;
+        kare başına sadece kontur listesi ve algılama sonuçları ayrılır.
+        kutular: [(renk, x, y, w, h, alan), ...] tam kare koordinatında
+        """
+        # Sadece ilgi alanı, küçültülmüş olarak işlenir; sonuçlar tam kareye geri ölçeklenir
+        (roi_x, roi_y, roi_w, roi_h), region = self._region(frame)
+        buffers = self._buffers_for(region)
+        scale = self.process_scale
+        if scale != 1.0:
+            small_h, small_w = buffers.small.shape[:2]
+            region = cv2.resize(region, (small_w, small_h), dst=buffers.small, interpolation=cv2.INTER_AREA)
+        
+        # HSV'ye çevir (BGR'den doğrudan, tek dönüşüm) ve her pikseli sınıflandır
+        hsv = cv2.cvtColor(region, cv2.COLOR_BGR2HSV, dst=buffers.hsv)
+        classes = self._classify(hsv, buffers)
+        mask = cv2.compare(classes, 0, cv2.CMP_GT, dst=buffers.mask)
+        
+        # Gürültü temizleme (önbellekteki çekirdek)
+        cv2.morphologyEx(mask, cv2.MORPH_OPEN, buffers.kernel, dst=buffers.clean)
+        cv2.morphologyEx(buffers.clean, cv2.MORPH_CLOSE, buffers.kernel, dst=mask)
         
         # Konturları bul (OpenCV versiyon uyumlu)
         result = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         contours = result[0] if len(result) == 2 else result[1]
+        n_classes = len(self.color_names) + 1
+        
+        # Sayım çizgisi
+        height, width = frame.shape[:2]
+        self.tracker.line = int((width if self.tracker.axis == 'x' else height) * self.count_line)
+        
+        detections, boxes = [], []
+        min_area = self.min_area * scale * scale
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if area <= min_area:
+                continue
+            x, y, w, h = cv2.boundingRect(contour)
+            
+            # Ürünün rengi: kutusundaki maske piksellerinin çoğunluk sınıfı
+            box_classes = classes[y:y + h, x:x + w][mask[y:y + h, x:x + w] > 0]
+            votes = np.bincount(box_classes, minlength=n_classes)
+            votes[0] = 0
+            class_id = votes.argmax()
+            if class_id == 0:
+                continue
+            name = self.color_names[class_id - 1]
+            
+            # İşleme koordinatları → tam kare
+            x, y = roi_x + int(x / scale), roi_y + int(y / scale)
+            w, h = int(w / scale), int(h / scale)
+            detections.append((name, x + w / 2, y + h / 2))
+            boxes.append((name, x, y, w, h, int(area / (scale * scale))))
         
-        detected = False
-        result_frame = frame.copy()
+        return detections, boxes
+    
+    def _annotate(self, display, boxes):
+        """ROI, sayım çizgisi, kutular ve durum yazısını gösterim karesine çiz (yerinde)"""
+        if self.roi:
+            (roi_x, roi_y, roi_w, roi_h), _ = self._region(display)
+            cv2.rectangle(display, (roi_x, roi_y), (roi_x + roi_w, roi_y + roi_h), (255, 255, 0), 1)
+        
+        height, width = display.shape[:2]
+        line = self.tracker.line
+        if self.tracker.axis == 'x':
+            cv2.line(display, (line, 0), (line, height), (255, 0, 255), 2)
+        else:
+            cv2.line(display, (0, line), (width, line), (255, 0, 255), 2)
         
-        # En büyük konturu bul
-        if contours:
-            largest_contour = max(contours, key=cv2.contourArea)
-            area = cv2.contourArea(largest_contour)
+        for name, x, y, w, h, area in boxes:
+            box_color = (0, 255, 0) if name == self.selected_color else (255, 165, 0)
+            cv2.rectangle(display, (x, y), (x + w, y + h), box_color, 3)
             
-            # Minimum alan kontrolü
-            if area > self.min_area:
-                detected = True
-                
-                # Dikdörtgen çiz
-                x, y, w, h = cv2.boundingRect(largest_contour)
-                cv2.rectangle(result_frame, (x, y), (x + w, y + h), (0, 255, 0), 3)
-                
-                # Bilgi yazısı
-                text = f"{self.selected_color} - {int(area)} px2"
-                cv2.putText(result_frame, text, (x, y - 10),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+            # Bilgi yazısı
+            cv2.putText(display, f"{name} - {area} px2", (x, y - 10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, box_color, 2)
         
         # Durum bilgisi (üst sol köşe)
         status_text = f"Renk: {self.selected_color} | Urun: {self.product_count}"
-        cv2.putText(result_frame, status_text, (10, 30),
+        if self.count_all_colors:
+            status_text = " | ".join(f"{name}: {count}" for name, count in self.color_counts.items())
+        cv2.putText(display, status_text, (10, 30),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        
-        return result_frame, detected
     
-    def _process_detection(self, detected):
-        """Algılama sonucunu işle ve sayaç güncelle"""
-        if not self.running:
+    def _reset_color_state(self):
+        self.color_counts = {name: 0 for name in self.color_names}
+        self.tracker.reset()
+        self.last_detections, self.last_boxes = [], []
+        self.motion_idle = False
+        self.motion_skipped = self.motion_max_skip   # Sonraki kare tam algılanır
+    
+    def _region(self, frame):
+        """ROI'yi kareye kırp → ((x, y, w, h), kopyasız görünüm)"""
+        height, width = frame.shape[:2]
+        if not self.roi:
+            return (0, 0, width, height), frame
+        x, y, w, h = self.roi
+        x, y = min(max(0, x), width - 1), min(max(0, y), height - 1)
+        w, h = min(w, width - x), min(h, height - y)
+        return (x, y, w, h), frame[y:y + h, x:x + w]
+    
+    def _process_detection(self, detections):
+        """Algılamaları izlerle eşleştir, sayım çizgisini geçen ürünleri say"""
+        if not self.running or self.motion_idle:
             return
         
-        current_time = time.time()
-        
-        # Renk algılandı
-        if detected:
-            # Cooldown kontrolü
-            if current_time - self.last_detection_time > self.detection_cooldown:
-                if not self.product_detected:
-                    # Yeni ürün!
-                    self.product_count += 1
-                    self.last_detection_time = current_time
-                    self.product_detected = True
-                    
-                    logger.info(f"🔢 Ürün algılandı! Toplam: {self.product_count}")
-                    
-                    # API'ye gönder
-                    wc_product_id = self._send_to_api_get_product_id()
-                    self._send_to_api(wc_product_id=wc_product_id)
-                    
-                    # GUI güncelle
-                    if self.on_count_update:
-                        self.on_count_update(self.product_count)
-        else:
-            # Renk kayboldu, bir sonraki ürün için hazır
-            if self.product_detected:
-                self.product_detected = False
-    
-    def _send_to_api_get_product_id(self):
-        """Ürün ID'sini API'den al - DÜZELTILMIŞ VERSİYON"""
-        try:
-            headers = {
-                'apiKey': API_KEY,
-                'Content-Type': 'application/json'
-            }
-            url = f"{API_ENDPOINTS['wc_id_name']}/{self.wc_id}"
-            
-            response = requests.get(
-                url,
-                headers=headers,
-                timeout=5
-            )
-            
-            logger.debug(f"Product ID API - Status: {response.status_code}, URL: {url}")
+        steps, self.frames_since_update = self.frames_since_update + 1, 0
+        for track in self.tracker.update(detections, steps=steps):
+            name = track.label
+            if not (self.count_all_colors or name == self.selected_color):
+                continue
             
-            # ✅ DÜZELTME: 200 ile 201'i kontrol et
-            if response.status_code in [200, 201]:
-                try:
-                    data = response.json()
-                    product_id = data.get('product_id', None)
-                    
-                    if product_id is not None:
-                        logger.info(f"✅ Ürün ID alındı: {product_id}")
-                        return product_id
-                    else:
-                        logger.warning(f"⚠️ Ürün ID bulunamadı. API Yanıtı: {data}")
-                        return None
-                        
-                except ValueError as e:
-                    logger.error(f"❌ JSON parse hatası: {e}")
-                    logger.debug(f"Response text: {response.text}")
-                    return None
-            else:
-                logger.warning(f"⚠️ Ürün ID API hatası: HTTP {response.status_code}")
-                logger.debug(f"Response: {response.text}")
-                return None
-                
-        except requests.exceptions.Timeout:
-            logger.error("❌ API timeout (5s)")
-            return None
-        except requests.exceptions.ConnectionError:
-            logger.error("❌ API bağlantı hatası")
-            return None
-        except Exception as e:
-            logger.error(f"❌ Ürün ID API hatası: {e}")
-            return None
-        
-    def _send_to_api(self, wc_product_id=None):
-        """Ürün sayısını API'ye gönder"""
-        try:
-            headers = {
-                'apiKey': f'{API_KEY}',
-                'Content-Type': 'application/json'
-            }
-            
-            # ✅ speed_rpm parametresi eklendi
-            data = {
-                "session_id": self.session_id,
-                "wc_id": self.wc_id,
-                "quantity": 1,
-                "product_id": wc_product_id,
-                "speed_rpm": self.speed_rpm  # ✅ PWM değeri
-            }
+            # Yeni ürün!
+            self.color_counts[name] += 1
+            self.product_count += 1
             
-            logger.debug(f"API POST: {data}")
+            logger.info(f"🔢 Ürün algılandı ({name}, iz #{track.id})! Toplam: {self.product_count}")
+            self._journal_state()
             
-            response = requests.post(
-                API_ENDPOINTS['conveyor'],  # ✅ DÜZELTME: 'product' → 'conveyor'
-                json=data,
-                headers=headers,
-                timeout=5
-            )
+            # API'ye gönder
+            wc_product_id = COLOR_PRODUCT_IDS.get(name) or self.api.get_product_id(self.wc_id)
+            self._send_to_api(wc_product_id=wc_product_id, color_name=name)
             
-            if response.status_code in [200, 201]:
-                logger.info(f"✅ Color API başarılı: count={self.product_count}, color={self.selected_color}, speed={self.speed_rpm}")
-            else:
-                logger.warning(f"⚠️ Color API hatası: HTTP {response.status_code}")
-                
-        except requests.exceptions.Timeout:
-            logger.error("❌ Product API timeout")
-        except Exception as e:
-            logger.error(f"❌ Product API hatası: {e}")
+            # GUI güncelle
+            if self.on_count_update:
+                self.on_count_update(self.product_count)
+    
+    def _send_to_api(self, wc_product_id=None, color_name=None):
+        """Ürünü API'ye gönder"""
+        result = self.api.post_prod_event(self.session_id, self.wc_id, 1, wc_product_id,
+                                          self.speed_rpm, endpoint='conveyor')
+        if result.ok and not result.queued:
+            logger.info(f"✅ Color API başarılı: count={self.product_count}, color={color_name or self.selected_color}, speed={self.speed_rpm}")
     
     def get_camera_frame(self):
-        """Kamera frame'i al ve renk algılama yap (GUI için)"""
-        if not self.camera_running or not self.camera:
-            return None
-        
-        try:
-            ret, frame = self.camera.read()
-            if not ret:
-                return None
-            
-            # BGR -> RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # Renk algılama (sadece modül çalışıyorsa)
-            if self.running:
-                processed_frame, detected = self._detect_color(frame_rgb)
-                self._process_detection(detected)
-                return processed_frame
-            else:
-                # Modül duruyorsa sadece görüntüyü göster
-                return frame_rgb
-                
-        except Exception as e:
-            logger.error(f"Frame okuma hatası: {e}")
-            return None
+        """Son işlenmiş kare (GUI için) - son çağrıdan beri yeni kare yoksa None"""
+        result, self.shown_seq = self.frame_slot.newer(self.shown_seq)
+        return result.frame if result is not None else None
+    
+    def get_latest(self):
+        """Son yayınlanan ColorFrame (kare + algılama durumu) ya da None"""
+        return self.frame_slot.latest()[0]
     
     def set_color(self, color_name):
         """Hedef rengi değiştir"""
@@ -364,23 +589,59 @@ class ColorModule:
             return True
         return False
     
+    def set_color_ranges(self, color_ranges):
+        """Renk aralıklarını değiştir - arama tabloları ve renk sayaçları yeniden kurulur"""
+        self.color_ranges = dict(color_ranges)
+        self._build_color_lut()
+        self._reset_color_state()
+        if self.selected_color not in self.color_ranges:
+            self.selected_color = self.color_names[0]
+        logger.info(f"🎨 Renk aralıkları güncellendi: {', '.join(self.color_names)}")
+    
     def reset_counter(self):
         """Sayacı sıfırla"""
         self.product_count = 0
         self.last_sent_count = 0
-        self.last_detection_time = 0
-        self.product_detected = False
+        self._reset_color_state()
+        self._journal_state()
         logger.info("🔄 Sayaç sıfırlandı")
         
         if self.on_count_update:
             self.on_count_update(0)
     
+    def _journal_state(self):
+        """Sayaç durumunu journal'a yaz"""
+        if self.journal:
+            self.journal.record('color', running=self.running, product_count=self.product_count,
+                                last_sent_count=self.last_sent_count, selected_color=self.selected_color,
+                                color_counts=self.color_counts)
+    
+    def _apply_state(self, state):
+        self.product_count = state.get('product_count', 0)
+        self.last_sent_count = state.get('last_sent_count', self.product_count)
+        self.set_color(state.get('selected_color', self.selected_color))
+        self.color_counts.update(state.get('color_counts', {}))
+    
+    def restore_state(self, state):
+        """Yeniden başlatma sonrası journal'daki sayaçları geri yükle (modül çalışmıyorken)"""
+        self._apply_state(state)
+        self._journal_state()
+        logger.info(f"♻️ Renk sayacı geri yüklendi: {self.product_count}")
+        if self.on_count_update:
+            self.on_count_update(self.product_count)
+    
     def get_statistics(self):
         """Anlık istatistikler"""
         return {
             'count': self.product_count,
             'color': self.selected_color,
-            'speed_rpm': self.speed_rpm  # ✅ YENI
+            'color_counts': dict(self.color_counts),
+            'speed_rpm': self.speed_rpm,  # ✅ YENI
+            'fps': self.capture_stats['fps'],
+            'frames_processed': self.gate_stats['processed'],
+            'frames_gated': self.gate_stats['gated'],
+            'detect_hz': self.scheduler.target_hz if self.scheduler else self.capture_stats['fps'],
+            'cpu_load': self.scheduler.load if self.scheduler else None
         }
     
     def get_count(self):
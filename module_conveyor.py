@@ -4,17 +4,19 @@
 MODÜL 5: Konveyör Sistemi - Düzeltilmiş (PWM entegrasyonlu)
 """
 
-import requests
 import logging
-from datetime import datetime
-from config import API_ENDPOINTS, API_KEY, WC_IDS
+from config import WC_IDS
+from clock import SYSTEM_CLOCK
+from api_client import get_client
 
 logger = logging.getLogger(__name__)
 
 
 class ConveyorModule:
-    def __init__(self, esp32_comm):
+    def __init__(self, esp32_comm, api=None, clock=None):
         self.esp32 = esp32_comm
+        self.api = api or get_client()  # api_client.MESApiClient
+        self.clock = clock or SYSTEM_CLOCK  # clock.SystemClock / VirtualClock
         self.wc_id = WC_IDS['conveyor'] 
         
         self.session_id = 0
@@ -30,10 +32,13 @@ class ConveyorModule:
 
         self.on_item_detected = None
         
+        # Çökmeye dayanıklı sayaç (GUI event_journal.EventJournal atar)
+        self.journal = None
+        
         logger.info(f"Konveyör Modülü oluşturuldu (wc_id={self.wc_id})")
     
-    def start(self, session_id):
-        """Modülü başlat"""
+    def start(self, session_id, state=None):
+        """Modülü başlat (state: journal'dan geri yüklenen sayaçlar)"""
         if self.running:
             logger.warning("Konveyör modülü zaten çalışıyor")
             return False
@@ -44,7 +49,7 @@ class ConveyorModule:
         
         self.session_id = session_id
         self.running = True
-        self.start_time = datetime.now()
+        self.start_time = self.clock.now()
 
         # ESP32 callback kaydet
         self.esp32.register_callback('count', self._on_item_detected)
@@ -53,6 +58,11 @@ class ConveyorModule:
 
         # ESP32'ye başlat komutu
         self.esp32.send_command("start")
+        if state:
+            self._apply_state(state)
+        self._journal_state()
+        if state and self.on_item_detected:
+            self.on_item_detected(self.item_count)
         
         logger.info(f"✅ Konveyör modülü başladı (session_id={session_id})")
         return True
@@ -67,7 +77,7 @@ class ConveyorModule:
 
         # Runtime hesapla
         if self.start_time:
-            runtime = (datetime.now() - self.start_time).total_seconds()
+            runtime = (self.clock.now() - self.start_time).total_seconds()
             self.total_runtime += runtime
         
         # Callback'leri kaldır
@@ -76,6 +86,7 @@ class ConveyorModule:
         
         # ESP32'ye dur komutu
         self.esp32.send_command("stop")
+        self._journal_state()
         
         logger.info(f"⏹ Konveyör modülü durdu (Toplam: {self.item_count} ürün, {self.total_runtime:.1f}s)")
         return True
@@ -96,96 +107,22 @@ class ConveyorModule:
         
         # API'ye gönder (her yeni üründe)
         if self.item_count != self.last_sent_count:
-            wc_product_id = self._send_to_api_get_product_id()
+            wc_product_id = self.api.get_product_id(self.wc_id)
             self._send_to_api(wc_product_id=wc_product_id)
             self.last_sent_count = self.item_count
+        self._journal_state()
         
         # GUI güncelle
         if self.on_item_detected:
             self.on_item_detected(self.item_count)
     
-    def _send_to_api_get_product_id(self):
-        try:
-            headers = {
-                'apiKey': API_KEY,
-                'Content-Type': 'application/json'
-            }
-            url = f"{API_ENDPOINTS['wc_id_name']}/{self.wc_id}"
-            
-            response = requests.get(
-                url,
-                headers=headers,
-                timeout=5
-            )
-            
-            logger.debug(f"Product ID API - Status: {response.status_code}, URL: {url}")
-            
-            # ✅ DÜZELTME: 200 ile 201'i kontrol et
-            if response.status_code in [200, 201]:
-                try:
-                    data = response.json()
-                    product_id = data.get('product_id', None)
-                    
-                    if product_id is not None:
-                        logger.info(f"✅ Ürün ID alındı: {product_id}")
-                        return product_id
-                    else:
-                        logger.warning(f"⚠️ Ürün ID bulunamadı. API Yanıtı: {data}")
-                        return None
-                        
-                except ValueError as e:
-                    logger.error(f"❌ JSON parse hatası: {e}")
-                    logger.debug(f"Response text: {response.text}")
-                    return None
-            else:
-                logger.warning(f"⚠️ Ürün ID API hatası: HTTP {response.status_code}")
-                logger.debug(f"Response: {response.text}")
-                return None
-                
-        except requests.exceptions.Timeout:
-            logger.error("❌ API timeout (5s)")
-            return None
-        except requests.exceptions.ConnectionError:
-            logger.error("❌ API bağlantı hatası")
-            return None
-        except Exception as e:
-            logger.error(f"❌ Ürün ID API hatası: {e}")
-            return None
-                
     def _send_to_api(self, wc_product_id=None):
         """API'ye veri gönder - PWM/speed_rpm ile"""
-        try:
-            headers = {
-                'apiKey': API_KEY,
-                'Content-Type': 'application/json'
-            }
-            runtime = 0
-            if self.start_time:
-                runtime = (datetime.now() - self.start_time).total_seconds()
-            rate = (self.item_count / runtime * 60) if runtime > 0 else 0
-            
-            data = {
-                "session_id": self.session_id,
-                "wc_id": self.wc_id,
-                "quantity": 1,
-                "product_id": wc_product_id,
-                "speed_rpm": self.speed_rpm,  # ✅ PWM değeri buraya yazılıyor
-            }
-            logger.debug(f"API POST: {data}")
-            response = requests.post(
-                API_ENDPOINTS['conveyor'],
-                json=data,
-                headers=headers,
-                timeout=5
-            )
-            if response.status_code in [200, 201, 501]:
-                logger.info(f"✅ Conveyor API başarılı: count={self.item_count}, rate={rate:.1f}/min, speed={self.speed_rpm}")
-            else:
-                logger.warning(f"⚠️ Conveyor API hatası: HTTP {response.status_code}")   
-        except requests.exceptions.Timeout:
-            logger.error("❌ Conveyor API timeout")
-        except Exception as e:
-            logger.error(f"❌ Conveyor API hatası: {e}")
+        result = self.api.post_prod_event(self.session_id, self.wc_id, 1, wc_product_id,
+                                          self.speed_rpm, endpoint='conveyor')
+        if result.ok and not result.queued:
+            stats = self.get_statistics()
+            logger.info(f"✅ Conveyor API başarılı: count={self.item_count}, rate={stats['rate_per_minute']:.1f}/min, speed={self.speed_rpm}")
     
     def reset_counter(self):
         """Sayacı sıfırla (çalışırken)"""
@@ -193,16 +130,36 @@ class ConveyorModule:
         self.item_count = 0
         self.last_sent_count = 0
         if self.running:
-            self.start_time = datetime.now()  
+            self.start_time = self.clock.now()  
+        self._journal_state()
         logger.info(f"🔄 Konveyör sayacı sıfırlandı (eski: {old_count})")
         if self.on_item_detected:
             self.on_item_detected(0)
     
+    def _journal_state(self):
+        """Sayaç durumunu journal'a yaz"""
+        if self.journal:
+            self.journal.record('conveyor', running=self.running, item_count=self.item_count,
+                                last_sent_count=self.last_sent_count, total_runtime=self.total_runtime)
+    
+    def _apply_state(self, state):
+        self.item_count = state.get('item_count', 0)
+        self.last_sent_count = state.get('last_sent_count', self.item_count)
+        self.total_runtime = state.get('total_runtime', 0)
+    
+    def restore_state(self, state):
+        """Yeniden başlatma sonrası journal'daki sayaçları geri yükle (modül çalışmıyorken)"""
+        self._apply_state(state)
+        self._journal_state()
+        logger.info(f"♻️ Konveyör sayacı geri yüklendi: {self.item_count}")
+        if self.on_item_detected:
+            self.on_item_detected(self.item_count)
+    
     def get_statistics(self):
         """Anlık istatistikler"""
         runtime = 0
         if self.start_time and self.running:
-            runtime = (datetime.now() - self.start_time).total_seconds()
+            runtime = (self.clock.now() - self.start_time).total_seconds()
         
         rate = (self.item_count / runtime * 60) if runtime > 0 else 0
         
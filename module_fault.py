@@ -1,27 +1,46 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-u
 """
 MODÜL 3: Arıza Tespit Sistemi
 - ESP32'den Fire, Voice, Vibration mesajları
 - Her arıza için API'ye POST
 - wc_id = 3
-- start_ts ve end_ts zamanlarını tutar
+- start_ts ve end_ts zamanlarını tutar (epoch ms tamsayı; ISO metne
+  sadece API'ye gönderilirken çevrilir, bkz. api_client.format_timestamp)
 """
 
-import requests
 import logging
-from datetime import datetime, timedelta
-from config import API_ENDPOINTS, API_KEY, WC_IDS
+from config import WC_IDS
+from api_client import get_client
+from clock import SYSTEM_CLOCK
 
 logger = logging.getLogger(__name__)
 
 
+class FaultInterval:
+    """Bir arızanın başlangıç / bitiş zamanı (epoch ms)"""
+    
+    __slots__ = ('start', 'end')
+    
+    def __init__(self):
+        self.start = None
+        self.end = None
+    
+    def reset(self):
+        self.start = None
+        self.end = None
+    
+    def as_dict(self):
+        return {'start': self.start, 'end': self.end}
+
+
 class FaultModule:
     """Arıza Tespit Modülü"""
     
-    def __init__(self, esp32_comm):
+    def __init__(self, esp32_comm, api=None, clock=None):
         self.esp32 = esp32_comm
+        self.api = api or get_client()  # api_client.MESApiClient
+        self.clock = clock or SYSTEM_CLOCK  # clock.SystemClock / VirtualClock
         self.wc_id = WC_IDS['fault'] 
         self.session_id = 0
         self.running = False
@@ -32,20 +51,18 @@ class FaultModule:
         
         # Arıza zamanları
         self.fault_timestamps = {
-            'fire': {'start': None, 'end': None},
-            'voice': {'start': None, 'end': None},
-            'vibration': {'start': None, 'end': None}
+            'fire': FaultInterval(),
+            'voice': FaultInterval(),
+            'vibration': FaultInterval()
         }
 
         self.on_fault_update = None
         
         logger.info(f"Arıza Modülü oluşturuldu (wc_id={self.wc_id})")
     
-    def _get_iso_timestamp(self):
-        """Türkiye saatinde ISO 8601 formatında zaman döndür (UTC+3)"""
-        # Türkiye saati = UTC + 3 saat (yazlık/kışlık saat farkı göz ardı)
-        tr_time = datetime.utcnow() + timedelta(hours=3)
-        return tr_time.isoformat(timespec='milliseconds')
+    def _now_ms(self):
+        """Şimdiki zaman (epoch ms)"""
+        return int(self.clock.time() * 1000)
     
     def start(self, session_id):
         """Modülü başlat"""
@@ -70,8 +87,8 @@ class FaultModule:
         self.fault_vibration = False
         
         # Zamanları sıfırla
-        for fault_type in self.fault_timestamps:
-            self.fault_timestamps[fault_type] = {'start': None, 'end': None}
+        for interval in self.fault_timestamps.values():
+            interval.reset()
         
         logger.info(f"✅ Arıza modülü başladı (session_id={session_id})")
         return True
@@ -100,7 +117,7 @@ class FaultModule:
             return
         
         self.fault_fire = True
-        self.fault_timestamps['fire']['start'] = self._get_iso_timestamp()
+        self.fault_timestamps['fire'].start = self._now_ms()
         logger.warning("🔥 YANGIN TESPİT EDİLDİ!")
         
         # ✅ MOTOR DURDUR
@@ -116,7 +133,7 @@ class FaultModule:
             return
         
         self.fault_voice = True
-        self.fault_timestamps['voice']['start'] = self._get_iso_timestamp()
+        self.fault_timestamps['voice'].start = self._now_ms()
         logger.warning("🔊 YÜKSEK SES TESPİT EDİLDİ!")
         
         # ✅ MOTOR DURDUR
@@ -132,7 +149,7 @@ class FaultModule:
             return
         
         self.fault_vibration = True
-        self.fault_timestamps['vibration']['start'] = self._get_iso_timestamp()
+        self.fault_timestamps['vibration'].start = self._now_ms()
         logger.warning("📳 TİTREŞİM TESPİT EDİLDİ!")
         
         # ✅ MOTOR DURDUR
@@ -145,72 +162,21 @@ class FaultModule:
     
     def _send_to_api(self, fault_type, severity, fault_key):
         """Arıza bilgisini API'ye gönder"""
-        try:
-            headers = {
-                'apiKey': API_KEY,
-                'Content-Type': 'application/json'
-            }
-            
-            start_ts = self.fault_timestamps[fault_key]['start']
-            
-            data = {
-                "fault_id": 0,
-                "wc_id": self.wc_id,
-                "session_id": self.session_id,
-                "fault_type_id": fault_type,
-                "start_ts": start_ts,
-                "end_ts": start_ts  # Arıza başında start_ts ve end_ts aynı
-            }
-            
-            response = requests.post(
-                API_ENDPOINTS['fault'],
-                json=data,
-                headers=headers,
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"✅ Fault API: {fault_type} ({severity})")
-            else:
-                logger.warning(f"⚠️ Fault API hatası: {response.status_code}")
-                
-        except Exception as e:
-            logger.error(f"❌ Fault API hatası: {e}")
+        start_ts = self.fault_timestamps[fault_key].start
+        
+        # Arıza başında start_ts ve end_ts aynı
+        result = self.api.post_fault(self.session_id, self.wc_id, fault_type, start_ts, start_ts)
+        if result.ok and not result.queued:
+            logger.info(f"✅ Fault API: {fault_type} ({severity})")
     
     def _send_to_api_with_end(self, fault_type, severity, fault_key):
         """Arıza sonlandırılırken API'ye end_ts ile gönder"""
-        try:
-            headers = {
-                'apiKey': API_KEY,
-                'Content-Type': 'application/json'
-            }
-            
-            start_ts = self.fault_timestamps[fault_key]['start']
-            end_ts = self.fault_timestamps[fault_key]['end']
-            
-            data = {
-                "fault_id": 0,
-                "wc_id": self.wc_id,
-                "session_id": self.session_id,
-                "fault_type_id": fault_type,
-                "start_ts": start_ts,
-                "end_ts": end_ts
-            }
-            
-            response = requests.post(
-                API_ENDPOINTS['fault'],
-                json=data,
-                headers=headers,
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"✅ Fault Sonlandırma API: {fault_type} ({severity}) - {start_ts} -> {end_ts}")
-            else:
-                logger.warning(f"⚠️ Fault Sonlandırma API hatası: {response.status_code}")
-                
-        except Exception as e:
-            logger.error(f"❌ Fault Sonlandırma API hatası: {e}")
+        start_ts = self.fault_timestamps[fault_key].start
+        end_ts = self.fault_timestamps[fault_key].end
+        
+        result = self.api.post_fault(self.session_id, self.wc_id, fault_type, start_ts, end_ts)
+        if result.ok and not result.queued:
+            logger.info(f"✅ Fault Sonlandırma API: {fault_type} ({severity}) - {start_ts} -> {end_ts}")
     
     def clear_fault(self, fault_type):
         """Arızayı temizle ve motoru başlat"""
@@ -222,15 +188,15 @@ class FaultModule:
         
         if fault_type == 'fire':
             self.fault_fire = False
-            self.fault_timestamps['fire']['end'] = self._get_iso_timestamp()
+            self.fault_timestamps['fire'].end = self._now_ms()
             self._send_to_api_with_end(2, 'critical', 'fire')
         elif fault_type == 'voice':
             self.fault_voice = False
-            self.fault_timestamps['voice']['end'] = self._get_iso_timestamp()
+            self.fault_timestamps['voice'].end = self._now_ms()
             self._send_to_api_with_end(9, 'warning', 'voice')
         elif fault_type == 'vibration':
             self.fault_vibration = False
-            self.fault_timestamps['vibration']['end'] = self._get_iso_timestamp()
+            self.fault_timestamps['vibration'].end = self._now_ms()
             self._send_to_api_with_end(8, 'warning', 'vibration')
         
         logger.info(f"Arıza temizlendi: {fault_type}")
@@ -247,15 +213,15 @@ class FaultModule:
         """Tüm arızaları temizle ve motoru başlat"""
         # Her bir aktif arızayı end_ts ile sonlandır
         if self.fault_fire:
-            self.fault_timestamps['fire']['end'] = self._get_iso_timestamp()
+            self.fault_timestamps['fire'].end = self._now_ms()
             self._send_to_api_with_end(2, 'critical', 'fire')
             
         if self.fault_voice:
-            self.fault_timestamps['voice']['end'] = self._get_iso_timestamp()
+            self.fault_timestamps['voice'].end = self._now_ms()
             self._send_to_api_with_end(9, 'warning', 'voice')
             
         if self.fault_vibration:
-            self.fault_timestamps['vibration']['end'] = self._get_iso_timestamp()
+            self.fault_timestamps['vibration'].end = self._now_ms()
             self._send_to_api_with_end(8, 'warning', 'vibration')
         
         self.fault_fire = False
@@ -277,7 +243,7 @@ class FaultModule:
             'voice': self.fault_voice,
             'vibration': self.fault_vibration,
             'any_active': self.fault_fire or self.fault_voice or self.fault_vibration,
-            'timestamps': self.fault_timestamps
+            'timestamps': {key: interval.as_dict() for key, interval in self.fault_timestamps.items()}
         }
 
 
@@ -8,10 +8,10 @@ MODÜL: Metal Algılama
 - PWM/speed_rpm entegrasyonlu
 """
 
-import requests
 import logging
-from datetime import datetime
-from config import API_ENDPOINTS, API_KEY, WC_IDS
+from config import WC_IDS
+from clock import SYSTEM_CLOCK
+from api_client import get_client
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +19,10 @@ logger = logging.getLogger(__name__)
 class MetalModule:
     """Metal Algılama Modülü"""
     
-    def __init__(self, esp32_comm):
+    def __init__(self, esp32_comm, api=None, clock=None):
         self.esp32 = esp32_comm
+        self.api = api or get_client()  # api_client.MESApiClient
+        self.clock = clock or SYSTEM_CLOCK  # clock.SystemClock / VirtualClock
         self.wc_id = WC_IDS['metal']  # wc_id = 2
         
         self.session_id = 0
@@ -40,10 +42,13 @@ class MetalModule:
         # Callback
         self.on_metal_detected = None
         
+        # Çökmeye dayanıklı sayaç (GUI event_journal.EventJournal atar)
+        self.journal = None
+        
         logger.info(f"Metal Modülü oluşturuldu (wc_id={self.wc_id})")
     
-    def start(self, session_id):
-        """Modülü başlat"""
+    def start(self, session_id, state=None):
+        """Modülü başlat (state: journal'dan geri yüklenen sayaçlar)"""
         if self.running:
             logger.warning("Metal modülü zaten çalışıyor")
             return False
@@ -54,7 +59,7 @@ class MetalModule:
         
         self.session_id = session_id
         self.running = True
-        self.start_time = datetime.now()
+        self.start_time = self.clock.now()
         
         # ✅ Metal ve PWM callback'lerini kaydet
         self.esp32.register_callback('count', self._on_metal_detected)
@@ -62,6 +67,11 @@ class MetalModule:
         
         # ESP32'ye başlat komutu
         self.esp32.send_command("start")
+        if state:
+            self._apply_state(state)
+        self._journal_state()
+        if state and self.on_metal_detected:
+            self.on_metal_detected(self.metal_count)
         
         logger.info(f"✅ Metal modülü başladı (session_id={session_id})")
         return True
@@ -76,7 +86,7 @@ class MetalModule:
         
         # Runtime hesapla
         if self.start_time:
-            runtime = (datetime.now() - self.start_time).total_seconds()
+            runtime = (self.clock.now() - self.start_time).total_seconds()
             self.total_runtime += runtime
         
         # ✅ Callback'leri kaldır
@@ -86,6 +96,7 @@ class MetalModule:
         
         # ESP32'ye dur komutu
         self.esp32.send_command("stop")
+        self._journal_state()
         
         logger.info(f"⏹ Metal modülü durdu (Toplam: {self.metal_count} metal, {self.total_runtime:.1f}s)")
         return True
@@ -106,9 +117,10 @@ class MetalModule:
         
         # API'ye gönder (her yeni metal algılamada)
         if self.metal_count != self.last_sent_count:
-            wc_product_id = self._send_to_api_get_product_id()
+            wc_product_id = self.api.get_product_id(self.wc_id)
             self._send_to_api(wc_product_id=wc_product_id)
             self.last_sent_count = self.metal_count
+        self._journal_state()
         
         # GUI güncelle
         if self.on_metal_detected:
@@ -116,95 +128,13 @@ class MetalModule:
     
     def _send_to_api(self, wc_product_id=None):
         """Metal algılamayı API'ye gönder"""
-        try:
-            headers = {
-                'apiKey': API_KEY,
-                'Content-Type': 'application/json'
-            }
-            
-            # Runtime ve hız hesapla
-            runtime = 0
-            if self.start_time:
-                runtime = (datetime.now() - self.start_time).total_seconds()
-            rate = (self.metal_count / runtime * 60) if runtime > 0 else 0
-            
-            # ✅ DÜZELTME: speed_rpm parametresi düzgün
-            data = {
-                "session_id": self.session_id,
-                "wc_id": self.wc_id,
-                "quantity": 1,
-                "product_id": wc_product_id,
-                "speed_rpm": self.speed_rpm,  # ✅ PWM değeri buraya yazılıyor
-            }
-            
-            logger.debug(f"API POST: {data}")
-            
-            response = requests.post(
-                API_ENDPOINTS['conveyor'],  # Metal için de prodEvent endpoint
-                json=data,
-                headers=headers,
-                timeout=5
-            )
-            
-            if response.status_code in [200, 201, 501]:
-                logger.info(f"✅ Metal API başarılı: count={self.metal_count}, rate={rate:.1f}/min, speed={self.speed_rpm}")
-            else:
-                logger.warning(f"⚠️ Metal API hatası: HTTP {response.status_code}")
-                
-        except requests.exceptions.Timeout:
-            logger.error("❌ Metal API timeout")
-        except Exception as e:
-            logger.error(f"❌ Metal API hatası: {e}")
+        # Metal için de prodEvent endpoint
+        result = self.api.post_prod_event(self.session_id, self.wc_id, 1, wc_product_id,
+                                          self.speed_rpm, endpoint='conveyor')
+        if result.ok and not result.queued:
+            stats = self.get_statistics()
+            logger.info(f"✅ Metal API başarılı: count={self.metal_count}, rate={stats['rate_per_minute']:.1f}/min, speed={self.speed_rpm}")
     
-    def _send_to_api_get_product_id(self):
-        """Ürün ID'sini API'den al - DÜZELTILMIŞ VERSİYON"""
-        try:
-            headers = {
-                'apiKey': API_KEY,
-                'Content-Type': 'application/json'
-            }
-            url = f"{API_ENDPOINTS['wc_id_name']}/{self.wc_id}"
-            
-            response = requests.get(
-                url,
-                headers=headers,
-                timeout=5
-            )
-            
-            logger.debug(f"Product ID API - Status: {response.status_code}, URL: {url}")
-            
-            # ✅ DÜZELTME: 200 ile 201'i kontrol et
-            if response.status_code in [200, 201]:
-                try:
-                    data = response.json()
-                    product_id = data.get('product_id', None)
-                    
-                    if product_id is not None:
-                        logger.info(f"✅ Ürün ID alındı: {product_id}")
-                        return product_id
-                    else:
-                        logger.warning(f"⚠️ Ürün ID bulunamadı. API Yanıtı: {data}")
-                        return None
-                        
-                except ValueError as e:
-                    logger.error(f"❌ JSON parse hatası: {e}")
-                    logger.debug(f"Response text: {response.text}")
-                    return None
-            else:
-                logger.warning(f"⚠️ Ürün ID API hatası: HTTP {response.status_code}")
-                logger.debug(f"Response: {response.text}")
-                return None
-                
-        except requests.exceptions.Timeout:
-            logger.error("❌ API timeout (5s)")
-            return None
-        except requests.exceptions.ConnectionError:
-            logger.error("❌ API bağlantı hatası")
-            return None
-        except Exception as e:
-            logger.error(f"❌ Ürün ID API hatası: {e}")
-            return None
-                
     def reset_counter(self):
         """Sayacı sıfırla"""
         old_count = self.metal_count
@@ -212,18 +142,38 @@ class MetalModule:
         self.last_sent_count = 0
         
         if self.running:
-            self.start_time = datetime.now()
+            self.start_time = self.clock.now()
+        self._journal_state()
         
         logger.info(f"🔄 Metal sayacı sıfırlandı (eski: {old_count})")
         
         if self.on_metal_detected:
             self.on_metal_detected(0)
     
+    def _journal_state(self):
+        """Sayaç durumunu journal'a yaz"""
+        if self.journal:
+            self.journal.record('metal', running=self.running, metal_count=self.metal_count,
+                                last_sent_count=self.last_sent_count, total_runtime=self.total_runtime)
+    
+    def _apply_state(self, state):
+        self.metal_count = state.get('metal_count', 0)
+        self.last_sent_count = state.get('last_sent_count', self.metal_count)
+        self.total_runtime = state.get('total_runtime', 0)
+    
+    def restore_state(self, state):
+        """Yeniden başlatma sonrası journal'daki sayaçları geri yükle (modül çalışmıyorken)"""
+        self._apply_state(state)
+        self._journal_state()
+        logger.info(f"♻️ Metal sayacı geri yüklendi: {self.metal_count}")
+        if self.on_metal_detected:
+            self.on_metal_detected(self.metal_count)
+    
     def get_statistics(self):
         """Anlık istatistikler"""
         runtime = 0
         if self.start_time and self.running:
-            runtime = (datetime.now() - self.start_time).total_seconds()
+            runtime = (self.clock.now() - self.start_time).total_seconds()
         
         rate = (self.metal_count / runtime * 60) if runtime > 0 else 0
         
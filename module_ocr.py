@@ -6,6 +6,8 @@ MODÜL: OCR (Optical Character Recognition)
 - MANUEL OKUMA: Sadece "OKU" butonuna basıldığında çalışır
 - Tesseract OCR kullanarak metin okuma
 - Session ve API gerekmez
+- Kamera paylaşılan servisten (camera_service) alınır - ColorModule ile
+  aynı cihaz, modül değişiminde yeniden açılmaz
 """
 
 import cv2
@@ -15,6 +17,8 @@ from PIL import Image
 import time
 from threading import Thread
 
+from camera_service import get_camera_service
+
 try:
     import pytesseract
     # Windows için Tesseract path (gerekirse değiştirin)
@@ -30,14 +34,15 @@ logger = logging.getLogger(__name__)
 class OCRModule:
     """OCR Modülü - Manuel kamera ile yazı okuma"""
     
-    def __init__(self, esp32_comm=None, camera_index=0):
+    def __init__(self, esp32_comm=None, camera_index=0, camera=None):
         self.esp32 = esp32_comm
         self.running = False
         
-        # Kamera
-        self.camera = None
+        # Kamera (camera_service.CameraService - ColorModule ile paylaşılır)
+        self.camera = camera or get_camera_service(camera_index)
         self.camera_index = camera_index
         self.camera_running = False
+        self.shown_seq = 0
         
         # OCR ayarları
         self.ocr_language = 'tur'  # Tesseract dil kodu (eng=İngilizce, tur=Türkçe)
@@ -51,7 +56,7 @@ class OCRModule:
         self.on_text_update = None
         self.on_reading_status = None  # Okuma durumu callback'i
         
-        # İşlenmiş frame
+        # Son kamera karesi (BGR, servisle paylaşılan - salt okunur)
         self.current_frame = None
         
         # Preprocessing ayarları
@@ -99,30 +104,21 @@ class OCRModule:
         return True
     
     def _start_camera(self):
-        """Kamerayı başlat"""
-        try:
-            self.camera = cv2.VideoCapture(self.camera_index)
-            if not self.camera.isOpened():
-                raise Exception("Kamera açılamadı")
-            
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.camera.set(cv2.CAP_PROP_FPS, 30)
-            
-            self.camera_running = True
-            logger.info("📹 Kamera başladı")
-            
-        except Exception as e:
-            logger.error(f"Kamera hatası: {e}")
-            self.camera = None
+        """Paylaşılan kameraya bağlan"""
+        if not self.camera.acquire():
+            logger.error("Kamera hatası: kamera açılamadı")
+            return
+        
+        self.camera_running = True
+        logger.info("📹 Kamera başladı")
     
     def _stop_camera(self):
-        """Kamerayı durdur"""
-        self.camera_running = False
-        if self.camera:
+        """Kamerayı bırak (servis açık tutabilir)"""
+        if self.camera_running:
+            self.camera_running = False
             self.camera.release()
-            self.camera = None
             logger.info("📹 Kamera durdu")
+        self.current_frame = None
     
     def _preprocess_for_ocr(self, frame):
         """Frame'i OCR için hazırla"""
@@ -130,7 +126,7 @@ class OCRModule:
             return None
         
         # Gri tonlamaya çevir
-        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         
         if self.use_preprocessing:
             # Gaussian blur (gürültü azaltma)
@@ -221,22 +217,20 @@ class OCRModule:
     
     def get_camera_frame(self):
         """Kamera frame'i al (GUI için) - OCR YAPMA, sadece görüntüyü göster"""
-        if not self.camera_running or not self.camera:
+        if not self.camera_running:
             return None
         
         try:
-            ret, frame = self.camera.read()
-            if not ret:
+            # Son çağrıdan beri yeni kare yoksa None (GUI aynı kareyi tekrar çizmez)
+            frame, self.shown_seq = self.camera.newer(self.shown_seq)
+            if frame is None:
                 return None
             
-            # BGR -> RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # Mevcut frame'i sakla (OKU butonuna basıldığında kullanılacak)
-            self.current_frame = frame_rgb.copy()
+            # Mevcut frame'i sakla (OKU butonuna basıldığında kullanılacak - kopya yok)
+            self.current_frame = frame
             
-            # Frame'e durum bilgisi yaz
-            result_frame = frame_rgb.copy()
+            # BGR -> RGB (gösterim kopyası, durum bilgisi buna yazılır)
+            result_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             
             # Durum bilgisi (üst köşe)
             if self.is_reading:
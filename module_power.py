@@ -7,10 +7,10 @@ MODÜL 1: Akım ve Güç Ölçümü
 - wc_id = 1
 """
 
-import requests
 import logging
 from datetime import datetime
-from config import API_ENDPOINTS, API_KEY, WC_IDS
+from config import WC_IDS
+from api_client import get_client
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +18,9 @@ logger = logging.getLogger(__name__)
 class PowerModule:
     """Akım ve Güç Ölçüm Modülü"""
     
-    def __init__(self, esp32_comm):
+    def __init__(self, esp32_comm, api=None):
         self.esp32 = esp32_comm
+        self.api = api or get_client()  # api_client.MESApiClient
         self.wc_id = WC_IDS['power']  # wc_id = 1
         self.session_id = 0
         self.running = False
@@ -102,34 +103,10 @@ class PowerModule:
     
     def _send_to_api(self):
         """Enerji verilerini API'ye gönder"""
-        try:
-            headers = {
-                'apiKey': f'{API_KEY}',
-                'Content-Type': 'application/json'
-            }
-            
-            data = {
-                "wc_id": self.wc_id,
-                "voltage_v": self.voltage_v,
-                "current_a": self.current_a,
-                "power_w": self.power_w,
-                "session_id": self.session_id,
-            }
-            
-            response = requests.post(
-                API_ENDPOINTS['energy'],
-                json=data,
-                headers=headers,
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"✅ Energy API: {self.current_a:.2f}A, {self.power_w:.1f}W")
-            else:
-                logger.warning(f"⚠️ Energy API hatası: {response.status_code} - {response.text}")
-                
-        except Exception as e:
-            logger.error(f"❌ Energy API gönderme hatası: {e}")
+        result = self.api.post_energy(self.session_id, self.wc_id, self.voltage_v,
+                                      self.current_a, self.power_w)
+        if result.ok and not result.queued:
+            logger.info(f"✅ Energy API: {self.current_a:.2f}A, {self.power_w:.1f}W")
     
     def get_current_data(self):
         """Mevcut ölçüm verilerini döndür"""
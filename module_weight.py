@@ -7,12 +7,14 @@ MODÜL 4: Ağırlık Ölçümü (DÜZELTILMIŞ)
 - wc_id = 4
 - PWM/speed_rpm entegrasyonlu
 - YENI: measurements_needed parametresi (default 8)
+- Ölçümler array('d') içinde (float nesnesi tutulmaz, bellek sabit)
 """
 
-import requests
 import logging
+from array import array
 from datetime import datetime
-from config import API_ENDPOINTS, API_KEY, WC_IDS
+from config import WC_IDS
+from api_client import get_client
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +22,9 @@ logger = logging.getLogger(__name__)
 class WeightModule:
     """Ağırlık Ölçüm Modülü"""
     
-    def __init__(self, esp32_comm, measurements_needed=8):
+    def __init__(self, esp32_comm, measurements_needed=8, api=None):
         self.esp32 = esp32_comm
+        self.api = api or get_client()  # api_client.MESApiClient
         self.wc_id = WC_IDS['weight']
         self.session_id = 0
         self.running = False
@@ -39,7 +42,7 @@ class WeightModule:
         
         # ✅ YENI: Sabit sayıda ölçüm sistemi
         self.measurements_needed = measurements_needed  # Kaç ölçüm lazım? (default: 8)
-        self.measurement_list = []  # Ölçülen değerleri topla
+        self.measurement_list = array('d')  # Ölçülen değerleri topla
         self.last_display_weight = 0.0  # Ekranda gösterilecek son ağırlık
         
         # İstatistikler
@@ -51,10 +54,13 @@ class WeightModule:
         # Callback'ler
         self.on_weight_update = None
         
+        # Çökmeye dayanıklı istatistikler (GUI event_journal.EventJournal atar)
+        self.journal = None
+        
         logger.info(f"Ağırlık Modülü oluşturuldu (wc_id={self.wc_id}, measurements_needed={measurements_needed})")
     
-    def start(self, session_id):
-        """Modülü başlat"""
+    def start(self, session_id, state=None):
+        """Modülü başlat (state: journal'dan geri yüklenen tara ve istatistikler - verilirse sıfırlanmaz)"""
         if self.running:
             logger.warning("Ağırlık modülü zaten çalışıyor")
             return False
@@ -68,8 +74,14 @@ class WeightModule:
         # ✅ PWM callback'ini kaydet
         self.esp32.register_callback('pwm', self._on_pwm_changed)
         
-        # İstatistikleri sıfırla
-        self.reset_statistics()
+        # İstatistikleri sıfırla (yeniden başlatmada journal'daki değerlerle başla)
+        if state:
+            self._apply_state(state)
+            self._journal_state()
+            if self.on_weight_update:
+                self.on_weight_update(0.0)
+        else:
+            self.reset_statistics()
         
         logger.info(f"✅ Ağırlık modülü başladı (session_id={session_id})")
         return True
@@ -86,6 +98,7 @@ class WeightModule:
         
         # ✅ PWM callback'ini kaldır
         self.esp32.unregister_callback('pwm')
+        self._journal_state()
         
         logger.info("⏹ Ağırlık modülü durdu")
         return True
@@ -115,7 +128,7 @@ class WeightModule:
                 # ✅ YENI ÜRÜN ALGILANDI
                 self.weight_detected = True
                 self.weight_sent = False
-                self.measurement_list = []  # Yeni ölçümleri başlat
+                del self.measurement_list[:]  # Yeni ölçümleri başlat
                 self.last_display_weight = self.current_weight
                 
                 # ✅ ÖNEMLİ: İstatistikleri sıfırla (yeni ürün için)
@@ -142,7 +155,7 @@ class WeightModule:
                     self.last_display_weight = average_weight
                     
                     logger.info(f"✅ {self.measurements_needed} ölçüm tamamlandı! Ortalama: {average_weight:.1f}g → API'ye gönderiliyor...")
-                    wc_product_id = self._send_to_api_get_product_id()
+                    wc_product_id = self.api.get_product_id(self.wc_id)
                     self._send_to_api(wc_product_id=wc_product_id, weight_to_send=average_weight)
                     self.weight_sent = True
                     logger.info(f"✅ ORTALAMA EKRANA SABİT KALDI: {self.last_display_weight:.1f}g")
@@ -157,7 +170,7 @@ class WeightModule:
                 logger.info(f"✅ Ekran değeri sabit kaldı: {self.last_display_weight:.1f}g (Yeni ürün bekliyor)")
                 self.weight_detected = False
                 self.weight_sent = False
-                self.measurement_list = []
+                del self.measurement_list[:]
         
         # GUI güncelle (her zaman mevcut/son değeri göster)
         if self.on_weight_update:
@@ -176,93 +189,18 @@ class WeightModule:
         
         if weight > self.max_weight:
             self.max_weight = weight
+        
+        self._journal_state()
 
-    def _send_to_api_get_product_id(self):
-        """Ürün ID'sini API'den al - DÜZELTILMIŞ VERSİYON"""
-        try:
-            headers = {
-                'apiKey': API_KEY,
-                'Content-Type': 'application/json'
-            }
-            url = f"{API_ENDPOINTS['wc_id_name']}/{self.wc_id}"
-            
-            response = requests.get(
-                url,
-                headers=headers,
-                timeout=5
-            )
-            
-            logger.debug(f"Product ID API - Status: {response.status_code}, URL: {url}")
-            
-            # ✅ DÜZELTME: 200 ile 201'i kontrol et
-            if response.status_code in [200, 201]:
-                try:
-                    data = response.json()
-                    product_id = data.get('product_id', None)
-                    
-                    if product_id is not None:
-                        logger.info(f"✅ Ürün ID alındı: {product_id}")
-                        return product_id
-                    else:
-                        logger.warning(f"⚠️ Ürün ID bulunamadı. API Yanıtı: {data}")
-                        return None
-                        
-                except ValueError as e:
-                    logger.error(f"❌ JSON parse hatası: {e}")
-                    logger.debug(f"Response text: {response.text}")
-                    return None
-            else:
-                logger.warning(f"⚠️ Ürün ID API hatası: HTTP {response.status_code}")
-                logger.debug(f"Response: {response.text}")
-                return None
-                
-        except requests.exceptions.Timeout:
-            logger.error("❌ API timeout (5s)")
-            return None
-        except requests.exceptions.ConnectionError:
-            logger.error("❌ API bağlantı hatası")
-            return None
-        except Exception as e:
-            logger.error(f"❌ Ürün ID API hatası: {e}")
-            return None
-    
     def _send_to_api(self, wc_product_id=None, weight_to_send=None):
         """Ağırlık verisini API'ye gönder"""
-        try:
-            headers = {
-                'apiKey': API_KEY, 
-                'Content-Type': 'application/json'
-            }
-            
-            # ✅ weight_to_send parametresi (ortalama ağırlık)
-            data = {
-                "session_id": self.session_id,
-                "wc_id": self.wc_id,
-                "quantity": weight_to_send if weight_to_send is not None else self.current_weight,
-                "product_id": wc_product_id,
-                "speed_rpm": self.speed_rpm  # ✅ PWM değeri
-            }
-            
-            logger.debug(f"API POST: {data}")
-            
-            response = requests.post(
-                API_ENDPOINTS['weight'],
-                json=data,
-                headers=headers,
-                timeout=5
-            )
-            
-            if response.status_code in [200, 201]:
-                logger.info(f"✅ Weight API başarılı: {weight_to_send:.1f}g, Product ID: {wc_product_id}, Speed: {self.speed_rpm}")
-            else:
-                logger.warning(f"⚠️ Weight API hatası: HTTP {response.status_code}")
-                logger.debug(f"Response: {response.text}")
-                
-        except requests.exceptions.Timeout:
-            logger.error("❌ Weight API timeout")
-        except Exception as e:
-            logger.error(f"❌ Weight API hatası: {e}")
-        
+        # ✅ weight_to_send parametresi (ortalama ağırlık)
+        quantity = weight_to_send if weight_to_send is not None else self.current_weight
+        result = self.api.post_prod_event(self.session_id, self.wc_id, quantity, wc_product_id,
+                                          self.speed_rpm, endpoint='weight')
+        if result.ok and not result.queued:
+            logger.info(f"✅ Weight API başarılı: {quantity:.1f}g, Product ID: {wc_product_id}, Speed: {self.speed_rpm}")
+    
     def tare(self):
         """Tara al (sıfırlama)"""
         self.tare_value = self.current_weight + self.tare_value
@@ -271,7 +209,7 @@ class WeightModule:
         # ✅ Ağırlık algılama durumunu sıfırla
         self.weight_detected = False
         self.weight_sent = False
-        self.measurement_list = []
+        del self.measurement_list[:]
         self.last_display_weight = 0.0
         
         logger.info(f"Tara alındı: {self.tare_value:.1f} g")
@@ -287,8 +225,32 @@ class WeightModule:
         self.max_weight = float('-inf')
         self.total_weight = 0.0
         self.measurement_count = 0
+        self._journal_state()
         logger.info("İstatistikler sıfırlandı")
     
+    def _journal_state(self):
+        """Tara ve istatistikleri journal'a yaz"""
+        if self.journal:
+            self.journal.record('weight', running=self.running, tare_value=self.tare_value,
+                                min_weight=self.min_weight, max_weight=self.max_weight,
+                                total_weight=self.total_weight, measurement_count=self.measurement_count)
+    
+    def _apply_state(self, state):
+        self.tare_value = state.get('tare_value', 0.0)
+        self.min_weight = state.get('min_weight', float('inf'))
+        self.max_weight = state.get('max_weight', float('-inf'))
+        self.total_weight = state.get('total_weight', 0.0)
+        self.measurement_count = state.get('measurement_count', 0)
+    
+    def restore_state(self, state):
+        """Yeniden başlatma sonrası journal'daki tara ve istatistikleri geri yükle (modül çalışmıyorken)"""
+        self._apply_state(state)
+        self._journal_state()
+        logger.info(f"♻️ Ağırlık istatistikleri geri yüklendi (tara={self.tare_value:.1f} g, "
+                    f"{self.measurement_count} ölçüm)")
+        if self.on_weight_update:
+            self.on_weight_update(0.0)
+    
     def get_statistics(self):
         """İstatistikleri döndür"""
         avg_weight = self.total_weight / self.measurement_count if self.measurement_count > 0 else 0.0
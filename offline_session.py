@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline Session (API erişilemezken yerel çalışma)
+- startSession'a ulaşılamazsa yerel, negatif bir session ID verilir
+- Bu session'ın tüm olayları (prodEvent, energy, faultEvent) diskteki
+  JSON-lines dosyasına yazılır (session başına bir dosya)
+- Bağlantı gelince eşitlenir: startSession → toplu olaylar → endSession
+  * Sayım prodEvent'leri (product, conveyor) (endpoint, wc_id, product_id)
+    bazında tek kayıtta toplanır
+  * Ağırlık prodEvent'leri (gram ölçümü) tek tek gönderilir - toplanmaz
+  * energy ölçümleri OFFLINE_ENERGY_BUCKET aralıklarında ortalanır
+  * faultEvent'ler tek tek gönderilir
+- Her toplu kayıt sabit idempotency anahtarıyla gider; yarım kalan eşitleme
+  tekrar çalışırsa aynı olay iki kez sayılmaz
+- Her offline session'ın eşitlemesi boyunca (session başına ayrı ayrı) session
+  başlatma hattı ayrılır: aynı wc_id'de canlı session sunucu session'ıyla
+  yarışmaz, bu sırada okutulan kart sıraya alınır ve eşitleme biter bitmez
+  başlatılır; ID'si çözülemeyen sunucu session'ı kapatılır ya da dosyaya
+  işlenip sonraki denemede kapatılır
+"""
+
+import os
+import json
+import time
+import logging
+from threading import Thread, Lock, Event
+
+from api_client import get_client
+from session_pipeline import SessionStarter
+from config import (OFFLINE_SPOOL_DIR, OFFLINE_RECONCILE_INTERVAL, OFFLINE_ENERGY_BUCKET)
+
+logger = logging.getLogger(__name__)
+
+COUNT_ENDPOINTS = ('product', 'conveyor')   # quantity adet - toplanabilir
+MEASURE_ENDPOINTS = ('weight',)             # quantity ölçüm (gram) - tek tek gönderilir
+
+
+class OfflineSessionStore:
+    """Offline session olaylarının disk deposu"""
+
+    def __init__(self, directory=OFFLINE_SPOOL_DIR):
+        self.directory = directory
+        self.lock = Lock()
+        self.open_files = {}  # local_id → dosya (bu süreçte açık session'lar)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, local_id, suffix='jsonl'):
+        return os.path.join(self.directory, f"session_{-local_id}.{suffix}")
+
+    def _write(self, handle, record):
+        handle.write(json.dumps(record, ensure_ascii=False) + '\n')
+        handle.flush()
+
+    def open_session(self, card_uid, wc_id):
+        """Yeni yerel session aç, negatif session ID döndür"""
+        with self.lock:
+            local_id = -int(time.time())
+            while os.path.exists(self._path(local_id)) or os.path.exists(self._path(local_id, 'synced')):
+                local_id -= 1
+
+            handle = open(self._path(local_id), 'a', encoding='utf-8')
+            self._write(handle, {
+                'type': 'start',
+                'local_id': local_id,
+                'card_uid': card_uid,
+                'wc_id': wc_id,
+                'ts': time.time()
+            })
+            self.open_files[local_id] = handle
+
+        logger.warning(f"📴 Offline session açıldı: ID={local_id}, WC={wc_id}, Kart={card_uid}")
+        return local_id
+
+    def reopen_session(self, local_id):
+        """Yeniden başlatma öncesi açık kalan yerel session'a yazmaya devam et"""
+        with self.lock:
+            if local_id in self.open_files:
+                return True
+            if not os.path.exists(self._path(local_id)):
+                return False
+            self.open_files[local_id] = open(self._path(local_id), 'a', encoding='utf-8')
+
+        logger.info(f"📴 Offline session sürdürülüyor: ID={local_id}")
+        return True
+
+    def record(self, local_id, endpoint, data):
+        """Olayı yerel session'a yaz (session açık değilse False)"""
+        with self.lock:
+            handle = self.open_files.get(local_id)
+            if handle is None:
+                return False
+            self._write(handle, {'type': 'event', 'endpoint': endpoint, 'data': data, 'ts': time.time()})
+        return True
+
+    def close_session(self, local_id):
+        """Yerel session'ı kapat - artık eşitlenebilir"""
+        with self.lock:
+            handle = self.open_files.pop(local_id, None)
+            if handle is None:
+                return False
+            self._write(handle, {'type': 'end', 'ts': time.time()})
+            handle.close()
+
+        logger.info(f"📴 Offline session kapandı: ID={local_id}")
+        return True
+
+    def mark_server_session(self, local_id, session_id):
+        """Eşitleme sırasında alınan sunucu session ID'sini kaydet (yarım kalırsa tekrar kullanılır)"""
+        with self.lock:
+            with open(self._path(local_id), 'a', encoding='utf-8') as handle:
+                self._write(handle, {'type': 'server', 'session_id': session_id, 'ts': time.time()})
+
+    def mark_unresolved(self, local_id, closed_id=None):
+        """
+        Sunucuda açılıp ID'si çözülemeyen session'ı kaydet (closed_id=None),
+        ya da sonradan kapatıldığını işle
+        """
+        record = {'type': 'unresolved', 'ts': time.time()} if closed_id is None else \
+            {'type': 'unresolved_closed', 'session_id': closed_id, 'ts': time.time()}
+        with self.lock:
+            with open(self._path(local_id), 'a', encoding='utf-8') as handle:
+                self._write(handle, record)
+
+    def mark_synced(self, local_id):
+        with self.lock:
+            os.replace(self._path(local_id), self._path(local_id, 'synced'))
+
+    def pending_sessions(self):
+        """Eşitlenmeyi bekleyen yerel session ID'leri (en eskisi önce)"""
+        with self.lock:
+            active = set(self.open_files)
+
+        pending = []
+        for name in os.listdir(self.directory):
+            if not (name.startswith('session_') and name.endswith('.jsonl')):
+                continue
+            try:
+                local_id = -int(name[len('session_'):-len('.jsonl')])
+            except ValueError:
+                continue
+            # Bu süreçte hâlâ açık olanlar hariç (çökme sonrası kalanlar da eşitlenir)
+            if local_id not in active:
+                pending.append(local_id)
+        return sorted(pending, reverse=True)
+
+    def load(self, local_id):
+        """Session dosyasını oku (yarım yazılmış son satır atlanır)"""
+        records = []
+        with self.lock:
+            with open(self._path(local_id), encoding='utf-8') as handle:
+                for line in handle:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        logger.warning(f"⚠️ Bozuk offline kayıt atlandı: session={local_id}")
+        return records
+
+
+def aggregate_events(events, energy_bucket=OFFLINE_ENERGY_BUCKET):
+    """
+    Offline olayları toplu gönderime indir.
+    Dönüş: (prod, measures, energy, faults)
+    - prod: {(endpoint, wc_id, product_id): {'quantity', 'speed_rpm'}} - sayım toplamları
+    - measures: [(endpoint, data)] - ağırlık ölçümleri, sırayla
+    - energy: [(wc_id, voltage_v, current_a, power_w)] - bucket ortalamaları
+    - faults: [data]
+    """
+    prod = {}
+    measures = []
+    buckets = {}
+    faults = []
+
+    for event in events:
+        endpoint = event['endpoint']
+        data = event['data']
+
+        if endpoint in MEASURE_ENDPOINTS:
+            measures.append((endpoint, data))
+
+        elif endpoint in COUNT_ENDPOINTS:
+            key = (endpoint, data.get('wc_id'), data.get('product_id'))
+            entry = prod.setdefault(key, {'quantity': 0, 'speed_rpm': 0})
+            entry['quantity'] += data.get('quantity') or 0
+            if data.get('speed_rpm'):
+                entry['speed_rpm'] = data['speed_rpm']
+
+        elif endpoint == 'energy':
+            key = (data.get('wc_id'), int(event['ts'] // energy_bucket))
+            bucket = buckets.setdefault(key, [0.0, 0.0, 0.0, 0])
+            bucket[0] += data.get('voltage_v') or 0
+            bucket[1] += data.get('current_a') or 0
+            bucket[2] += data.get('power_w') or 0
+            bucket[3] += 1
+
+        elif endpoint == 'fault':
+            faults.append(data)
+
+    energy = [(wc_id, v / n, a / n, p / n)
+              for (wc_id, _), (v, a, p, n) in sorted(buckets.items(), key=lambda item: item[0][1])]
+    return prod, measures, energy, faults
+
+
+class OfflineReconciler:
+    """Bekleyen offline session'ları arka planda sunucuya eşitler"""
+
+    def __init__(self, store, api=None, starter=None, interval=OFFLINE_RECONCILE_INTERVAL,
+                 can_reconcile=None):
+        self.store = store
+        self.api = api or get_client()
+        self.starter = starter or SessionStarter(self.api)
+        self.interval = interval
+        # can_reconcile(wc_id) → bool: o istasyonda canlı session varken sunucuda
+        # yeni session açılmasın (sunucu aynı wc_id'deki açık session'ı kapatır)
+        self.can_reconcile = can_reconcile
+
+        self.running = False
+        self.wake_event = Event()
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        logger.info("✅ Offline eşitleyici başladı")
+
+    def stop(self):
+        self.running = False
+        self.wake_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+
+    def wake(self):
+        """Beklemeden eşitleme dene (örn. offline session kapandığında)"""
+        self.wake_event.set()
+
+    def _loop(self):
+        while self.running:
+            try:
+                self.reconcile_all()
+            except Exception as e:
+                logger.error(f"❌ Offline eşitleme hatası: {e}")
+            self.wake_event.wait(self.interval)
+            self.wake_event.clear()
+
+    def reconcile_all(self):
+        """Tüm bekleyen session'ları eşitle; sunucu erişilemezse ilk hatada dur"""
+        synced = 0
+        for local_id in self.store.pending_sessions():
+            result = self.reconcile(local_id)
+            if result is False:
+                break
+            if result:
+                synced += 1
+        return synced
+
+    def reconcile(self, local_id):
+        """
+        Tek bir offline session'ı eşitle.
+        Dönüş: True (eşitlendi), None (şimdilik atlandı), False (sunucu hatası)
+        """
+        records = self.store.load(local_id)
+        if not records or records[0].get('type') != 'start':
+            logger.error(f"❌ Offline session başlığı yok, atlanıyor: {local_id}")
+            return None
+
+        header = records[0]
+        wc_id = header['wc_id']
+        if self.can_reconcile and not self.can_reconcile(wc_id):
+            return None
+        # Sunucu session'ı açıkken canlı session başlatılmasın - okutulan kart sıraya alınır,
+        # release() ile bu session biter bitmez başlatılır (sonraki session'lar beklemez)
+        if not self.starter.claim():
+            return None
+        try:
+            return self._reconcile(local_id, records)
+        finally:
+            self.starter.release()
+
+    def _reconcile(self, local_id, records):
+        header = records[0]
+        wc_id = header['wc_id']
+        events = [r for r in records if r.get('type') == 'event']
+        session_id = None
+        unresolved = False
+        for r in records:
+            if r.get('type') == 'server':
+                session_id = r['session_id']
+            elif r.get('type') in ('unresolved', 'unresolved_closed'):
+                unresolved = r['type'] == 'unresolved'
+
+        t0 = time.monotonic()
+
+        # 1) Sunucuda session aç (yarım kalmış eşitlemede mevcut ID kullanılır)
+        if session_id is None:
+            if unresolved:
+                self._close_unresolved(local_id, wc_id)
+            started = self.starter.resolve(header['card_uid'], wc_id)
+            if not started.ok:
+                logger.warning(f"⚠️ Offline session eşitlenemedi ({local_id}): {started.error}")
+                if started.started:
+                    self.store.mark_unresolved(local_id)
+                    self._close_unresolved(local_id, wc_id)
+                return False
+            session_id = started.session_id
+            self.store.mark_server_session(local_id, session_id)
+
+        # 2) Toplu olaylar - anahtar: yerel ID + sıra (tekrar denemede aynı)
+        prod, measures, energy, faults = aggregate_events(events)
+        n = 0
+
+        for (endpoint, event_wc_id, product_id), entry in prod.items():
+            if product_id is None:
+                product_id = self.api.get_product_id(event_wc_id)
+            result = self.api.post_prod_event(session_id, event_wc_id, entry['quantity'], product_id,
+                                              entry['speed_rpm'], endpoint=endpoint,
+                                              idempotency_key=f"offline{local_id}-{n}", wait=True)
+            if not result.ok:
+                return False
+            n += 1
+
+        for endpoint, data in measures:
+            product_id = data.get('product_id')
+            if product_id is None:
+                product_id = self.api.get_product_id(data.get('wc_id'))
+            result = self.api.post_prod_event(session_id, data.get('wc_id'), data.get('quantity'), product_id,
+                                              data.get('speed_rpm'), endpoint=endpoint,
+                                              idempotency_key=f"offline{local_id}-{n}", wait=True)
+            if not result.ok:
+                return False
+            n += 1
+
+        for event_wc_id, voltage_v, current_a, power_w in energy:
+            result = self.api.post_energy(session_id, event_wc_id, round(voltage_v, 3), round(current_a, 3),
+                                          round(power_w, 3), idempotency_key=f"offline{local_id}-{n}", wait=True)
+            if not result.ok:
+                return False
+            n += 1
+
+        for data in faults:
+            result = self.api.post_fault(session_id, data.get('wc_id'), data.get('fault_type_id'),
+                                         data.get('start_ts'), data.get('end_ts'),
+                                         idempotency_key=f"offline{local_id}-{n}", wait=True)
+            if not result.ok:
+                return False
+            n += 1
+
+        # 3) Session'ı kapat
+        result = self.api.end_session(session_id)
+        if not result.ok:
+            return False
+
+        self.store.mark_synced(local_id)
+        self.starter.forget(wc_id, session_id)
+        logger.info(f"✅ Offline session eşitlendi: {local_id} → {session_id} "
+                    f"({len(events)} olay → {n} istek, {(time.monotonic() - t0) * 1000:.0f} ms)")
+        return True
+
+    def _close_unresolved(self, local_id, wc_id):
+        """
+        ID'si çözülemeyen sunucu session'ını kapat: hat ayrılmış ve istasyonda canlı
+        session yok, o wc_id'de açık görünen yeni session eşitlemenin kendisidir
+        """
+        current = self.api.get_current_session_id(wc_id)
+        stale_id = self.starter.last_session_ids.get(wc_id)
+        if not current.ok or current.data <= 0 or current.data == stale_id:
+            logger.error(f"❌ Sunucu session'ı açık kalmış olabilir (ID bilinmiyor): "
+                         f"offline={local_id}, wc_id={wc_id} - sonraki denemede tekrar kapatılacak")
+            return False
+
+        if not self.api.end_session(current.data).ok:
+            return False
+        self.store.mark_unresolved(local_id, closed_id=current.data)
+        self.starter.forget(wc_id, current.data)
+        logger.info(f"🔒 ID'si çözülemeyen sunucu session'ı kapatıldı: {current.data} (offline={local_id})")
+        return True
+
+
+# Test
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    import tempfile
+
+    store = OfflineSessionStore(tempfile.mkdtemp())
+    api = get_client()
+    api.offline_store = store
+
+    local_id = store.open_session("TESTCARD", 2)
+    for _ in range(100):
+        api.post_prod_event(local_id, 2, 1, None, 120, endpoint='conveyor')
+    store.close_session(local_id)
+
+    print(f"Bekleyen: {store.pending_sessions()}")
+    reconciler = OfflineReconciler(store, api)
+    print(f"Eşitlenen: {reconciler.reconcile_all()}")
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Giden Telemetri Hız Sınırı (token bucket)
+- Her (endpoint, wc_id) çifti için ayrı kova: saniyede rate istek, en fazla burst
+- Sınır aşılınca politika:
+  * 'aggregate': prodEvent'ler bekletilir, quantity'ler toplanır ve kovada
+    jeton olunca tek istek olarak gönderilir (sayım kaybolmaz - yalnız sayım
+    endpoint'leri: product, conveyor)
+  * 'latest': bekleyen olay en yenisiyle değiştirilir (ölçüm değerleri, ör.
+    ağırlık gramı - toplanırsa anlamsızlaşır)
+  * 'queue': olaylar sırayla bekletilir, jeton geldikçe gönderilir, hiç atılmaz
+    (arıza gibi seyrek ve durum taşıyan kayıtlar - end_ts kaybolmamalı)
+  * 'drop': olay atılır, sayacı tutulur (enerji gibi örneklenebilir veriler)
+- Sınırlama istatistikleri GUI'de gösterilir
+"""
+
+import time
+import logging
+from threading import Thread, Lock, Event
+
+from config import RATE_LIMITS, RATE_LIMIT_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+AGGREGATE = 'aggregate'
+LATEST = 'latest'
+QUEUE = 'queue'
+DROP = 'drop'
+
+
+class TokenBucket:
+    """Klasik token bucket - saniyede rate jeton, en fazla capacity"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def try_take(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class LimitStats:
+    """(endpoint, wc_id) sınırlama sayaçları"""
+
+    __slots__ = ('allowed', 'aggregated', 'flushed', 'dropped')
+
+    def __init__(self):
+        self.allowed = 0      # Doğrudan geçen olay
+        self.aggregated = 0   # Bekletilip birleştirilen olay
+        self.flushed = 0      # Birleştirilmiş olarak gönderilen istek
+        self.dropped = 0      # Atılan olay
+
+
+class RateLimiter:
+    """Endpoint + wc_id bazlı hız sınırlayıcı"""
+
+    def __init__(self, limits=None, flush_interval=RATE_LIMIT_FLUSH_INTERVAL):
+        self.limits = dict(RATE_LIMITS if limits is None else limits)
+        self.flush_interval = flush_interval
+        self.lock = Lock()
+        self.buckets = {}   # (endpoint, wc_id) → TokenBucket
+        self.pending = {}   # (endpoint, wc_id, session_id, product_id) → birleşik data
+                            # (queue: (endpoint, wc_id, sıra no) → data)
+        self.queued = {}    # (endpoint, wc_id) → sırada bekleyen olay sayısı (queue)
+        self.queue_seq = 0
+        self.stats = {}     # (endpoint, wc_id) → LimitStats
+
+        self.flush = None   # flush(endpoint, data) - birleşik olayı gönderen fonksiyon
+        self.running = False
+        self.stop_event = Event()
+        self.thread = None
+
+    def _bucket(self, key):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            rate, burst, _ = self.limits[key[0]]
+            bucket = TokenBucket(rate, burst)
+            self.buckets[key] = bucket
+            self.stats[key] = LimitStats()
+        return bucket
+
+    def admit(self, endpoint, data):
+        """
+        Olay şimdi gönderilebilir mi?
+        True → gönder; False → bekletildi (aggregate) ya da atıldı (drop)
+        """
+        if endpoint not in self.limits:
+            return True
+
+        wc_id = data.get('wc_id')
+        key = (endpoint, wc_id)
+        policy = self.limits[endpoint][2]
+
+        with self.lock:
+            bucket = self._bucket(key)
+            stats = self.stats[key]
+
+            if policy in (AGGREGATE, LATEST):
+                agg_key = (endpoint, wc_id, data.get('session_id'), data.get('product_id'))
+                # Bekleyen birleşik olay varken sıra bozulmasın - bu da ona eklenir
+                if agg_key not in self.pending and bucket.try_take():
+                    stats.allowed += 1
+                    return True
+
+                merged = self.pending.get(agg_key)
+                if merged is None or policy == LATEST:
+                    self.pending[agg_key] = dict(data)
+                else:
+                    merged['quantity'] = (merged.get('quantity') or 0) + (data.get('quantity') or 0)
+                    if data.get('speed_rpm'):
+                        merged['speed_rpm'] = data['speed_rpm']
+                stats.aggregated += 1
+                return False
+
+            if policy == QUEUE:
+                # Sırada bekleyen varken öne geçilmez
+                if not self.queued.get(key) and bucket.try_take():
+                    stats.allowed += 1
+                    return True
+                self.queue_seq += 1
+                self.pending[(endpoint, wc_id, self.queue_seq)] = dict(data)
+                self.queued[key] = self.queued.get(key, 0) + 1
+                stats.aggregated += 1
+                return False
+
+            if bucket.try_take():
+                stats.allowed += 1
+                return True
+
+            stats.dropped += 1
+            if stats.dropped % 100 == 1:
+                logger.warning(f"⚠️ Hız sınırı: {endpoint} (wc_id={wc_id}) olay atıldı, toplam {stats.dropped}")
+            return False
+
+    def take_ready(self, force=False):
+        """Jetonu olan (force=True ise tüm) birleşik olayları kuyruktan al"""
+        ready = []
+        with self.lock:
+            for agg_key in list(self.pending):   # Ekleme sırasıyla (queue FIFO)
+                key = agg_key[:2]
+                if force or self._bucket(key).try_take():
+                    ready.append((agg_key[0], self.pending.pop(agg_key)))
+                    self.stats[key].flushed += 1
+                    if key in self.queued:
+                        self.queued[key] -= 1
+                        if not self.queued[key]:
+                            del self.queued[key]
+        return ready
+
+    def start(self, flush):
+        """Birleşik olayları periyodik gönderen thread'i başlat"""
+        if self.running:
+            return
+        self.flush = flush
+        self.running = True
+        self.stop_event.clear()
+        self.thread = Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Thread'i durdur, bekleyen birleşik olayları hemen gönder"""
+        if not self.running:
+            return
+        self.running = False
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+        self._flush(self.take_ready(force=True))
+
+    def _loop(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self._flush(self.take_ready())
+
+    def _flush(self, ready):
+        for endpoint, data in ready:
+            try:
+                self.flush(endpoint, data)
+            except Exception as e:
+                logger.error(f"❌ Birleşik olay gönderilemedi ({endpoint}): {e}")
+
+    def get_stats(self):
+        """{'endpoint/wc_id': {...}} ve toplamlar"""
+        with self.lock:
+            items = {f"{endpoint}/{wc_id}": {
+                'allowed': s.allowed,
+                'aggregated': s.aggregated,
+                'flushed': s.flushed,
+                'dropped': s.dropped,
+                'pending': sum(1 for k in self.pending if k[:2] == (endpoint, wc_id))
+            } for (endpoint, wc_id), s in self.stats.items()}
+
+        totals = {
+            'aggregated': sum(s['aggregated'] for s in items.values()),
+            'dropped': sum(s['dropped'] for s in items.values()),
+            'pending': sum(s['pending'] for s in items.values())
+        }
+        return {'endpoints': items, 'totals': totals}
+
+
+# Test
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    sent = []
+    limiter = RateLimiter()
+    limiter.start(lambda endpoint, data: sent.append((endpoint, data)))
+
+    for i in range(500):
+        conveyor = {'session_id': 1, 'wc_id': 2, 'quantity': 1, 'product_id': 102}
+        if limiter.admit('conveyor', conveyor):
+            sent.append(('conveyor', conveyor))
+        weight = {'session_id': 1, 'wc_id': 4, 'quantity': 150 + i % 10, 'product_id': 104}
+        if limiter.admit('weight', weight):
+            sent.append(('weight', weight))
+        if i % 20 == 0:
+            fault = {'session_id': 1, 'wc_id': 3, 'fault_type_id': 1, 'start_ts': i, 'end_ts': i + 1}
+            if limiter.admit('fault', fault):
+                sent.append(('fault', fault))
+        time.sleep(0.002)
+
+    limiter.stop()
+    conveyor = [data['quantity'] for endpoint, data in sent if endpoint == 'conveyor']
+    weights = [data['quantity'] for endpoint, data in sent if endpoint == 'weight']
+    faults = [data['start_ts'] for endpoint, data in sent if endpoint == 'fault']
+    print(f"Konveyör: {len(conveyor)} istek, toplam quantity {sum(conveyor)} (beklenen 500)")
+    print(f"Ağırlık: {len(weights)} istek, en büyük {max(weights)} g (toplanmamalı)")
+    print(f"Arıza: {len(faults)}/25 gönderildi, sıralı: {faults == sorted(faults)}")
+    print(limiter.get_stats())
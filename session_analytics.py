@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Session Analitiği (komut satırı aracı)
+- Girdi: session arşivi (session_archive.py) dizinleri ve/veya kaydedilmiş
+  ESP32 trafiği (her satır "<epoch saniye> <ESP32 mesajı>", ör. `ts '%.s'` çıktısı)
+- Her session için tek geçişte NumPy ile KPI'lar:
+  * tüketilen / üretilen enerji (power / production_w integrali, kWh)
+  * ürün/dakika ve ürünler arası süre dağılımı (Count)
+  * ağırlık ortalama / σ / Cpk (WeightModule ile aynı 8 ölçüm ortalaması)
+  * arıza sayıları ve MTTR (arıza → bir sonraki Count)
+- Session'lar süreç havuzunda paralel işlenir (binlerce session)
+- Modüllerin get_statistics() hesaplarını tek tek session için tekrarlayan
+  betiklerin yerine geçer
+
+Kullanım:
+    python3 session_analytics.py [session_archive/ | session_dizini | trafik.log ...]
+                                 [--csv kpi.csv] [--json] [--workers N]
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import logging
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from esp32_comm import parse_message
+from shm_ring import STREAMS
+from session_archive import list_sessions, load_session
+from config import ARCHIVE_DIR, ANALYTICS_WEIGHT_SPEC, ANALYTICS_FAULT_GAP
+
+logger = logging.getLogger(__name__)
+
+FAULT_STREAMS = ('fire', 'voice', 'vibration')
+WEIGHT_SCALE = 50           # WeightModule: ham değer x 50 = gram
+WEIGHT_THRESHOLD = 0.5      # WeightModule: bu gramın üstü ürün var demek
+WEIGHT_MEASUREMENTS = 8     # WeightModule: ürün başına ortalanan ölçüm
+
+# Tablo çıktısında gösterilen sütunlar (başlık, anahtar, biçim)
+TABLE_COLUMNS = (
+    ('session', 'session_id', '{}'),
+    ('süre(s)', 'duration', '{:.0f}'),
+    ('kWh tük.', 'energy_consumed_kwh', '{:.4f}'),
+    ('kWh üret.', 'energy_produced_kwh', '{:.4f}'),
+    ('ürün', 'items', '{}'),
+    ('ürün/dk', 'items_per_min', '{:.2f}'),
+    ('ara p50', 'interarrival_p50', '{:.2f}'),
+    ('ara p95', 'interarrival_p95', '{:.2f}'),
+    ('tartım', 'weighed', '{}'),
+    ('ağ.ort', 'weight_mean', '{:.1f}'),
+    ('ağ.σ', 'weight_std', '{:.2f}'),
+    ('Cpk', 'weight_cpk', '{:.2f}'),
+    ('arıza', 'faults', '{}'),
+    ('MTTR(s)', 'mttr', '{:.1f}'),
+)
+
+
+# --- Girdi ---
+
+def find_sources(paths):
+    """Yolları işlenecek kaynaklara çevir: ('archive', session_dizini) / ('traffic', dosya)"""
+    sources = []
+    for path in paths:
+        if os.path.isfile(path):
+            sources.append(('traffic', path))
+        elif os.path.exists(os.path.join(path, 'session.json')):
+            sources.append(('archive', path))
+        elif os.path.isdir(path):
+            sources.extend(('archive', meta['dir']) for meta in list_sessions(path))
+        else:
+            logger.warning(f"⚠️ Bulunamadı: {path}")
+    return sources
+
+
+def load_traffic(path):
+    """Kaydedilmiş ESP32 trafiği → (meta, ts, stream, value)"""
+    codes = {name: code for code, name in enumerate(STREAMS)}
+    ts, stream, value = [], [], []
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            parts = line.split(None, 1)
+            if len(parts) != 2:
+                continue
+            try:
+                t = float(parts[0])
+                parsed = parse_message(parts[1].strip())
+            except ValueError:
+                continue
+            if parsed is None:
+                continue
+            msg_type, v = parsed
+            ts.append(t)
+            stream.append(codes[msg_type])
+            value.append(1.0 if v is None else float(v))
+
+    meta = {
+        'session_id': os.path.splitext(os.path.basename(path))[0],
+        'wc_id': None,
+        'started': ts[0] if ts else None,
+        'ended': ts[-1] if ts else None,
+        'streams': list(STREAMS)
+    }
+    return meta, np.array(ts), np.array(stream, dtype=np.uint8), np.array(value)
+
+
+def load_source(source):
+    """Kaynak → (meta, ts, stream, value)"""
+    kind, path = source
+    if kind == 'traffic':
+        return load_traffic(path)
+    with open(os.path.join(path, 'session.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    data = load_session(path)
+    return meta, data['ts'], data['stream'], data['value']
+
+
+# --- KPI hesapları ---
+
+def integrate_kwh(ts, watts):
+    """Güç örneklerinin yamuk integrali (W·s → kWh)"""
+    if len(ts) < 2:
+        return 0.0
+    return float(np.sum((watts[1:] + watts[:-1]) * np.diff(ts)) / 2 / 3.6e6)
+
+
+def weight_items(raw):
+    """
+    Ham ağırlık akışı → ürün başına ortalama ağırlık (gram).
+    WeightModule gibi: eşik üstü her kesintisiz bölüm bir ürün, ilk 8 ölçümün
+    ortalaması; 8 ölçüme ulaşmayan ürün sayılmaz (tara bilinmediği için 0 kabul edilir).
+    """
+    grams = raw * WEIGHT_SCALE
+    present = grams > WEIGHT_THRESHOLD
+    if not present.any():
+        return np.empty(0)
+
+    starts = present & ~np.concatenate(([False], present[:-1]))
+    item = np.cumsum(starts) - 1
+    idx = np.flatnonzero(present)
+    item = item[idx]
+
+    # Ürün içindeki sıra: indeks - ürünün ilk indeksi
+    first = idx[np.flatnonzero(starts[idx])]
+    rank = idx - first[item]
+    keep = rank < WEIGHT_MEASUREMENTS
+
+    n_items = len(first)
+    counts = np.bincount(item[keep], minlength=n_items)
+    sums = np.bincount(item[keep], weights=grams[idx][keep], minlength=n_items)
+    full = counts == WEIGHT_MEASUREMENTS
+    return sums[full] / WEIGHT_MEASUREMENTS
+
+
+def fault_episodes(fault_ts, gap):
+    """Arıza tetik zamanları → (başlangıçlar, bitişler); gap'ten yakın tetikler tek arıza"""
+    if len(fault_ts) == 0:
+        return fault_ts, fault_ts
+    breaks = np.flatnonzero(np.diff(fault_ts) > gap)
+    starts = fault_ts[np.concatenate(([0], breaks + 1))]
+    ends = fault_ts[np.concatenate((breaks, [len(fault_ts) - 1]))]
+    return starts, ends
+
+
+def compute_kpis(meta, ts, stream, value, weight_spec=ANALYTICS_WEIGHT_SPEC, fault_gap=ANALYTICS_FAULT_GAP):
+    """Tek session'ın tüm KPI'ları (sözlük)"""
+    names = meta['streams']
+    if len(ts) > 1 and np.any(np.diff(ts) < 0):
+        order = np.argsort(ts, kind='stable')
+        ts, stream, value = ts[order], stream[order], value[order]
+
+    def select(name):
+        if name not in names:
+            return np.empty(0), np.empty(0)
+        mask = stream == names.index(name)
+        return ts[mask], value[mask]
+
+    started = meta.get('started') or (float(ts[0]) if len(ts) else None)
+    ended = meta.get('ended') or (float(ts[-1]) if len(ts) else None)
+    duration = (ended - started) if started is not None and ended is not None else 0.0
+
+    kpis = {
+        'session_id': meta.get('session_id'),
+        'wc_id': meta.get('wc_id'),
+        'started': started,
+        'duration': duration,
+        'samples': int(len(ts)),
+        'energy_consumed_kwh': integrate_kwh(*select('power')),
+        'energy_produced_kwh': integrate_kwh(*select('production_w')),
+    }
+
+    # Ürün sayımı
+    count_ts, _ = select('count')
+    gaps = np.diff(count_ts)
+    kpis['items'] = int(len(count_ts))
+    kpis['items_per_min'] = len(count_ts) / duration * 60 if duration > 0 else None
+    if len(gaps):
+        p50, p95 = np.percentile(gaps, (50, 95))
+        mean = float(gaps.mean())
+        kpis.update({
+            'interarrival_mean': mean,
+            'interarrival_p50': float(p50),
+            'interarrival_p95': float(p95),
+            'interarrival_max': float(gaps.max()),
+            'interarrival_cv': float(gaps.std() / mean) if mean > 0 else None
+        })
+    else:
+        kpis.update(dict.fromkeys(('interarrival_mean', 'interarrival_p50', 'interarrival_p95',
+                                   'interarrival_max', 'interarrival_cv')))
+
+    # Ağırlık
+    weights = weight_items(select('weight')[1])
+    kpis['weighed'] = int(len(weights))
+    kpis['weight_mean'] = float(weights.mean()) if len(weights) else None
+    kpis['weight_std'] = float(weights.std(ddof=1)) if len(weights) > 1 else None
+    kpis['weight_cpk'] = None
+    if weight_spec and kpis['weight_std']:
+        lsl, usl = weight_spec
+        mean, std = kpis['weight_mean'], kpis['weight_std']
+        kpis['weight_cpk'] = min(usl - mean, mean - lsl) / (3 * std)
+
+    # Arızalar: onarım süresi = arıza başlangıcı → arızadan sonraki ilk ürün
+    repair_times = []
+    total = 0
+    for name in FAULT_STREAMS:
+        starts, ends = fault_episodes(select(name)[0], fault_gap)
+        kpis[f'faults_{name}'] = int(len(starts))
+        total += len(starts)
+        nxt = np.searchsorted(count_ts, ends, side='right')
+        repaired = nxt < len(count_ts)
+        repair_times.append(count_ts[nxt[repaired]] - starts[repaired])
+    repair_times = np.concatenate(repair_times)
+    kpis['faults'] = total
+    kpis['mttr'] = float(repair_times.mean()) if len(repair_times) else None
+    return kpis
+
+
+def analyze(source, weight_spec=ANALYTICS_WEIGHT_SPEC, fault_gap=ANALYTICS_FAULT_GAP):
+    """Süreç havuzu işi: kaynak → KPI sözlüğü (hata olursa 'error' alanı)"""
+    try:
+        meta, ts, stream, value = load_source(source)
+        kpis = compute_kpis(meta, ts, stream, value, weight_spec, fault_gap)
+    except Exception as e:
+        return {'source': source[1], 'error': str(e)}
+    kpis['source'] = source[1]
+    return kpis
+
+
+def analyze_all(sources, workers=None, weight_spec=ANALYTICS_WEIGHT_SPEC, fault_gap=ANALYTICS_FAULT_GAP):
+    """Tüm kaynakları (mümkünse paralel) işle, sırayı koru"""
+    job = partial(analyze, weight_spec=weight_spec, fault_gap=fault_gap)
+    if workers == 1 or len(sources) < 2:
+        return [job(source) for source in sources]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(sources) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(job, sources, chunksize=chunksize))
+
+
+# --- Çıktı ---
+
+def _cell(row, key, fmt):
+    value = row.get(key)
+    return '-' if value is None else fmt.format(value)
+
+
+def print_table(rows, out=sys.stdout):
+    table = [[title for title, _, _ in TABLE_COLUMNS]]
+    table += [[_cell(row, key, fmt) for _, key, fmt in TABLE_COLUMNS] for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(TABLE_COLUMNS))]
+    for line in table:
+        print('  '.join(cell.rjust(width) for cell, width in zip(line, widths)), file=out)
+
+
+def write_csv(rows, path):
+    fields = []
+    for row in rows:
+        fields.extend(key for key in row if key not in fields)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Session KPI analizi (arşiv / kaydedilmiş ESP32 trafiği)")
+    parser.add_argument('paths', nargs='*', default=[ARCHIVE_DIR],
+                        help='arşiv dizini, session dizini ya da trafik dosyası')
+    parser.add_argument('--workers', type=int, default=None, help='süreç sayısı (varsayılan: CPU sayısı)')
+    parser.add_argument('--lsl', type=float, default=None, help='ağırlık alt spesifikasyon sınırı (g)')
+    parser.add_argument('--usl', type=float, default=None, help='ağırlık üst spesifikasyon sınırı (g)')
+    parser.add_argument('--fault-gap', type=float, default=ANALYTICS_FAULT_GAP)
+    parser.add_argument('--csv', help='KPI tablosunu CSV olarak yaz')
+    parser.add_argument('--json', action='store_true', help='tablo yerine JSON yaz')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    weight_spec = ANALYTICS_WEIGHT_SPEC
+    if args.lsl is not None and args.usl is not None:
+        weight_spec = (args.lsl, args.usl)
+
+    sources = find_sources(args.paths)
+    start = time.perf_counter()
+    results = analyze_all(sources, args.workers, weight_spec, args.fault_gap)
+    elapsed = time.perf_counter() - start
+
+    rows = [r for r in results if 'error' not in r]
+    for r in results:
+        if 'error' in r:
+            logger.warning(f"⚠️ {r['source']}: {r['error']}")
+
+    if args.json:
+        json.dump(rows, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print_table(rows)
+    if args.csv:
+        write_csv(rows, args.csv)
+
+    logger.info(f"📊 {len(rows)}/{len(sources)} session analiz edildi ({elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
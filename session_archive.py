@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Session Arşivi (sütunlu dosyalar, ders analitiği için)
+- Aktif session boyunca ESP32 ölçümleri bellekte sütun halinde toplanır
+  (ts, stream, value) ve ARCHIVE_CHUNK_ROWS satırda bir parça dosyaya yazılır;
+  session bitince kalan satırlar ve session.json yazılır
+- pyarrow varsa Parquet, yoksa sıkıştırmasız .npz parçalar
+- Dosya yazma ayrı thread'de (seri port thread'i beklemez)
+- Yükleyici dosyaları bellek eşlemeli açar (npz üyeleri doğrudan memmap);
+  bir dönemlik veri tek numpy dizisine saniyeler içinde okunur
+
+Dizin yapısı:
+    session_archive/session_<id>_<başlangıç>/session.json
+    session_archive/session_<id>_<başlangıç>/chunk_00000.parquet | .npz
+"""
+
+import os
+import json
+import time
+import queue
+import zipfile
+import logging
+from array import array
+from threading import Thread, Lock
+
+import numpy as np
+
+from shm_ring import STREAMS
+from config import ARCHIVE_DIR, ARCHIVE_CHUNK_ROWS, ARCHIVE_FORMAT
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+STREAM_CODES = {name: code for code, name in enumerate(STREAMS)}
+COLUMNS = ('ts', 'stream', 'value')
+COLUMN_DTYPES = {'session_id': np.int64, 'wc_id': np.int16,
+                 'ts': np.float64, 'stream': np.uint8, 'value': np.float64}
+
+
+def _empty_columns(names):
+    """Satırsız sütunlar - arşivdeki gerçek tiplerle (stream kodu indeks olarak kullanılabilsin)"""
+    return {name: np.empty(0, dtype=COLUMN_DTYPES[name]) for name in names}
+
+
+def _resolve_format(fmt):
+    if fmt == 'parquet' and not PYARROW_AVAILABLE:
+        logger.warning("⚠️ pyarrow yok, arşiv .npz olarak yazılacak")
+        return 'npz'
+    if fmt == 'auto':
+        return 'parquet' if PYARROW_AVAILABLE else 'npz'
+    return fmt
+
+
+class SessionArchiveWriter:
+    """Aktif session'ın ölçümlerini parça parça sütunlu dosyalara yazar"""
+
+    def __init__(self, directory=ARCHIVE_DIR, chunk_rows=ARCHIVE_CHUNK_ROWS, fmt=ARCHIVE_FORMAT):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.format = _resolve_format(fmt)
+
+        self.lock = Lock()
+        self.meta = None        # Aktif session bilgisi (yoksa None)
+        self.chunk_index = 0
+        self._new_buffers()
+
+        self.jobs = queue.Queue()
+        self.thread = Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+
+    def _new_buffers(self):
+        self.ts = array('d')
+        self.stream = array('B')
+        self.value = array('d')
+
+    # --- Session ---
+
+    def begin(self, session_id, wc_id=None, card_uid=None):
+        """Session kaydını başlat (açık kayıt varsa önce kapatılır)"""
+        self.end()
+        started = time.time()
+        session_dir = os.path.join(self.directory,
+                                   f"session_{session_id}_{time.strftime('%Y%m%d_%H%M%S', time.localtime(started))}")
+        with self.lock:
+            self.meta = {
+                'session_id': session_id,
+                'wc_id': wc_id,
+                'card_uid': card_uid,
+                'started': started,
+                'ended': None,
+                'format': self.format,
+                'streams': list(STREAMS),
+                'rows': 0,
+                'chunks': [],
+                'dir': session_dir
+            }
+            self.chunk_index = 0
+            self._new_buffers()
+        logger.info(f"🗄 Session arşivi başladı: {session_dir}")
+
+    def end(self):
+        """Session kaydını bitir - kalan satırlar ve session.json arka planda yazılır"""
+        with self.lock:
+            if self.meta is None:
+                return
+            meta = self.meta
+            self.meta = None
+            meta['ended'] = time.time()
+            self._flush_locked(meta)
+        self.jobs.put(('meta', meta))
+
+    def on_sample(self, msg_type, value, ts):
+        """ESP32Communication dinleyicisi"""
+        if self.meta is None:
+            return
+        code = STREAM_CODES.get(msg_type)
+        if code is None:
+            return
+
+        with self.lock:
+            meta = self.meta
+            if meta is None:
+                return
+            self.ts.append(ts)
+            self.stream.append(code)
+            self.value.append(1.0 if value is None else float(value))
+            if len(self.ts) >= self.chunk_rows:
+                self._flush_locked(meta)
+
+    def _flush_locked(self, meta):
+        """Tamponu parça işi olarak yazıcıya ver (self.lock tutulurken)"""
+        if not self.ts:
+            return
+        name = f"chunk_{self.chunk_index:05d}.{self.format}"
+        self.chunk_index += 1
+        meta['chunks'].append(name)
+        meta['rows'] += len(self.ts)
+        self.jobs.put(('chunk', meta['dir'], name, self.ts, self.stream, self.value))
+        self._new_buffers()
+
+    def close(self, timeout=10):
+        """Açık session'ı bitir ve yazıcının işi bitirmesini bekle"""
+        self.end()
+        self.jobs.put(None)
+        self.thread.join(timeout=timeout)
+
+    # --- Yazıcı thread ---
+
+    def _writer_loop(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            try:
+                if job[0] == 'chunk':
+                    self._write_chunk(*job[1:])
+                else:
+                    self._write_meta(job[1])
+            except OSError as e:
+                logger.error(f"❌ Arşiv yazma hatası: {e}")
+
+    def _write_chunk(self, session_dir, name, ts, stream, value):
+        os.makedirs(session_dir, exist_ok=True)
+        path = os.path.join(session_dir, name)
+        columns = {
+            'ts': np.frombuffer(ts, dtype=np.float64),
+            'stream': np.frombuffer(stream, dtype=np.uint8),
+            'value': np.frombuffer(value, dtype=np.float64)
+        }
+        tmp_path = path + '.tmp'
+        if self.format == 'parquet':
+            pq.write_table(pa.table(columns), tmp_path)
+        else:
+            # Sıkıştırmasız - yükleyici üyeleri doğrudan memmap edebilsin
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **columns)
+        os.replace(tmp_path, path)
+        logger.debug(f"Arşiv parçası yazıldı: {path} ({len(ts)} satır)")
+
+    def _write_meta(self, meta):
+        os.makedirs(meta['dir'], exist_ok=True)
+        data = {k: v for k, v in meta.items() if k != 'dir'}
+        tmp_path = os.path.join(meta['dir'], 'session.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(meta['dir'], 'session.json'))
+        logger.info(f"🗄 Session arşivi tamamlandı: {meta['dir']} "
+                    f"({meta['rows']} satır, {len(meta['chunks'])} parça)")
+
+
+# --- Yükleyici ---
+
+def _memmap_npz(path):
+    """Sıkıştırmasız .npz üyelerini kopyalamadan numpy.memmap olarak aç"""
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as f:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(zf.open(info))
+                continue
+
+            # Yerel dosya başlığı: 30 bayt + dosya adı + ekstra alan
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(f.read(4), dtype='<u2')
+            data_offset = info.header_offset + 30 + int(name_len) + int(extra_len)
+
+            f.seek(data_offset)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                     order='F' if fortran else 'C')
+    return arrays
+
+
+def load_chunk(path):
+    """Tek parça dosyası → {'ts', 'stream', 'value'} (mümkünse kopyasız)"""
+    if path.endswith('.parquet'):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("Parquet okumak için pyarrow gerekli")
+        table = pq.read_table(path, memory_map=True)
+        return {name: table.column(name).to_numpy() for name in COLUMNS}
+    return _memmap_npz(path)
+
+
+def list_sessions(directory=ARCHIVE_DIR):
+    """Tamamlanmış session'ların metadata listesi (başlangıç sırasıyla)"""
+    sessions = []
+    if not os.path.isdir(directory):
+        return sessions
+    for name in os.listdir(directory):
+        meta_path = os.path.join(directory, name, 'session.json')
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            meta['dir'] = os.path.join(directory, name)
+            sessions.append(meta)
+    return sorted(sessions, key=lambda m: m['started'])
+
+
+def load_session(session_dir, streams=None):
+    """
+    Bir session'ın tüm parçaları → {'ts', 'stream', 'value'} (tek dizi).
+    streams verilirse sadece o akışlar ('power', 'weight' ...) döner.
+    """
+    with open(os.path.join(session_dir, 'session.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    chunks = [load_chunk(os.path.join(session_dir, name)) for name in meta['chunks']]
+    return _concat(chunks, meta['streams'], streams)
+
+
+def load_archive(directory=ARCHIVE_DIR, t0=None, t1=None, streams=None):
+    """
+    Arşivdeki (t0-t1 aralığında başlamış) tüm session'lar tek tabloda.
+    Dönüş: {'session_id', 'wc_id', 'ts', 'stream', 'value'} numpy dizileri ve 'streams' isim listesi
+    ('stream' kodu bu listenin indeksidir: yüklenen session'larda kayıtlı ve istenen akışlar)
+    """
+    parts = []
+    names = []
+    for meta in list_sessions(directory):
+        if (t0 is not None and meta['started'] < t0) or (t1 is not None and meta['started'] >= t1):
+            continue
+        data = load_session(meta['dir'], streams)
+        # Session'lar farklı akış listesiyle yazılmış olabilir - kodlar ortak listeye çevrilir
+        for name in meta['streams']:
+            if name not in names and (not streams or name in streams):
+                names.append(name)
+        remap = np.array([names.index(name) if name in names else 0 for name in meta['streams']],
+                         dtype=np.uint8)
+        data['stream'] = remap[data['stream']]
+        n = len(data['ts'])
+        data['session_id'] = np.full(n, meta['session_id'], dtype=np.int64)
+        data['wc_id'] = np.full(n, meta['wc_id'] if meta['wc_id'] is not None else -1, dtype=np.int16)
+        parts.append(data)
+
+    columns = ('session_id', 'wc_id') + COLUMNS
+    result = {name: np.concatenate([p[name] for p in parts]) for name in columns} if parts \
+        else _empty_columns(columns)
+    result['streams'] = names
+    return result
+
+
+def _concat(chunks, stream_names, streams=None):
+    if not chunks:
+        return _empty_columns(COLUMNS)
+    result = {name: np.concatenate([c[name] for c in chunks]) for name in COLUMNS}
+    if streams:
+        # Arşivdeki kodlar o günkü akış listesine göre - isimle eşle
+        codes = [stream_names.index(s) for s in streams if s in stream_names]
+        mask = np.isin(result['stream'], codes)
+        result = {name: column[mask] for name, column in result.items()}
+    return result
+
+
+# Test
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="Session arşivi özeti")
+    parser.add_argument('--dir', default=ARCHIVE_DIR)
+    parser.add_argument('--self-test', action='store_true', help='geçici klasörde boş session testi')
+    args = parser.parse_args()
+
+    if args.self_test:
+        import shutil
+        import tempfile
+        directory = tempfile.mkdtemp(prefix='archive_')
+        writer = SessionArchiveWriter(directory, fmt='npz')
+        writer.begin(1, wc_id=2)
+        writer.end()                          # Ölçümsüz session
+        assert len(load_archive(directory)['ts']) == 0
+        assert load_archive(directory)['stream'].dtype == np.uint8
+        time.sleep(0.01)
+        writer.begin(2, wc_id=2)
+        for k in range(5):
+            writer.on_sample('power', 50.0 + k, 1000.0 + k)
+        writer.on_sample('weight', 150.0, 1005.0)
+        writer.close()
+        data = load_archive(directory)
+        assert sorted(np.unique(data['session_id'])) == [2] and len(data['ts']) == 6
+        assert [data['streams'][code] for code in data['stream']] == ['power'] * 5 + ['weight']
+        assert len(load_archive(directory, streams=['fire'])['ts']) == 0
+        shutil.rmtree(directory)
+        print("✅ Boş session testi geçti")
+        raise SystemExit
+
+    start = time.perf_counter()
+    data = load_archive(args.dir)
+    elapsed = time.perf_counter() - start
+    print(f"{len(np.unique(data['session_id']))} session, {len(data['ts'])} satır, {elapsed:.2f} s")
+    for code, name in enumerate(data['streams']):
+        values = data['value'][data['stream'] == code]
+        if len(values):
+            print(f"  {name:>13}: n={len(values):>8}  ort={values.mean():9.3f}  "
+                  f"min={values.min():9.3f}  max={values.max():9.3f}")
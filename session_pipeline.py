@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Session Başlatma Hattı (NFC kart → session hazır)
+- startSession POST'u ve currentSessionId sorgusu GUI thread'i dışında çalışır
+- startSession cevabı session_id içeriyorsa doğrudan kullanılır
+- İçermiyorsa currentSessionId kısa, giderek uzayan aralıklarla sorgulanır
+  (sabit 1.5 s bekleme yok, sunucu yavaşsa da deadline'a kadar denenir)
+- Kart okutma → hazır gecikmesi kaydedilir (p50/p95/p99)
+- Offline eşitleme hattı ayırmışken (claim) okutulan kart kaybolmaz: başlatma
+  sıraya alınır ve release() ile hemen çalışır
+"""
+
+import time
+import logging
+from collections import deque
+from threading import Thread, Lock
+
+from api_client import get_client, percentile
+from config import SESSION_POLL_INITIAL, SESSION_POLL_MAX, SESSION_START_DEADLINE
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStartResult:
+    """Session başlatma sonucu"""
+
+    __slots__ = ('ok', 'session_id', 'status', 'error', 'latency', 'started')
+
+    def __init__(self, ok, session_id=None, status=None, error=None, latency=0.0, started=False):
+        self.ok = ok
+        self.session_id = session_id
+        self.status = status      # startSession HTTP kodu
+        self.error = error
+        self.latency = latency    # Saniye - kart okutma → hazır
+        self.started = started    # startSession başarılı oldu mu? (ID alınamasa bile)
+
+
+def extract_session_id(data):
+    """startSession cevabından session ID çıkar (yoksa None)"""
+    if isinstance(data, dict):
+        for key in ('session_id', 'sessionId', 'id'):
+            value = data.get(key)
+            if value is not None:
+                data = value
+                break
+        else:
+            return None
+    try:
+        session_id = int(data)
+    except (TypeError, ValueError):
+        return None
+    return session_id if session_id > 0 else None
+
+
+class SessionStarter:
+    """Session başlatma hattı - her kart okutma ayrı bir worker thread'inde"""
+
+    def __init__(self, api=None, poll_initial=SESSION_POLL_INITIAL, poll_max=SESSION_POLL_MAX,
+                 deadline=SESSION_START_DEADLINE):
+        self.api = api or get_client()
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.deadline = deadline
+
+        self.lock = Lock()
+        self.busy = False
+        self.claimed = False        # Hat offline eşitlemeye ayrılmış
+        self.deferred = None        # Eşitleme bitince çalışacak başlatma (card_uid, wc_id, on_done)
+        self.latencies = deque(maxlen=500)
+        self.last_session_ids = {}  # wc_id → son bilinen session (eski ID'yi yeni sanmamak için)
+
+    def start(self, card_uid, wc_id, on_done):
+        """
+        Session başlatmayı arka planda başlat.
+        on_done(SessionStartResult) worker thread'inden çağrılır (GUI tarafı root.after ile almalı).
+        Hat offline eşitlemeye ayrılmışsa başlatma sıraya alınır (release() ile çalışır).
+        Zaten bir başlatma sürüyor ya da sırada bekliyorsa False döner.
+        """
+        with self.lock:
+            if self.claimed and self.deferred is None:
+                self.deferred = (card_uid, wc_id, on_done)
+                logger.info(f"⏳ Offline eşitleme sürüyor, session başlatma sıraya alındı: wc_id={wc_id}")
+                return True
+            if self.busy:
+                logger.warning("⚠️ Session başlatma zaten sürüyor")
+                return False
+            self.busy = True
+
+        Thread(target=self._run, args=(card_uid, wc_id, on_done), daemon=True).start()
+        return True
+
+    def is_busy(self):
+        return self.busy
+
+    def is_claimed(self):
+        """Hat offline eşitlemeye ayrılmış mı? (kart okutması sıraya alınabilir)"""
+        return self.claimed
+
+    def claim(self):
+        """Hattı tek session'ın eşitlemesi için ayır (başka başlatma sürüyorsa False)"""
+        with self.lock:
+            if self.busy:
+                return False
+            self.busy = self.claimed = True
+            return True
+
+    def release(self):
+        """Hattı bırak - eşitleme sırasında okutulan kartın başlatması şimdi çalışır"""
+        with self.lock:
+            self.busy = self.claimed = False
+            deferred, self.deferred = self.deferred, None
+        if deferred:
+            self.start(*deferred)
+
+    def forget(self, wc_id, session_id):
+        """Sonlanan session'ı hatırla - bir sonraki başlatmada bu ID kabul edilmez"""
+        with self.lock:
+            self.last_session_ids[wc_id] = session_id
+
+    def resolve(self, card_uid, wc_id):
+        """Session'ı senkron başlat ve ID'yi çöz (offline session eşitleme için, hat claim() ile ayrılmış olmalı)"""
+        t0 = time.monotonic()
+        result = self._start_and_resolve(card_uid, wc_id, t0)
+        result.latency = time.monotonic() - t0
+        if result.ok:
+            with self.lock:
+                self.last_session_ids[wc_id] = result.session_id
+        return result
+
+    def get_latency_stats(self):
+        """Kart okutma → hazır gecikme istatistikleri (ms)"""
+        with self.lock:
+            values = [v * 1000.0 for v in self.latencies]
+        return {
+            'count': len(values),
+            'p50_ms': percentile(values, 50),
+            'p95_ms': percentile(values, 95),
+            'p99_ms': percentile(values, 99)
+        }
+
+    def _run(self, card_uid, wc_id, on_done):
+        t0 = time.monotonic()
+        try:
+            result = self._start_and_resolve(card_uid, wc_id, t0)
+        except Exception as e:
+            logger.error(f"❌ Session başlatma hatası: {e}")
+            result = SessionStartResult(False, error=str(e))
+
+        result.latency = time.monotonic() - t0
+        with self.lock:
+            if result.ok:
+                self.latencies.append(result.latency)
+                self.last_session_ids[wc_id] = result.session_id
+            self.busy = False
+
+        if result.ok:
+            stats = self.get_latency_stats()
+            logger.info(f"⏱ Kart → hazır: {result.latency * 1000:.0f} ms "
+                        f"(p50={stats['p50_ms']:.0f} p95={stats['p95_ms']:.0f} "
+                        f"p99={stats['p99_ms']:.0f} ms, n={stats['count']})")
+
+        try:
+            on_done(result)
+        except Exception as e:
+            logger.error(f"❌ Session sonuç callback hatası: {e}")
+
+    def _start_and_resolve(self, card_uid, wc_id, t0):
+        logger.info(f"📤 Session başlatılıyor: card={card_uid}, wc_id={wc_id}")
+        start = self.api.start_session(card_uid, wc_id)
+        if not start.ok:
+            return SessionStartResult(False, status=start.status,
+                                      error=start.error or f"HTTP {start.status}")
+
+        # Cevap ID içeriyorsa sorguya gerek yok
+        session_id = extract_session_id(start.data)
+        if session_id:
+            logger.info(f"✅ Session ID startSession cevabından alındı: {session_id}")
+            return SessionStartResult(True, session_id, start.status, started=True)
+
+        with self.lock:
+            stale_id = self.last_session_ids.get(wc_id)
+
+        delay = self.poll_initial
+        attempts = 0
+        while True:
+            remaining = self.deadline - (time.monotonic() - t0)
+            if remaining <= 0:
+                break
+
+            attempts += 1
+            result = self.api.get_current_session_id(wc_id, timeout=max(0.5, min(5.0, remaining)))
+            if result.ok and result.data > 0 and result.data != stale_id:
+                logger.info(f"✅ Session ID alındı: {result.data} ({attempts}. sorgu)")
+                return SessionStartResult(True, result.data, start.status, started=True)
+
+            remaining = self.deadline - (time.monotonic() - t0)
+            time.sleep(max(0.0, min(delay, remaining)))
+            delay = min(self.poll_max, delay * 1.6)
+
+        logger.error(f"❌ Session başladı ama ID {self.deadline:.0f}s içinde alınamadı ({attempts} sorgu)")
+        return SessionStartResult(False, status=start.status, error="Session ID alınamadı", started=True)
+
+
+# Test
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    from threading import Event
+
+    starter = SessionStarter()
+    done = Event()
+
+    def on_done(result):
+        print(f"ok={result.ok} session_id={result.session_id} "
+              f"latency={result.latency * 1000:.0f} ms error={result.error}")
+        done.set()
+
+    starter.start("TESTCARD", 5, on_done)
+    done.wait(timeout=30)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Session Durum Eşitleyici
+- Aktif wc_id için currentSessionId'yi arka planda, düşük frekansta ve
+  jitter'lı aralıklarla sorgular (istasyonlar aynı anda vurmaz)
+- Session sunucu tarafında kapatılırsa (eğitmen / başka terminal) ya da
+  yerini başka bir session alırsa olay kuyruğuna bildirir
+- Tek sorguya güvenilmez: takip başladıktan sonraki SESSION_SYNC_GRACE
+  süresinde (sunucu yeni session'ı henüz göstermiyor olabilir) uyuşmazlık
+  sayılmaz, sonra da SESSION_SYNC_CONFIRMATIONS art arda uyuşmazlık gerekir
+- Ölü session'ı API istemcisine bildirir; modüllerin o session'a
+  gönderdiği olaylar ağa çıkmadan düşürülür
+- GUI kuyruğu root.after ile okur; UI ve seri port thread'i hiç beklemez
+"""
+
+import time
+import queue
+import random
+import logging
+from threading import Thread, Lock, Event
+
+from api_client import get_client, is_local_session_id
+from config import (SESSION_SYNC_INTERVAL, SESSION_SYNC_JITTER, SESSION_SYNC_TIMEOUT, SESSION_SYNC_GRACE,
+                    SESSION_SYNC_CONFIRMATIONS)
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStateEvent:
+    """Eşitleyicinin GUI'ye bildirdiği durum değişikliği"""
+
+    ENDED = 'ended'              # Sunucuda açık session yok
+    REPLACED = 'replaced'        # Aynı wc_id'de başka bir session açılmış
+    UNREACHABLE = 'unreachable'  # API'ye ulaşılamıyor
+    REACHABLE = 'reachable'      # API tekrar erişilebilir
+
+    __slots__ = ('kind', 'wc_id', 'session_id', 'server_session_id')
+
+    def __init__(self, kind, wc_id, session_id, server_session_id=None):
+        self.kind = kind
+        self.wc_id = wc_id
+        self.session_id = session_id                # Yerelde takip edilen session
+        self.server_session_id = server_session_id  # Sunucunun bildirdiği session
+
+
+class SessionSynchronizer:
+    """currentSessionId takibi - değişiklikler events kuyruğuna yazılır"""
+
+    def __init__(self, api=None, events=None, interval=SESSION_SYNC_INTERVAL,
+                 jitter=SESSION_SYNC_JITTER, timeout=SESSION_SYNC_TIMEOUT, grace=SESSION_SYNC_GRACE,
+                 confirmations=SESSION_SYNC_CONFIRMATIONS):
+        self.api = api or get_client()
+        self.events = events if events is not None else queue.Queue()
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.grace = grace
+        self.confirmations = max(1, confirmations)
+
+        self.lock = Lock()
+        self.wc_id = None
+        self.session_id = None
+        self.watched_at = 0.0       # time.monotonic() - takip başlangıcı
+        self.mismatches = 0         # Art arda uyuşmayan sorgu sayısı
+        self.reachable = True
+
+        self.running = False
+        self.wake_event = Event()
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        logger.info("✅ Session eşitleyici başladı")
+
+    def stop(self):
+        self.running = False
+        self.wake_event.set()
+        if self.thread:
+            self.thread.join(timeout=self.timeout + 1)
+            self.thread = None
+
+    def watch(self, wc_id, session_id):
+        """Session'ı takibe al (yerel/offline session'lar takip edilmez)"""
+        if is_local_session_id(session_id):
+            self.unwatch()
+            return
+        with self.lock:
+            self.wc_id = wc_id
+            self.session_id = session_id
+            self.watched_at = time.monotonic()
+            self.mismatches = 0
+        logger.debug(f"Session takibi: wc_id={wc_id}, session_id={session_id}")
+
+    def unwatch(self):
+        with self.lock:
+            self.wc_id = None
+            self.session_id = None
+            self.mismatches = 0
+
+    def _next_delay(self):
+        return self.interval * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+
+    def _loop(self):
+        while self.running:
+            self.wake_event.wait(self._next_delay())
+            self.wake_event.clear()
+            if not self.running:
+                break
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"❌ Session eşitleme hatası: {e}")
+
+    def check(self):
+        """Tek sorgu - değişiklik varsa kuyruğa olay yazar"""
+        with self.lock:
+            wc_id, session_id = self.wc_id, self.session_id
+        if session_id is None:
+            return
+
+        result = self.api.get_current_session_id(wc_id, timeout=self.timeout)
+
+        # Bağlantı durumu değişiklikleri (sadece geçişlerde bildirilir)
+        if not result.ok:
+            if self.reachable and result.status is None:
+                self.reachable = False
+                self.events.put(SessionStateEvent(SessionStateEvent.UNREACHABLE, wc_id, session_id))
+            return
+        if not self.reachable:
+            self.reachable = True
+            self.events.put(SessionStateEvent(SessionStateEvent.REACHABLE, wc_id, session_id))
+
+        server_session_id = result.data
+        with self.lock:
+            # Sorgu sürerken takip değiştiyse sonucu yok say
+            if self.session_id != session_id:
+                return
+            if server_session_id == session_id:
+                self.mismatches = 0
+                return
+            # Yeni session sunucuda henüz görünmüyor olabilir
+            if time.monotonic() - self.watched_at < self.grace:
+                logger.debug(f"Session henüz sunucuda görünmüyor: ID={session_id}, sunucu={server_session_id}")
+                return
+            self.mismatches += 1
+            if self.mismatches < self.confirmations:
+                logger.info(f"ℹ️ Session sunucuyla uyuşmuyor ({self.mismatches}/{self.confirmations}): "
+                            f"ID={session_id}, sunucu={server_session_id}")
+                return
+            self.wc_id = None
+            self.session_id = None
+            self.mismatches = 0
+
+        kind = SessionStateEvent.ENDED if server_session_id <= 0 else SessionStateEvent.REPLACED
+        logger.warning(f"⚠️ Session sunucuda geçersiz: ID={session_id}, sunucu={server_session_id}")
+        self.api.mark_session_dead(session_id)
+        self.events.put(SessionStateEvent(kind, wc_id, session_id, server_session_id))
+
+
+# Test
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    sync = SessionSynchronizer(interval=2.0)
+    sync.watch(5, 1)
+    sync.start()
+
+    try:
+        while True:
+            event = sync.events.get()
+            print(f"{event.kind}: wc_id={event.wc_id} session={event.session_id} "
+                  f"sunucu={event.server_session_id}")
+    except KeyboardInterrupt:
+        sync.stop()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Paylaşımlı Bellek Halka Tamponu (canlı ESP32 ölçümleri)
+- ESP32Communication'ın sahibi olan süreç yazar (ShmRingWriter),
+  diğer yerel süreçler (dashboard, analiz, ikinci GUI) okur (ShmRingReader)
+- Sabit boyutlu, mmap'lenmiş dosya; her akış için ayrı halka
+  (ts, value) kayıtları '<dd' olarak paketlenir
+- Tutarlı okuma: seqlock benzeri protokol - akışın write_index'i sıra sayacıdır;
+  yazar kaydı yazdıktan sonra sayacı artırır, okuyucu kopyadan önce ve sonra
+  sayacı okur ve yazar kopyalanan bölgeye yetişmediyse kopyayı kabul eder
+  (yetiştiyse tekrar dener). Sık yazan akışta okuyucu aç kalmaz.
+- Okuyucu numpy görünümü üzerinden okur; IPC çağrısı yok
+
+Dosya düzeni:
+    [başlık 64 B][akış başlıkları 32 B x N][akış 0 kayıtları][akış 1 kayıtları]...
+    başlık:       magic(8s) version(I) n_streams(I) capacity(I) record_size(I)
+    akış başlığı: name(16s) write_index(Q) reserved(Q)
+"""
+
+import os
+import mmap
+import time
+import struct
+import logging
+
+import numpy as np
+
+from config import SHM_RING_PATH, SHM_RING_CAPACITY
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'MESRING1'
+VERSION = 1
+HEADER = struct.Struct('<8sIIII')
+HEADER_SIZE = 64
+STREAM_HEADER = struct.Struct('<16sQQ')
+RECORD = struct.Struct('<dd')
+RECORD_DTYPE = np.dtype([('ts', '<f8'), ('value', '<f8')])
+
+# ESP32Communication mesaj tipleri
+STREAMS = ('current', 'power', 'production_w', 'production_a', 'weight', 'pwm',
+           'count', 'fire', 'voice', 'vibration')
+
+
+def _layout(n_streams, capacity):
+    """Akış verilerinin başlangıç ofsetleri ve toplam dosya boyutu"""
+    data_start = HEADER_SIZE + STREAM_HEADER.size * n_streams
+    data_start = (data_start + 63) // 64 * 64
+    ring_size = capacity * RECORD.size
+    offsets = [data_start + i * ring_size for i in range(n_streams)]
+    return offsets, data_start + n_streams * ring_size
+
+
+def _counter_index(i):
+    """i. akışın write_index'inin 8 baytlık sayaç dizisindeki yeri"""
+    return (HEADER_SIZE + i * STREAM_HEADER.size + 16) // 8
+
+
+def _counters(mm):
+    # struct.pack_into önce hedefi sıfırlar; okuyucu ara değeri (0) görebilir.
+    # memoryview 'Q' ataması tek 8 baytlık hizalı yazma yapar.
+    return memoryview(mm).cast('Q')
+
+
+class ShmRingWriter:
+    """Tek yazar - ESP32Communication dinleyicisi olarak çalışır"""
+
+    def __init__(self, path=SHM_RING_PATH, streams=STREAMS, capacity=SHM_RING_CAPACITY):
+        self.path = path
+        self.streams = tuple(streams)
+        self.capacity = capacity
+        self.index = {name: i for i, name in enumerate(self.streams)}
+        self.offsets, size = _layout(len(self.streams), capacity)
+        self.write_index = [0] * len(self.streams)
+
+        # Yeni dosya oluşturulup atomik olarak yerine konur (eski okuyucular eski dosyada kalır)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.truncate(size)
+        os.replace(tmp_path, path)
+
+        self.file = open(path, 'r+b')
+        self.mm = mmap.mmap(self.file.fileno(), size)
+        HEADER.pack_into(self.mm, 0, MAGIC, VERSION, len(self.streams), capacity, RECORD.size)
+        for i, name in enumerate(self.streams):
+            STREAM_HEADER.pack_into(self.mm, HEADER_SIZE + i * STREAM_HEADER.size, name.encode('ascii'), 0, 0)
+        self.counters = _counters(self.mm)
+
+        logger.info(f"✅ Paylaşımlı halka tampon: {path} ({len(self.streams)} akış x {capacity} kayıt)")
+
+    def on_sample(self, msg_type, value, ts):
+        """ESP32Communication dinleyicisi"""
+        i = self.index.get(msg_type)
+        if i is None or self.mm is None:
+            return
+
+        value = 1.0 if value is None else float(value)
+
+        # Önce kayıt, sonra sayaç: sayaç < n olan kayıtlar her zaman tamdır
+        n = self.write_index[i]
+        RECORD.pack_into(self.mm, self.offsets[i] + (n % self.capacity) * RECORD.size, ts, value)
+        self.write_index[i] = n + 1
+        self.counters[_counter_index(i)] = n + 1
+
+    def close(self):
+        if self.mm is not None:
+            self.counters.release()
+            self.mm.close()
+            self.mm = None
+            self.file.close()
+            logger.info("⏹ Paylaşımlı halka tampon kapatıldı")
+
+
+class ShmRingReader:
+    """Okuyucu - herhangi bir yerel süreçten"""
+
+    def __init__(self, path=SHM_RING_PATH, retries=100):
+        self.path = path
+        self.retries = retries
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n_streams, capacity, record_size = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise ValueError(f"Geçersiz halka tampon dosyası: {path}")
+
+        self.capacity = capacity
+        self.offsets, _ = _layout(n_streams, capacity)
+        self.streams = []
+        for i in range(n_streams):
+            name = STREAM_HEADER.unpack_from(self.mm, HEADER_SIZE + i * STREAM_HEADER.size)[0]
+            self.streams.append(name.rstrip(b'\0').decode('ascii'))
+        self.index = {name: i for i, name in enumerate(self.streams)}
+
+        self.counters = _counters(self.mm)
+
+        # Her akışın halkası üzerine kopyasız numpy görünümü
+        self.rings = [np.frombuffer(self.mm, dtype=RECORD_DTYPE, count=capacity, offset=offset)
+                      for offset in self.offsets]
+
+    def _written(self, i):
+        return self.counters[_counter_index(i)]
+
+    def latest(self, stream, n=None):
+        """
+        Akışın son n kaydı (n=None → halkadaki tümü), eskiden yeniye.
+        En fazla capacity - 1 kayıt: en eski slot yazarın sıradaki slotudur.
+        Dönüş: ('ts', 'value') alanlı numpy dizisi (tutarlı kopya)
+        """
+        i = self.index[stream]
+        ring = self.rings[i]
+        limit = self.capacity - 1
+        for _ in range(self.retries):
+            written = self._written(i)
+            count = min(written, limit) if n is None else min(n, written, limit)
+            end = written % self.capacity
+            start = end - count
+            if start >= 0:
+                snapshot = ring[start:end].copy()
+            else:
+                snapshot = np.concatenate((ring[start:], ring[:end]))
+
+            # Yazar bu arada en fazla (capacity - count - 1) kayıt ilerlediyse
+            # yazdığı / yazmakta olduğu slotlar kopyalanan bölgenin dışındadır
+            advanced = self._written(i) - written
+            if advanced < self.capacity - count:
+                return snapshot
+            # Tümü istendiyse üzerine yazılan en eski kayıtlar atılır (tekrar denemeye gerek yok)
+            if n is None and advanced < self.capacity:
+                return snapshot[advanced - (self.capacity - count) + 1:]
+        raise RuntimeError(f"Tutarlı okuma yapılamadı: {stream}")
+
+    def last(self, stream):
+        """Son değer (ts, value) ya da None"""
+        records = self.latest(stream, 1)
+        if len(records) == 0:
+            return None
+        return float(records['ts'][0]), float(records['value'][0])
+
+    def since(self, stream, t0):
+        """t0 (time.time() saniyesi) sonrasındaki kayıtlar"""
+        records = self.latest(stream)
+        return records[records['ts'] >= t0]
+
+    def close(self):
+        self.rings = []
+        if hasattr(self, 'counters'):
+            self.counters.release()
+        self.mm.close()
+        self.file.close()
+
+
+# Test
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="Paylaşımlı halka tampon okuyucu / demo yazar")
+    parser.add_argument('--path', default=SHM_RING_PATH)
+    parser.add_argument('--write-demo', action='store_true', help='sahte ölçüm yaz')
+    parser.add_argument('--self-test', action='store_true', help='geçici dosyada halka dönüş testi')
+    args = parser.parse_args()
+
+    if args.self_test:
+        import tempfile
+        path = os.path.join(tempfile.mkdtemp(prefix='shm_ring_'), 'ring.bin')
+        writer = ShmRingWriter(path, capacity=8)
+        reader = ShmRingReader(path)
+        for k in range(3):
+            writer.on_sample('power', k, 100.0 + k)
+        assert list(reader.latest('power')['value']) == [0, 1, 2]
+        # Halka döndükten sonra (15 yazma, kapasite 8)
+        for k in range(3, 15):
+            writer.on_sample('power', k, 100.0 + k)
+        assert list(reader.latest('power', 3)['value']) == [12, 13, 14]
+        assert list(reader.latest('power')['value']) == list(range(8, 15))
+        assert list(reader.since('power', 110.0)['value']) == list(range(10, 15))
+        assert reader.last('power') == (114.0, 14.0)
+        assert len(reader.latest('current')) == 0
+        reader.close()
+        writer.close()
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+        print("✅ Halka dönüş testi geçti")
+    elif args.write_demo:
+        writer = ShmRingWriter(args.path)
+        i = 0
+        try:
+            while True:
+                writer.on_sample('power', 50 + (i % 20), time.time())
+                writer.on_sample('current', 0.2 + (i % 5) * 0.01, time.time())
+                i += 1
+                time.sleep(0.01)
+        except KeyboardInterrupt:
+            writer.close()
+    else:
+        reader = ShmRingReader(args.path)
+        try:
+            while True:
+                for stream in reader.streams:
+                    last = reader.last(stream)
+                    if last:
+                        recent = reader.since(stream, time.time() - 10)
+                        print(f"{stream:>13}: {last[1]:8.2f}  (son 10 s: {len(recent)} kayıt, "
+                              f"ort. {recent['value'].mean() if len(recent) else 0:.2f})")
+                print()
+                time.sleep(1)
+        except KeyboardInterrupt:
+            reader.close()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sentetik Konveyör Videosu (gerçek sayımlı)
+- Bant üzerinde soldan sağa kayan kırmızı / sarı / mavi lekeler (elips),
+  NumPy/OpenCV ile çizilir
+- Değişkenler: leke boyutu, bant hızı (zamanla dalgalanır), ürün aralığı
+  (dokunan / üst üste binen ürünler dahil), sabit engel (ürünleri örten
+  sensör kolu), ışık kayması, gürültü
+- Çıktı: video + gerçek sayım CSV'si (her ürünün merkezinin sayım çizgisini
+  geçtiği kare ve rengi)
+- score(): sayılan olaylar ↔ gerçek geçişler (renk + kare toleransı) →
+  precision / recall
+
+Kullanım:
+    python3 synthetic_conveyor.py belt.avi belt.csv --seconds 60 --rate 2
+    python3 bench_replay.py belt.avi --all-colors --truth belt.csv
+"""
+
+import csv
+import math
+import logging
+import argparse
+
+import cv2
+import numpy as np
+
+from config import COLOR_COUNT_LINE
+
+logger = logging.getLogger(__name__)
+
+# BGR - ColorModule'ün varsayılan HSV aralıklarına düşen tonlar
+COLORS = {'Kirmizi': (30, 30, 220), 'Sari': (20, 220, 230), 'Mavi': (220, 60, 30)}
+
+
+class BeltItem:
+    """Banttaki tek ürün"""
+
+    __slots__ = ('id', 'color', 'offset', 'length', 'height', 'y')
+
+    def __init__(self, item_id, color, offset, length, height, y):
+        self.id = item_id
+        self.color = color
+        self.offset = offset      # Ürünün sol kenarı kadrajın soluna bu bant yer değiştirmesinde girer (piksel)
+        self.length = length      # Bant yönündeki boy (piksel)
+        self.height = height
+        self.y = y                # Merkez y
+
+
+class BeltScene:
+    """
+    rate: ortalama ürün/saniye; min_gap: ürünler arası en az boşluk (piksel, negatif = üst üste biner)
+    speed: ortalama bant hızı (piksel/kare); speed_drift: hız dalgalanma oranı (0.3 = ±%30)
+    light_drift: parlaklık dalgalanma oranı; noise: gürültü standart sapması (0-255)
+    occluder: (x, genişlik) - bandı dikey örten sabit engel ya da None
+    """
+
+    def __init__(self, seconds=60, fps=30, width=640, height=480, belt=(180, 120), rate=1.0,
+                 speed=12.0, speed_drift=0.0, size=(50, 80), min_gap=10, light_drift=0.0, noise=0.0,
+                 occluder=None, colors=None, count_line=COLOR_COUNT_LINE, seed=1):
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.belt = belt
+        self.frames = int(seconds * fps)
+        self.light_drift = light_drift
+        self.noise = noise
+        self.occluder = occluder
+        self.line = int(width * count_line)
+        self.rng = np.random.default_rng(seed)
+        colors = colors or list(COLORS)
+
+        # Bant yer değiştirmesi (her karede kümülatif), hız zamanla dalgalanır
+        t = np.arange(self.frames) / fps
+        speeds = speed * (1 + speed_drift * np.sin(2 * math.pi * t / 20.0 + self.rng.uniform(0, 2 * math.pi)))
+        self.displacement = np.concatenate(([0.0], np.cumsum(speeds[:-1])))
+        self.lighting = 1 + light_drift * np.sin(2 * math.pi * t / 45.0)
+
+        # Ürünler: aralıklar üstel dağılımlı (ortalama rate ürün/s)
+        self.items = []
+        mean_spacing = speed * fps / rate
+        position = 0.0
+        belt_y, belt_h = belt
+        while position < self.displacement[-1] + width:
+            length = int(self.rng.integers(size[0], size[1] + 1))
+            item_h = int(self.rng.integers(size[0], min(size[1], belt_h - 10) + 1))
+            y = belt_y + belt_h / 2 + self.rng.uniform(-1, 1) * max(0, (belt_h - item_h) / 2 - 5)
+            color = colors[int(self.rng.integers(len(colors)))]
+            self.items.append(BeltItem(len(self.items) + 1, color, position, length, item_h, y))
+            gap = max(min_gap, self.rng.exponential(mean_spacing) - length)
+            position += length + gap
+
+        self.background = self.rng.integers(60, 120, (height, width, 3), dtype=np.uint8)
+        self.background[belt_y:belt_y + belt_h] = (90, 90, 90)
+        self.noise_buffer = np.empty((height, width, 3), np.int16)
+
+    def centre_x(self, item, frame_index):
+        """Ürün merkezinin kare içindeki x'i"""
+        return self.displacement[frame_index] - item.offset - item.length / 2
+
+    def render(self, frame_index):
+        """frame_index'teki BGR kare"""
+        frame = self.background.copy()
+        for item in self.items:
+            x = self.centre_x(item, frame_index)
+            if -item.length < x < self.width + item.length:
+                cv2.ellipse(frame, (int(x), int(item.y)), (item.length // 2, item.height // 2), 0, 0, 360,
+                            COLORS[item.color], -1)
+        if self.occluder:
+            x, w = self.occluder
+            frame[:, x:x + w] = (40, 40, 40)
+        if self.light_drift:
+            cv2.convertScaleAbs(frame, dst=frame, alpha=float(self.lighting[frame_index]))
+        if self.noise:
+            cv2.randn(self.noise_buffer, 0, self.noise)
+            frame = cv2.add(frame, self.noise_buffer, dtype=cv2.CV_8U)
+        return frame
+
+    def ground_truth(self):
+        """[(ürün id, renk, geçiş karesi), ...] - merkezi sayım çizgisini video içinde geçen ürünler"""
+        truth = []
+        for item in self.items:
+            centres = self.displacement - item.offset - item.length / 2
+            crossed = np.flatnonzero((centres[:-1] < self.line) & (centres[1:] >= self.line))
+            if len(crossed):
+                truth.append((item.id, item.color, int(crossed[0]) + 1))
+        return truth
+
+    def write(self, video_path, truth_path, fourcc='MJPG'):
+        """Videoyu ve gerçek sayım CSV'sini yaz → gerçek geçiş sayısı"""
+        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*fourcc), self.fps, (self.width, self.height))
+        if not writer.isOpened():
+            raise RuntimeError(f"Video yazılamıyor: {video_path}")
+        for i in range(self.frames):
+            writer.write(self.render(i))
+        writer.release()
+
+        truth = self.ground_truth()
+        with open(truth_path, 'w', newline='', encoding='utf-8') as f:
+            out = csv.writer(f)
+            out.writerow(['item_id', 'color', 'frame', 'time'])
+            for item_id, color, frame in truth:
+                out.writerow([item_id, color, frame, f"{frame / self.fps:.3f}"])
+        logger.info(f"✅ {video_path}: {self.frames} kare, {len(truth)} gerçek geçiş → {truth_path}")
+        return len(truth)
+
+
+def load_truth(path):
+    """Gerçek sayım CSV'si → [(renk, kare), ...]"""
+    with open(path, newline='', encoding='utf-8') as f:
+        return [(row['color'], int(row['frame'])) for row in csv.DictReader(f)]
+
+
+def score(events, truth, tolerance=5):
+    """
+    events: sayılan olaylar [(renk, kare), ...]; truth: load_truth çıktısı
+    Her olay aynı renkte, ±tolerance karedeki eşleşmemiş en yakın gerçek geçişle eşleşir.
+    Dönüş: {'tp', 'fp', 'fn', 'precision', 'recall'}
+    """
+    unmatched = sorted(truth, key=lambda t: t[1])
+    tp = 0
+    for color, frame in sorted(events, key=lambda e: e[1]):
+        candidates = [t for t in unmatched if t[0] == color and abs(t[1] - frame) <= tolerance]
+        if candidates:
+            unmatched.remove(min(candidates, key=lambda t: abs(t[1] - frame)))
+            tp += 1
+    fp, fn = len(events) - tp, len(unmatched)
+    return {'tp': tp, 'fp': fp, 'fn': fn,
+            'precision': tp / (tp + fp) if tp + fp else 1.0,
+            'recall': tp / (tp + fn) if tp + fn else 1.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentetik konveyör videosu + gerçek sayım")
+    parser.add_argument('video')
+    parser.add_argument('truth')
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--rate', type=float, default=1.0, help='ortalama ürün/s')
+    parser.add_argument('--speed', type=float, default=12.0, help='bant hızı (piksel/kare)')
+    parser.add_argument('--speed-drift', type=float, default=0.0)
+    parser.add_argument('--size', type=int, nargs=2, default=(50, 80), metavar=('MIN', 'MAX'))
+    parser.add_argument('--min-gap', type=int, default=10, help='piksel, negatif = üst üste biner')
+    parser.add_argument('--light-drift', type=float, default=0.0)
+    parser.add_argument('--noise', type=float, default=0.0)
+    parser.add_argument('--occluder', type=int, nargs=2, default=None, metavar=('X', 'W'))
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    scene = BeltScene(seconds=args.seconds, fps=args.fps, rate=args.rate, speed=args.speed,
+                      speed_drift=args.speed_drift, size=tuple(args.size), min_gap=args.min_gap,
+                      light_drift=args.light_drift, noise=args.noise,
+                      occluder=tuple(args.occluder) if args.occluder else None, seed=args.seed)
+    scene.write(args.video, args.truth)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ağırlık Merkezi Takibi ve Çizgi Geçişi Sayımı (ColorModule)
+- Her karedeki algılamalar (etiket, x, y) önceki izlerle eşleştirilir:
+  izin sabit hızla tahmin edilen konumuna en yakın algılama, açgözlü (greedy)
+  en kısa mesafe önce eşleştirme, max_distance üstü eşleşmez
+- Eşleşmeyen algılama yeni iz açar, max_missed kare görünmeyen iz silinir
+- Her iz, merkezi sanal sayım çizgisini bant yönünde geçtiğinde bir kez sayılır
+  (soğuma süresi yok - aynı anda birden fazla ürün görünse de doğru sayar)
+- İz etiketi (renk) gözlemlerin çoğunluğu
+- Algılama her karede yapılmayabilir (zamanlayıcı): update(steps=n) ile
+  aradaki kare sayısı verilir, hız ve tahmin kare başına tutulur
+- Banttaki tüm ürünler aynı hızda: yeni iz, oturmuş izlerin ortalama hızıyla
+  (bant hızı) başlar - seyrek algılamada kadraja yeni giren ürün, önündeki
+  ürünün izini çalmaz
+"""
+
+import logging
+from collections import Counter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class Track:
+    """Tek ürün izi"""
+
+    __slots__ = ('id', 'x', 'y', 'vx', 'vy', 'gap', 'missed', 'hits', 'counted', 'labels')
+
+    def __init__(self, track_id, label, x, y, vx=0.0, vy=0.0):
+        self.id = track_id
+        self.x = x
+        self.y = y
+        self.vx = vx          # Kare başına hız (piksel)
+        self.vy = vy
+        self.gap = 0          # Son görüldüğünden beri geçen kare
+        self.missed = 0       # Art arda eşleşmediği güncelleme sayısı
+        self.hits = 1
+        self.counted = False
+        self.labels = Counter({label: 1})
+
+    @property
+    def label(self):
+        return self.labels.most_common(1)[0][0]
+
+    def predict(self):
+        """Şimdiki karedeki tahmini konum (gap kare sonra)"""
+        return self.x + self.vx * self.gap, self.y + self.vy * self.gap
+
+
+class CentroidTracker:
+    """
+    line: sayım çizgisinin konumu (piksel, axis ekseninde)
+    axis: 'x' (bant yatay, çizgi dikey) ya da 'y'
+    direction: +1 artan yönde, -1 azalan yönde geçiş sayılır, 0 her iki yön
+    """
+
+    def __init__(self, line, axis='x', direction=1, max_distance=80.0, max_missed=5):
+        self.line = line
+        self.axis = axis
+        self.direction = direction
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.tracks = []
+        self.next_id = 1
+        self.total_counted = 0
+        self.belt_vx = 0.0    # Bant hızı (piksel/kare, oturmuş izlerden üstel ortalama)
+        self.belt_vy = 0.0
+
+    def reset(self):
+        self.tracks = []
+        self.total_counted = 0
+        self.belt_vx = self.belt_vy = 0.0
+
+    def _crossed(self, before, after):
+        """before → after hareketi sayım çizgisini istenen yönde geçti mi?"""
+        if self.direction >= 0 and before < self.line <= after:
+            return True
+        if self.direction <= 0 and before >= self.line > after:
+            return True
+        return False
+
+    def update(self, detections, steps=1):
+        """
+        detections: [(etiket, x, y), ...] (bu karenin algılamaları)
+        steps: önceki güncellemeden beri geçen kare (algılama atlandıysa > 1)
+        Dönüş: bu karede çizgiyi geçip sayılan izler
+        """
+        for track in self.tracks:
+            track.gap += steps
+        matched_tracks, matched_detections = set(), set()
+        pairs = []
+        if self.tracks and detections:
+            predicted = np.array([track.predict() for track in self.tracks])
+            points = np.array([(x, y) for _, x, y in detections], dtype=float)
+            distances = np.hypot(predicted[:, None, 0] - points[None, :, 0],
+                                 predicted[:, None, 1] - points[None, :, 1])
+            # Açgözlü eşleştirme: en kısa mesafeden başla
+            for flat in np.argsort(distances, axis=None):
+                t, d = divmod(int(flat), len(detections))
+                if distances[t, d] > self.max_distance:
+                    break
+                if t in matched_tracks or d in matched_detections:
+                    continue
+                matched_tracks.add(t)
+                matched_detections.add(d)
+                pairs.append((t, d))
+
+        counted = []
+        for t, d in pairs:
+            track = self.tracks[t]
+            label, x, y = detections[d]
+            before = track.x if self.axis == 'x' else track.y
+            track.vx, track.vy = (x - track.x) / track.gap, (y - track.y) / track.gap
+            track.x, track.y = x, y
+            track.gap = 0
+            track.missed = 0
+            track.hits += 1
+            track.labels[label] += 1
+            if track.hits >= 3:   # Hız en az iki ölçümden
+                self.belt_vx = 0.8 * self.belt_vx + 0.2 * track.vx
+                self.belt_vy = 0.8 * self.belt_vy + 0.2 * track.vy
+            after = x if self.axis == 'x' else y
+            if not track.counted and self._crossed(before, after):
+                track.counted = True
+                self.total_counted += 1
+                counted.append(track)
+
+        # Görünmeyen izler yaşlanır, eşleşmeyen algılamalar yeni iz açar
+        kept = []
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            kept.append(track)
+        for d, (label, x, y) in enumerate(detections):
+            if d not in matched_detections:
+                kept.append(Track(self.next_id, label, x, y, self.belt_vx, self.belt_vy))
+                self.next_id += 1
+        self.tracks = kept
+        return counted
+
+
+# Test
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    # İki ürün aynı anda görüşte, kare başına 20 px ilerliyor
+    tracker = CentroidTracker(line=320)
+    total = 0
+    for frame in range(60):
+        detections = [('Kirmizi', 20 * frame, 240), ('Mavi', 20 * frame - 150, 240)]
+        detections = [d for d in detections if 0 <= d[1] < 640]
+        for track in tracker.update(detections):
+            total += 1
+            print(f"Kare {frame}: iz #{track.id} ({track.label}) çizgiyi geçti")
+    print(f"Toplam: {total} (beklenen 2)")
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kayıttan Kamera Kaynağı (video dosyası / görüntü klasörü)
+- cv2.VideoCapture yerine geçer (isOpened / read / grab / get / set / release):
+  CameraService'e açıcı olarak verilir ya da config.CAMERA_SOURCE ile seçilir
+- realtime=True: kareler kaydın kare hızında verilir; okuyucu yavaş kalırsa
+  kaçırılan kareler atlanır (gerçek kamera gibi)
+- realtime=False: olabildiğince hızlı, hiç kare atlanmaz (benchmark, kare kare
+  karşılaştırma)
+- loop=True: sona gelince başa sarar
+- Kamerasız makinede (CI) algılama / OCR ölçümleri tekrarlanabilir
+"""
+
+import os
+import time
+import logging
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+
+class ReplaySource:
+    """Ortak hız ayarı ve başa sarma; alt sınıflar _next / _skip / _rewind sağlar"""
+
+    def __init__(self, fps, realtime=True, loop=True):
+        self.fps = fps
+        self.realtime = realtime
+        self.loop = loop
+        self.opened = False
+        self.started = None       # İlk karenin monotonic zamanı (realtime)
+        self.position = 0         # Verilen + atlanan kare (başa sarmalar dahil)
+        self.stats = {'frames': 0, 'skipped': 0, 'loops': 0}
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        """Kamera ayarları (boyut, FPS, biçim) kayıtta geçersiz"""
+        return False
+
+    def _pace(self):
+        """Gerçek zamanda: sıradaki karenin zamanını bekle → kaçırılan kare sayısı"""
+        if not self.realtime:
+            return 0
+        now = time.monotonic()
+        if self.started is None:
+            self.started = now
+        due = int((now - self.started) * self.fps)
+        skip = max(0, due - self.position)
+        wait = self.started + (self.position + skip) / self.fps - now
+        if wait > 0:
+            time.sleep(wait)
+        return skip
+
+    def _advance(self, decode):
+        """Bir kare ilerle (sonda başa sar) → kare / True (decode=False) ya da None"""
+        for _ in range(2):
+            frame = self._next(decode)
+            if frame is not None:
+                self.position += 1
+                return frame
+            if not self.loop:
+                return None
+            self._rewind()
+            self.stats['loops'] += 1
+        return None
+
+    def grab(self):
+        return self.opened and self._advance(decode=False) is not None
+
+    def read(self, image=None):
+        if not self.opened:
+            return False, None
+        for _ in range(self._pace()):
+            if self._advance(decode=False) is None:
+                return False, None
+            self.stats['skipped'] += 1
+        frame = self._advance(decode=True)
+        if frame is None:
+            return False, None
+        self.stats['frames'] += 1
+        return True, frame
+
+    def release(self):
+        self.opened = False
+
+
+class VideoFileCapture(ReplaySource):
+    """Video dosyası (OpenCV/FFmpeg'in açabildiği her biçim)"""
+
+    def __init__(self, path, realtime=True, loop=True, fps=None):
+        self.path = path
+        self.capture = cv2.VideoCapture(path)
+        super().__init__(fps or self.capture.get(cv2.CAP_PROP_FPS) or 30.0, realtime, loop)
+        self.opened = self.capture.isOpened()
+        if not self.opened:
+            logger.error(f"❌ Video açılamadı: {path}")
+
+    def _next(self, decode):
+        if decode:
+            ret, frame = self.capture.read()
+            return frame if ret else None
+        return True if self.capture.grab() else None
+
+    def _rewind(self):
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return self.capture.get(prop)
+
+    def release(self):
+        super().release()
+        self.capture.release()
+
+
+class ImageSequenceCapture(ReplaySource):
+    """Klasördeki görüntüler, dosya adı sırasıyla (preload=True: hepsi bellekte, diskten okuma yok)"""
+
+    def __init__(self, directory, fps=30.0, realtime=True, loop=True, preload=False):
+        super().__init__(fps, realtime, loop)
+        self.directory = directory
+        self.files = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        self.index = 0
+        self.images = [cv2.imread(path) for path in self.files] if preload else None
+        self.opened = bool(self.files)
+        if not self.opened:
+            logger.error(f"❌ Klasörde görüntü yok: {directory}")
+
+    def _next(self, decode):
+        if self.index >= len(self.files):
+            return None
+        index = self.index
+        self.index += 1
+        if not decode:
+            return True
+        if self.images is not None:
+            return self.images[index]
+        frame = cv2.imread(self.files[index])
+        if frame is None:
+            logger.warning(f"⚠️ Görüntü okunamadı: {self.files[index]}")
+        return frame
+
+    def _rewind(self):
+        self.index = 0
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self.files)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self.index
+        return 0.0
+
+
+def open_source(source, realtime=True, loop=True, fps=None):
+    """
+    source: kamera index'i (int / '0'), video dosyası ya da görüntü klasörü yolu
+    Dönüş: VideoCapture benzeri nesne
+    """
+    if isinstance(source, int) or str(source).isdigit():
+        return cv2.VideoCapture(int(source))
+    if os.path.isdir(source):
+        return ImageSequenceCapture(source, fps=fps or 30.0, realtime=realtime, loop=loop)
+    return VideoFileCapture(source, realtime=realtime, loop=loop, fps=fps)
+
+
+# Test
+if __name__ == "__main__":
+    import tempfile
+
+    import numpy as np
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    # 2 saniyelik örnek video (30 kare/s)
+    path = os.path.join(tempfile.mkdtemp(), 'ornek.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (640, 480))
+    for i in range(60):
+        frame = np.full((480, 640, 3), 90, np.uint8)
+        cv2.rectangle(frame, (i * 10, 200), (i * 10 + 80, 280), (30, 30, 220), -1)
+        writer.write(frame)
+    writer.release()
+
+    for realtime in (True, False):
+        source = open_source(path, realtime=realtime, loop=True)
+        start = time.perf_counter()
+        for _ in range(90):
+            source.read()
+            if realtime:
+                time.sleep(0.05)    # Yavaş okuyucu: kareler atlanmalı
+        elapsed = time.perf_counter() - start
+        print(f"realtime={realtime}: {elapsed:.2f} s, {source.stats}")
+        source.release()